@@ -0,0 +1,283 @@
+# app/async_engine.py
+import asyncio
+import time
+from urllib.parse import urlparse
+from .async_http import AsyncHttpClient, AsyncHttpError
+from .fetcher import page_fetcher, is_challenge_response
+from .flaresolverr import session_pool, is_captcha_page, FlareSolverrError, CaptchaError
+from .circuit_breaker import CircuitOpenError
+from .scheduler import WATCHLIST_POLL
+
+
+class AsyncWatchEngine:
+    """asyncio replacement for WatcherService._watch_loop.
+
+    Runs one event loop in the watcher thread. Every product check is a
+    task, so hundreds of in-flight fetches cost no extra threads, and
+    stop() cancels the whole task tree at once instead of waiting for
+    the current request or sleep to finish. Price evaluation, history
+    and logging are shared with the thread engine through the service and
+    run in worker threads, as they read and write SQLite and log files.
+    """
+
+    def __init__(self, service, pool=None, fetcher=None):
+        self.service = service
+        self.pool = pool or session_pool
+        self.fetcher = fetcher or page_fetcher
+        self.http = AsyncHttpClient()
+        self.loop = None
+        self._main_task = None
+        self._wake = None
+        self._session_slots = None  # asyncio.Semaphore of the pool size, created on the loop
+
+    def run(self):
+        """Thread target: run the engine until stopped"""
+        self.loop = asyncio.new_event_loop()
+        try:
+            self._main_task = self.loop.create_task(self._main())
+            self.loop.run_until_complete(self._main_task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.run_until_complete(self.http.close())
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+            self.loop.close()
+            self.service.logger.info("Watcher service stopped")
+
+    def cancel(self):
+        """Cancel all in-flight work; safe to call from any thread"""
+        loop, task = self.loop, self._main_task
+        if loop and task and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+    def wake(self):
+        """Interrupt the wait between cycles; safe to call from any thread"""
+        loop, wake = self.loop, self._wake
+        if loop and wake and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    async def _main(self):
+        service = self.service
+        self._wake = asyncio.Event()
+        service.logger.info("Watcher service started (asyncio engine)")
+        await asyncio.to_thread(self.pool.warm)
+
+        while not service.stop_event.is_set():
+            try:
+                products = await asyncio.to_thread(service._load_products)
+
+                if not products:
+                    service.logger.info("No products to watch, sleeping...")
+                    await self._sleep(WATCHLIST_POLL * 6)
+                    continue
+
+                due = service._due_products(products)
+                if due:
+                    await asyncio.to_thread(self.pool.health_check)
+                    await self._run_cycle(None, due)
+                    await asyncio.to_thread(service._schedule_checked, due, products)
+                await asyncio.to_thread(service._schedule_next)
+                await self._wait_for_next_cycle()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                service.logger.error(f"Watcher loop error: {str(e)}", exc_info=True)
+                await asyncio.sleep(30)
+
+    async def _wait_for_next_cycle(self):
+        """Async counterpart of WatcherService._wait_for_next_cycle"""
+        service = self.service
+        while True:
+            remaining = service.next_check_time - time.time()
+            if remaining <= 0:
+                return
+            if await self._sleep(min(remaining, WATCHLIST_POLL)):
+                await asyncio.to_thread(service._reschedule_if_changed)
+            await asyncio.to_thread(service._sync_watchlist)
+
+    async def _sleep(self, seconds):
+        """Wait up to seconds for wake(); returns True when woken"""
+        try:
+            await asyncio.wait_for(self._wake.wait(), seconds)
+        except asyncio.TimeoutError:
+            return False
+        self._wake.clear()
+        return True
+
+    async def _run_cycle(self, config, products):
+        service = self.service
+        max_workers, max_per_host = service._concurrency_limits(config)
+        global_limit = asyncio.Semaphore(max_workers)
+        host_limits = {}
+        for item in products:
+            host = urlparse(item["url"]).netloc.lower()
+            host_limits.setdefault(host, asyncio.Semaphore(max_per_host))
+
+        await asyncio.to_thread(service._start_cycle, products, max_workers, max_per_host)
+
+        tasks = [
+            asyncio.ensure_future(self._check_product(item, config, global_limit, host_limits))
+            for item in products
+        ]
+        try:
+            outcomes = await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            # Let every check run its cleanup (session checkin) before unwinding
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Keep the prices that were fetched before the stop
+            await asyncio.to_thread(service._flush_history)
+            raise
+
+        await asyncio.to_thread(
+            service._finish_cycle, products,
+            outcomes.count("alert"), outcomes.count("error"), outcomes.count("unchanged"),
+            outcomes.count("deferred"),
+        )
+
+    async def _check_product(self, item, config, global_limit, host_limits):
+        url = item["url"]
+        try:
+            async with global_limit, host_limits[urlparse(url).netloc.lower()]:
+                start_time = time.time()
+                html = await self._fetch_html(url)
+                fetch_time = time.time() - start_time
+
+            outcome, alert_message = await asyncio.to_thread(
+                self.service._evaluate_page, item, html, fetch_time, config
+            )
+            if alert_message:
+                await self._send_telegram_message(alert_message)
+            return outcome
+
+        except asyncio.CancelledError:
+            raise
+        except CircuitOpenError as e:
+            self.service._defer_check(item, e)
+            return "deferred"
+        except Exception as e:
+            await asyncio.to_thread(self.service._record_check_error, item, e)
+            return "error"
+
+    async def _fetch_html(self, url):
+        """Async counterpart of PageFetcher.fetch_html sharing its clearance and counters"""
+        host = urlparse(url).netloc.lower()
+        with self.fetcher.breaker.attempt(host):
+            await self.fetcher.take_token_async(host)
+            if self.fetcher.mode == "direct":
+                clearance = self.fetcher.clearance_for(host)
+                if clearance:
+                    cookie_header = "; ".join(f"{name}={value}" for name, value in clearance["cookies"].items())
+                    try:
+                        resp = await self.http.request(
+                            "GET", url,
+                            headers={"User-Agent": clearance["user_agent"], "Cookie": cookie_header},
+                            read_timeout=15,
+                        )
+                        html = resp.text
+                        if resp.ok and not is_challenge_response(resp.status, html):
+                            self.fetcher.record_direct(host, True)
+                            return html
+                    except (OSError, asyncio.TimeoutError, AsyncHttpError, ValueError) as e:
+                        self.service.logger.info(f"Direct fetch for {host} failed ({e}), falling back to FlareSolverr")
+                    self.fetcher.record_direct(host, False)
+                    await self.fetcher.take_token_async(host)
+
+            solution = await self._request_get(url)
+            self.fetcher.record_solve(host, solution)
+            return solution["response"]
+
+    async def _checkout_session(self):
+        """Take a pool slot and session; the caller holds one of _session_slots"""
+        if not self.pool.try_acquire():
+            # Only a web request in this process can hold the slot, so at most
+            # pool.size tasks ever wait here, each on one worker thread
+            waiter = asyncio.ensure_future(asyncio.to_thread(self.pool.try_acquire, 120))
+            try:
+                acquired = await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                # Give the slot back if the wait succeeds after all
+                waiter.add_done_callback(
+                    lambda w: w.cancelled() or w.exception() or not w.result() or self.pool.forget(None)
+                )
+                raise
+            if not acquired:
+                raise FlareSolverrError("No FlareSolverr session available")
+        try:
+            name = self.pool.take_idle()
+            if name is None:
+                name = self.pool.new_session_name()
+                data = await self._command({"cmd": "sessions.create", "session": name}, read_timeout=30)
+                if data.get("status") != "ok":
+                    return None
+                self.pool.register(name)
+            return name
+        except asyncio.CancelledError:
+            self.pool.forget(None)
+            raise
+        except Exception as e:
+            self.service.logger.warning(f"Could not create FlareSolverr session: {e}")
+            return None
+
+    async def _command(self, payload, read_timeout):
+        resp = await self.http.request("POST", self.pool.url, json_body=payload, read_timeout=read_timeout)
+        if not resp.ok:
+            raise FlareSolverrError(f"HTTP {resp.status}")
+        return resp.json()
+
+    async def _request_get(self, url, max_timeout=60000):
+        """Async counterpart of flaresolverr.request_get"""
+        if self._session_slots is None:
+            self._session_slots = asyncio.Semaphore(self.pool.size)
+        # Checks beyond the pool size queue here instead of polling the pool
+        async with self._session_slots:
+            return await self._request_get_with_session(url, max_timeout)
+
+    async def _request_get_with_session(self, url, max_timeout):
+        name = await self._checkout_session()
+        healthy = False
+        try:
+            payload = {"cmd": "request.get", "url": url, "maxTimeout": max_timeout}
+            if name:
+                payload["session"] = name
+            try:
+                solution = (await self._command(payload, read_timeout=max_timeout / 1000 + 10))["solution"]
+                html = solution["response"]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                raise FlareSolverrError(f"Flaresolverr error: {e}")
+
+            if is_captcha_page(html):
+                raise CaptchaError("Website is showing CAPTCHA - automated access temporarily blocked")
+            healthy = True
+            return solution
+        finally:
+            if healthy:
+                self.pool.checkin(name)
+            else:
+                self.pool.forget(name)
+                if name:
+                    try:
+                        await self._command({"cmd": "sessions.destroy", "session": name}, read_timeout=10)
+                    except Exception:
+                        pass
+
+    async def _send_telegram_message(self, text):
+        token, chat_id = self.service._telegram_credentials()
+        if not token:
+            return
+        try:
+            resp = await self.http.request(
+                "POST", f"https://api.telegram.org/bot{token}/sendMessage",
+                json_body={"chat_id": chat_id, "text": text},
+                read_timeout=10,
+            )
+            if not resp.ok:
+                print(f"[ERROR] Telegram send failed: {resp.text}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ERROR] Telegram exception: {e}")
@@ -0,0 +1,186 @@
+# app/async_http.py
+import asyncio
+import json
+import ssl
+from urllib.parse import urljoin, urlsplit
+from .http_client import HTTP_CONNECT_TIMEOUT, HTTP_POOL_MAXSIZE
+
+# GET redirects followed before giving up, as requests does for the sync client
+MAX_REDIRECTS = 10
+REDIRECT_STATUS_CODES = (301, 302, 303, 307, 308)
+
+# Responses that never have a body, whatever their headers say (RFC 9112 6.3)
+NO_BODY_STATUS_CODES = (204, 304)
+
+
+class AsyncHttpError(Exception):
+    """Malformed or truncated HTTP response"""
+
+
+class AsyncResponse:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+    @property
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class AsyncHttpClient:
+    """Minimal HTTP/1.1 client on asyncio streams with keep-alive reuse.
+
+    Only what the watcher needs: GET/POST, JSON bodies, Content-Length and
+    chunked responses, http and https, and redirects for GET (so ok and the
+    body describe the final page). Idle connections are kept per
+    (scheme, host, port) so FlareSolverr and Telegram calls reuse sockets
+    like the synchronous http_client does.
+    """
+
+    def __init__(self, connect_timeout=HTTP_CONNECT_TIMEOUT, max_idle_per_host=HTTP_POOL_MAXSIZE):
+        self.connect_timeout = connect_timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}
+        self._ssl_context = ssl.create_default_context()
+
+    async def request(self, method, url, json_body=None, headers=None, read_timeout=30):
+        headers = dict(headers or {})
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._request(method, url, json_body, headers, read_timeout)
+            location = response.headers.get("location")
+            if method != "GET" or response.status not in REDIRECT_STATUS_CODES or not location:
+                return response
+            target = urljoin(url, location)
+            if urlsplit(target).netloc != urlsplit(url).netloc:
+                # Credentials for one host are not sent to another
+                headers.pop("Cookie", None)
+            url = target
+        raise AsyncHttpError(f"More than {MAX_REDIRECTS} redirects")
+
+    async def _request(self, method, url, json_body, headers, read_timeout):
+        parts = urlsplit(url)
+        https = parts.scheme == "https"
+        port = parts.port or (443 if https else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        body = b""
+        request_headers = {
+            "Host": parts.netloc,
+            "Accept-Encoding": "identity",
+            "Connection": "keep-alive",
+        }
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+            request_headers["Content-Type"] = "application/json"
+        if body or method != "GET":
+            request_headers["Content-Length"] = str(len(body))
+        request_headers.update(headers)
+        head = f"{method} {path} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in request_headers.items()
+        ) + "\r\n"
+        data = head.encode("latin-1") + body
+
+        # A pooled connection may have been closed by the server while idle;
+        # retry once on a fresh connection in that case
+        for attempt in range(2):
+            reused, (reader, writer) = await self._connect(key, https)
+            try:
+                writer.write(data)
+                await writer.drain()
+                response, keep_alive = await asyncio.wait_for(self._read_response(reader, method), read_timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, AsyncHttpError):
+                writer.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive:
+                self._release(key, reader, writer)
+            else:
+                writer.close()
+            return response
+
+    async def _connect(self, key, https):
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return True, (reader, writer)
+            writer.close()
+        scheme, host, port = key
+        conn = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=self._ssl_context if https else None),
+            self.connect_timeout,
+        )
+        return False, conn
+
+    def _release(self, key, reader, writer):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle_per_host:
+            idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def _read_response(self, reader, method="GET"):
+        while True:
+            status_line = await reader.readline()
+            if not status_line:
+                raise AsyncHttpError("Connection closed before response")
+            try:
+                version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+                status = int(status)
+            except ValueError:
+                raise AsyncHttpError(f"Bad status line: {status_line!r}")
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            # Interim responses (100 Continue, 103 Early Hints) precede the real one
+            if not 100 <= status < 200:
+                break
+
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        if method == "HEAD" or status in NO_BODY_STATUS_CODES:
+            body = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size_line = await reader.readline()
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    # Skip optional trailers
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return AsyncResponse(status, headers, body), keep_alive
+
+    async def close(self):
+        for idle in self._idle.values():
+            for reader, writer in idle:
+                writer.close()
+        self._idle = {}
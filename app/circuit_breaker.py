@@ -0,0 +1,143 @@
+# app/circuit_breaker.py
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from .flaresolverr import FlareSolverrError
+
+# A host's circuit opens after BREAKER_FAILURES consecutive CAPTCHA or
+# FlareSolverr/connection failures. It stays open for BREAKER_BACKOFF
+# seconds, doubling after every failed recovery probe up to
+# BREAKER_MAX_BACKOFF. BREAKER_FAILURES=0 turns the breaker off.
+BREAKER_FAILURES = int(os.environ.get('BREAKER_FAILURES', '3'))
+BREAKER_BACKOFF = float(os.environ.get('BREAKER_BACKOFF', '60'))
+BREAKER_MAX_BACKOFF = float(os.environ.get('BREAKER_MAX_BACKOFF', '3600'))
+
+# Failures that say the site or FlareSolverr is unavailable; CaptchaError is
+# a FlareSolverrError. Parsing errors do not count, the page was served.
+TRIP_ERRORS = (FlareSolverrError, requests.RequestException, OSError)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+logger = logging.getLogger('watcher')
+
+
+class CircuitOpenError(Exception):
+    """The host's circuit is open; no request was made"""
+
+    def __init__(self, host, retry_at):
+        super().__init__(f"Requests to {host} paused after repeated failures, retrying in "
+                         f"{max(0, int(retry_at - time.time()))}s")
+        self.host = host
+        self.retry_at = retry_at
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit per target host.
+
+    While closed every request goes through and consecutive failures are
+    counted. Once open, requests fail at once with CircuitOpenError until
+    the backoff has passed; then the circuit is half-open and a single
+    request is let through as a probe. A successful probe closes the
+    circuit, a failed one opens it again with twice the backoff.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, backoff=BREAKER_BACKOFF, max_backoff=BREAKER_MAX_BACKOFF):
+        self.failures = failures
+        self.backoff = backoff
+        self.max_backoff = max(max_backoff, backoff)
+        self._lock = threading.Lock()
+        self._circuits = {}  # host -> {"state", "failures", "trips", "retry_at", "last_error"}
+
+    @property
+    def enabled(self):
+        return self.failures > 0
+
+    def before_request(self, host):
+        """Raise CircuitOpenError unless a request to host may go ahead now"""
+        if not self.enabled:
+            return
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit["state"] == CLOSED:
+                return
+            now = time.time()
+            if circuit["state"] == OPEN and now >= circuit["retry_at"]:
+                circuit["state"] = HALF_OPEN
+                logger.info(f"Circuit for {host} half-open, sending a probe request")
+                return
+            if circuit["state"] == HALF_OPEN:
+                # Others wait for the probe's outcome
+                raise CircuitOpenError(host, now + self._backoff(circuit["trips"]))
+            raise CircuitOpenError(host, circuit["retry_at"])
+
+    def record_success(self, host):
+        if not self.enabled:
+            return
+        with self._lock:
+            circuit = self._circuits.pop(host, None)
+        if circuit is not None and circuit["state"] != CLOSED:
+            logger.info(f"Circuit for {host} closed, requests resume")
+
+    def record_failure(self, host, error):
+        if not self.enabled:
+            return
+        with self._lock:
+            circuit = self._circuits.setdefault(
+                host, {"state": CLOSED, "failures": 0, "trips": 0, "retry_at": None, "last_error": None}
+            )
+            circuit["failures"] += 1
+            circuit["last_error"] = str(error)
+            if circuit["state"] == HALF_OPEN or (circuit["state"] == CLOSED and circuit["failures"] >= self.failures):
+                circuit["trips"] += 1
+                backoff = self._backoff(circuit["trips"])
+                circuit["state"] = OPEN
+                circuit["retry_at"] = time.time() + backoff
+                logger.warning(f"Circuit for {host} opened after {circuit['failures']} failures "
+                               f"({error}), retrying in {int(backoff)}s")
+
+    def release(self, host):
+        """Give up a probe that ended without an outcome (stop, rate limit), so another can be sent"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is not None and circuit["state"] == HALF_OPEN:
+                circuit["state"] = OPEN
+
+    @contextmanager
+    def attempt(self, host):
+        """Wrap one request to host: refuses it while open and records its outcome"""
+        self.before_request(host)
+        try:
+            yield
+        except TRIP_ERRORS as e:
+            self.record_failure(host, e)
+            raise
+        except BaseException:
+            self.release(host)
+            raise
+        self.record_success(host)
+
+    def _backoff(self, trips):
+        return min(self.backoff * 2 ** max(trips - 1, 0), self.max_backoff)
+
+    def states(self):
+        """Circuits that are not plainly closed: {host: {"state", "failures", "retry_at", "countdown", "backoff", "last_error"}}"""
+        now = time.time()
+        with self._lock:
+            return {
+                host: {
+                    "state": circuit["state"],
+                    "failures": circuit["failures"],
+                    "retry_at": circuit["retry_at"],
+                    "countdown": max(0, int(circuit["retry_at"] - now)) if circuit["retry_at"] else None,
+                    "backoff": self._backoff(circuit["trips"]) if circuit["trips"] else None,
+                    "last_error": circuit["last_error"],
+                }
+                for host, circuit in self._circuits.items()
+            }
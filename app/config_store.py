@@ -0,0 +1,291 @@
+# app/config_store.py
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass, field, fields, replace
+from .history_store import parse_duration
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "config.json")
+
+# Default concurrency limits, overridable via "max_workers" / "max_per_host" in config.json
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_PER_HOST = 2
+
+# Watcher engines selectable via "engine" in config.json
+ENGINES = ("thread", "asyncio")
+
+NOTIFICATION_MODES = ("any_change", "below_target", "both", "none")
+
+# "priority" checks each product on its own interval scaled by its priority,
+# "adaptive" learns each product's interval from how often its price changes,
+# "fixed" checks every product once per interval
+SCHEDULING_MODES = ("priority", "adaptive", "fixed")
+
+# Written when config.json does not exist yet
+DEFAULT_CONFIG = {
+    "interval": "600",  # 10 minutes default
+    "telegram_token": "",
+    "telegram_chat_id": "",
+    "notification_mode": "below_target",
+}
+
+logger = logging.getLogger('watcher')
+
+# inotify is used where available (Linux) so changes written by another
+# process are picked up without polling; elsewhere get() falls back to a stat
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    _libc.inotify_init1
+    _libc.inotify_add_watch
+except (OSError, AttributeError, TypeError):
+    _libc = None
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+@dataclass(frozen=True)
+class WatcherConfig:
+    """Validated contents of config.json"""
+
+    interval: str = DEFAULT_CONFIG["interval"]
+    notification_mode: str = DEFAULT_CONFIG["notification_mode"]
+    telegram_token: str = ""
+    telegram_chat_id: str = ""
+    engine: str = "thread"
+    scheduling: str = "priority"
+    adaptive_min_interval: str = "5m"  # Bounds of adaptive intervals
+    adaptive_max_interval: str = "6h"
+    fetch_budget: int = 0  # Adaptive checks per hour across all products, 0 for no limit
+    max_workers: int = DEFAULT_MAX_WORKERS
+    max_per_host: int = DEFAULT_MAX_PER_HOST
+    extra: dict = field(default_factory=dict, compare=False)  # Unknown keys, kept on save
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a config from parsed JSON, replacing invalid values with defaults"""
+        known = {f.name for f in fields(cls)} - {"extra"}
+        config = cls(extra={k: v for k, v in data.items() if k not in known})
+        values = {}
+
+        interval = str(data.get("interval", config.interval)).strip()
+        values["interval"] = interval or config.interval
+
+        mode = str(data.get("notification_mode", config.notification_mode)).strip()
+        if mode in NOTIFICATION_MODES:
+            values["notification_mode"] = mode
+        else:
+            logger.warning(f"Invalid notification_mode {mode!r} in config, using {config.notification_mode}")
+
+        engine = str(data.get("engine", config.engine)).strip().lower()
+        if engine in ENGINES:
+            values["engine"] = engine
+        else:
+            logger.warning(f"Unknown engine {engine!r} in config, using {config.engine}")
+
+        scheduling = str(data.get("scheduling", config.scheduling)).strip().lower()
+        if scheduling in SCHEDULING_MODES:
+            values["scheduling"] = scheduling
+        else:
+            logger.warning(f"Unknown scheduling {scheduling!r} in config, using {config.scheduling}")
+
+        bounds = {}
+        for key in ("adaptive_min_interval", "adaptive_max_interval"):
+            value = str(data.get(key, getattr(config, key))).strip()
+            try:
+                bounds[key] = parse_duration(value)
+                values[key] = value
+            except ValueError:
+                logger.warning(f"Invalid {key} {value!r} in config, using {getattr(config, key)}")
+                bounds[key] = parse_duration(getattr(config, key))
+        if bounds["adaptive_min_interval"] > bounds["adaptive_max_interval"]:
+            logger.warning("adaptive_min_interval is above adaptive_max_interval in config, using the defaults")
+            values.pop("adaptive_min_interval", None)
+            values.pop("adaptive_max_interval", None)
+
+        try:
+            budget = int(data.get("fetch_budget", config.fetch_budget))
+            if budget >= 0:
+                values["fetch_budget"] = budget
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid fetch_budget {data.get('fetch_budget')!r} in config, using {config.fetch_budget}")
+
+        for key in ("max_workers", "max_per_host"):
+            try:
+                value = int(data.get(key, getattr(config, key)))
+                if value > 0:
+                    values[key] = value
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid {key} {data.get(key)!r} in config, using {getattr(config, key)}")
+
+        values["telegram_token"] = str(data.get("telegram_token") or "")
+        values["telegram_chat_id"] = str(data.get("telegram_chat_id") or "")
+        return replace(config, **values)
+
+
+class ConfigStore:
+    """config.json parsed once and reloaded only when it changes.
+
+    get() returns the cached WatcherConfig; raw() the file contents as a
+    dict. update() writes atomically and calls subscribers right away, and
+    changes made by other processes reach subscribers through inotify (or
+    the stat check on the next get() where inotify is not available).
+    """
+
+    def __init__(self, path=CONFIG_FILE, defaults=DEFAULT_CONFIG):
+        self.path = os.path.abspath(path)
+        self.defaults = defaults
+        self._lock = threading.RLock()
+        self._cache_key = None  # (st_ino, st_mtime_ns, st_size) of the cached file
+        self._raw = {}
+        self._config = WatcherConfig()
+        self._listeners = []
+        self._watch_pid = None  # Process whose inotify thread keeps the cache current
+        self._watching = False
+
+    def get(self):
+        self._refresh()
+        return self._config
+
+    def raw(self):
+        self._refresh()
+        with self._lock:
+            return dict(self._raw)
+
+    def subscribe(self, callback):
+        """Call callback(old, new) whenever the config changes"""
+        self._listeners.append(callback)
+
+    def update(self, **changes):
+        """Set keys in config.json and notify subscribers; returns the new config"""
+        with self._lock:
+            self._reload()
+            raw = dict(self._raw)
+            raw.update(changes)
+            self._write(raw)
+            old = self._config
+            self._reload()
+            new = self._config
+        self._notify(old, new)
+        return new
+
+    def _refresh(self):
+        pid = os.getpid()
+        with self._lock:
+            started = self._watch_pid != pid
+            if started:
+                # Threads do not survive gunicorn's fork, so start one per process
+                self._watch_pid = pid
+                self._watching = self._start_inotify()
+        if started or not self._watching or self._cache_key is None:
+            self._check()
+
+    def _check(self):
+        with self._lock:
+            old = self._config
+            changed = self._reload()
+            new = self._config
+        if changed:
+            self._notify(old, new)
+
+    def _reload(self):
+        """Re-read the file if its inode, mtime or size changed; returns True if it was re-read"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self.defaults is None:
+                changed = self._cache_key is not None or self._raw
+                self._cache_key, self._raw = None, {}
+                self._config = WatcherConfig()
+                return bool(changed)
+            self._write(dict(self.defaults))
+            st = os.stat(self.path)
+
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key == self._cache_key:
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            if not isinstance(raw, dict):
+                raise ValueError("config file must contain an object")
+        except (OSError, ValueError) as e:
+            # Keep the last good config
+            logger.error(f"Error loading config: {e}")
+            return False
+        self._cache_key = key
+        self._apply(raw)
+        return True
+
+    def _apply(self, raw):
+        self._raw = raw
+        self._config = WatcherConfig.from_dict(raw)
+
+    def _write(self, raw):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".config.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(raw, f, indent=2, ensure_ascii=False)
+            os.chmod(tmp_path, 0o600)  # May hold the Telegram token
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _notify(self, old, new):
+        if old == new:
+            return
+        for callback in list(self._listeners):
+            try:
+                callback(old, new)
+            except Exception as e:
+                logger.error(f"Config change listener failed: {e}", exc_info=True)
+
+    def _start_inotify(self):
+        if _libc is None:
+            return False
+        fd = _libc.inotify_init1(os.O_CLOEXEC)
+        if fd < 0:
+            return False
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE
+        if _libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return False
+        threading.Thread(target=self._inotify_loop, args=(fd,), daemon=True, name="config-inotify").start()
+        return True
+
+    def _inotify_loop(self, fd):
+        name = os.fsencode(os.path.basename(self.path))
+        while True:
+            try:
+                buf = os.read(fd, 4096)
+            except OSError:
+                self._watching = False
+                return
+            offset, changed = 0, False
+            while offset + _INOTIFY_EVENT.size <= len(buf):
+                _, _, _, length = _INOTIFY_EVENT.unpack_from(buf, offset)
+                start = offset + _INOTIFY_EVENT.size
+                if buf[start:start + length].rstrip(b"\0") == name:
+                    changed = True
+                offset = start + length
+            if changed:
+                self._check()
+
+
+# Shared config for the web app and the watcher service
+config_store = ConfigStore()
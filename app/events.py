@@ -0,0 +1,136 @@
+# app/events.py
+import json
+import os
+import threading
+import time
+
+# Watcher events are appended to this file so that the dashboard stream
+# works from every gunicorn worker, not just the one running the watcher
+EVENTS_FILE = os.path.join(os.path.dirname(__file__), "..", "watcher", "events.log")
+
+# The log is trimmed to its newest half once it grows past this size
+EVENTS_FILE_MAX_BYTES = 256 * 1024
+
+
+class EventBus:
+    """Append-only log of watcher events with sequential ids.
+
+    publish() appends one JSON line per event and wakes up readers in the
+    same process at once; readers in other processes notice the file
+    growing on their next poll. Readers keep a cursor and resume from any
+    event id still in the log (the SSE Last-Event-ID).
+    """
+
+    def __init__(self, path=EVENTS_FILE, max_bytes=EVENTS_FILE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._new_event = threading.Condition(self._lock)
+        self._last_id = None
+
+    def publish(self, event_type, **data):
+        """Append an event; returns its id"""
+        with self._lock:
+            if self._last_id is None:
+                self._last_id = self._read_last_id()
+            self._last_id += 1
+            line = json.dumps({"id": self._last_id, "type": event_type, "ts": time.time(), "data": data}, ensure_ascii=False)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                    size = f.tell()
+                if size > self.max_bytes:
+                    self._trim()
+            except OSError:
+                pass  # Events are best effort, a full disk must not stop the watcher
+            self._new_event.notify_all()
+            return self._last_id
+
+    def cursor(self, last_id=None):
+        """Return a reader positioned after last_id, or at the end of the log"""
+        return EventCursor(self, last_id)
+
+    def wait(self, timeout):
+        """Block until an event is published in this process or timeout passes"""
+        with self._new_event:
+            self._new_event.wait(timeout)
+
+    def _read_last_id(self):
+        last_id = 0
+        for event in _read_events(self.path, 0)[0]:
+            last_id = event["id"]
+        return last_id
+
+    def _trim(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines[len(lines) // 2:])
+        os.replace(tmp_path, self.path)
+
+
+class EventCursor:
+    """Reads events newer than the last one it returned"""
+
+    def __init__(self, bus, last_id=None):
+        self.bus = bus
+        self.last_id = last_id
+        self._inode = None
+        self._offset = 0
+        if last_id is None:
+            # Start at the end of the log: only events from now on
+            events, self._inode, self._offset = _read_events(bus.path, 0)
+            self.last_id = events[-1]["id"] if events else 0
+
+    def poll(self, timeout=1.0):
+        """Return new events, waiting up to timeout when there are none"""
+        events = self._read()
+        if not events:
+            self.bus.wait(timeout)
+            events = self._read()
+        return events
+
+    def _read(self):
+        try:
+            stat = os.stat(self.bus.path)
+        except OSError:
+            return []
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # Log was trimmed or replaced: rescan it and skip what was already seen
+            self._inode, self._offset = stat.st_ino, 0
+        events, _, self._offset = _read_events(self.bus.path, self._offset)
+        events = [event for event in events if event["id"] > self.last_id]
+        if events:
+            self.last_id = events[-1]["id"]
+        return events
+
+
+def _read_events(path, offset):
+    """Return (events, inode, end offset) for complete lines after offset"""
+    events = []
+    try:
+        with open(path, "rb") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Line still being written, read it next time
+                offset += len(raw)
+                try:
+                    events.append(json.loads(raw))
+                except ValueError:
+                    continue
+    except OSError:
+        return [], None, 0
+    return events, inode, offset
+
+
+def format_sse(event):
+    """Serialize an event for a text/event-stream response"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+
+# Shared event bus written by the watcher and read by the dashboard stream
+event_bus = EventBus()
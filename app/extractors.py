@@ -0,0 +1,227 @@
+# app/extractors.py
+import hashlib
+import os
+import re
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+# "fast" stops parsing as soon as price and name are found,
+# "bs4" builds the full BeautifulSoup tree (reference implementation)
+EXTRACTOR = os.environ.get('EXTRACTOR', 'fast').strip().lower()
+
+# Elements that never have an end tag, so they must not change nesting depth
+VOID_ELEMENTS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+])
+
+# Fallback price containers, in the order they are tried after p.price
+FALLBACK_PRICE_TAGS = ("span", "div")
+
+# Elements whose text BeautifulSoup leaves out of get_text()
+NON_TEXT_ELEMENTS = frozenset(["script", "style"])
+
+
+# Start tags whose class mentions price or name: a superset of the elements
+# both extractors read (p/span/div.price, h1.name)
+_REGION_START = re.compile(r"""<(?:p|span|div|h1)\b[^>]*\bclass\s*=\s*["']?[^"'>]*\b(?:price|name)\b""", re.IGNORECASE)
+
+# Characters hashed from each region start; the price and name text follow
+# their start tag directly
+FINGERPRINT_WINDOW = 1024
+
+
+class ExtractionError(Exception):
+    """The page did not contain the expected price/name structure"""
+
+
+# Cents after a decimal comma or point; a separator followed by three
+# digits groups thousands instead ("2.200 €")
+_DECIMALS = re.compile(r"[.,]\d{1,2}(?!\d)")
+
+
+def parse_price(price_str):
+    """Whole euros in a price string, e.g. "3 000 €" -> 3000, "2 200,50 €" -> 2200"""
+    decimals = _DECIMALS.search(price_str)
+    if decimals:
+        price_str = price_str[:decimals.start()]
+    price = re.sub(r"[^0-9]", "", price_str)
+    return int(price) if price else 0
+
+
+def _is_price_like(text):
+    return "€" in text or "euro" in text.lower()
+
+
+class BeautifulSoupExtractor:
+    """Reference extractor: full BeautifulSoup parse of the page"""
+
+    name = "bs4"
+
+    def extract(self, html, url):
+        soup = BeautifulSoup(html, "html.parser")
+        price_tag = soup.find("p", class_="price")
+        if not price_tag:
+            # Try alternative price selectors
+            price_tag = soup.find("span", class_="price") or soup.find("div", class_="price")
+            if not price_tag:
+                # Look for any element containing price-related text
+                price_elements = soup.find_all(string=lambda text: text and _is_price_like(text))
+                if price_elements:
+                    raise ExtractionError(f"Price element structure changed - found {len(price_elements)} price-like elements")
+                else:
+                    raise ExtractionError("Price not found - page structure may have changed")
+
+        price = parse_price(price_tag.get_text(strip=True))
+        name_tag = soup.find("h1", class_="name")
+        name = name_tag.get_text(strip=True) if name_tag else url
+        return {"price": price, "name": name}
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _TargetParser(HTMLParser):
+    """Streaming parser that captures the text of the first p.price and h1.name.
+
+    Alternative price containers (span.price, div.price) and price-like text
+    are only tracked so the fallbacks behave like the reference extractor;
+    parsing stops as soon as both primary targets are complete.
+
+    Open elements are kept on a stack and an end tag closes the most recent
+    open element of the same name, along with everything opened inside it,
+    as BeautifulSoup does; end tags without an open element are ignored. So
+    unclosed or stray inline tags inside a target do not move its end.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.texts = {}  # target -> list of stripped text chunks, once complete
+        self._stack = []  # Names of the open elements, outermost first
+        self._open = []  # [target, stack position, chunks] for targets being captured
+        self._in_non_text = None
+        self.price_like = 0
+
+    def _target_for(self, tag, attrs):
+        if tag not in ("p", "h1", "span", "div"):
+            return None
+        classes = ""
+        for key, value in attrs:
+            if key == "class" and value:
+                classes = value
+                break
+        class_list = classes.split()
+        if tag == "h1":
+            return "name" if "name" in class_list else None
+        if "price" not in class_list:
+            return None
+        return "price" if tag == "p" else tag
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        if tag in NON_TEXT_ELEMENTS:
+            self._in_non_text = tag
+        target = self._target_for(tag, attrs)
+        if target and target not in self.texts and not any(c[0] == target for c in self._open):
+            self._open.append([target, len(self._stack), []])
+        self._stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        for position in range(len(self._stack) - 1, -1, -1):
+            if self._stack[position] == tag:
+                break
+        else:
+            return  # Stray end tag
+        del self._stack[position:]
+        if self._in_non_text and self._in_non_text not in self._stack:
+            self._in_non_text = None
+        still_open = []
+        for capture in self._open:
+            if capture[1] >= position:
+                self.texts[capture[0]] = capture[2]
+            else:
+                still_open.append(capture)
+        self._open = still_open
+        if "price" in self.texts and "name" in self.texts:
+            raise _StopParsing()
+
+    def handle_data(self, data):
+        if _is_price_like(data):
+            self.price_like += 1
+        stripped = data.strip()
+        if stripped and not self._in_non_text:
+            for capture in self._open:
+                capture[2].append(stripped)
+
+    def handle_comment(self, data):
+        # Comments are strings too for the reference fallback count
+        if _is_price_like(data):
+            self.price_like += 1
+
+    def finish(self):
+        # Elements left unclosed at the end of the document still count
+        for capture in self._open:
+            self.texts.setdefault(capture[0], capture[2])
+        self._open = []
+
+
+class FastExtractor:
+    """Early-exit extractor built on the stdlib streaming HTML parser"""
+
+    name = "fast"
+
+    def extract(self, html, url):
+        parser = _TargetParser()
+        try:
+            parser.feed(html)
+            parser.close()
+        except _StopParsing:
+            pass
+        parser.finish()
+
+        texts = parser.texts
+        price_chunks = texts.get("price")
+        if price_chunks is None:
+            for tag in FALLBACK_PRICE_TAGS:
+                if tag in texts:
+                    price_chunks = texts[tag]
+                    break
+            else:
+                if parser.price_like:
+                    raise ExtractionError(f"Price element structure changed - found {parser.price_like} price-like elements")
+                raise ExtractionError("Price not found - page structure may have changed")
+
+        price = parse_price("".join(price_chunks))
+        name = "".join(texts["name"]) if "name" in texts else url
+        return {"price": price, "name": name}
+
+
+def page_fingerprint(html):
+    """Digest of the page regions the price and name are read from.
+
+    Pages whose fingerprint is unchanged extract to the same price and name,
+    so the watcher can skip parsing them. Returns None when no such region
+    exists (a challenge or changed layout), which must always be parsed.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    found = False
+    for match in _REGION_START.finditer(html):
+        start = match.start()
+        digest.update(html[start:start + FINGERPRINT_WINDOW].encode("utf-8", "surrogatepass"))
+        found = True
+    return digest.hexdigest() if found else None
+
+
+EXTRACTORS = {
+    BeautifulSoupExtractor.name: BeautifulSoupExtractor(),
+    FastExtractor.name: FastExtractor(),
+}
+
+
+def get_extractor(name=None):
+    """Return the configured extractor backend, defaulting to EXTRACTOR"""
+    return EXTRACTORS.get((name or EXTRACTOR).lower(), EXTRACTORS["fast"])
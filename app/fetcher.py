@@ -0,0 +1,158 @@
+# app/fetcher.py
+import os
+import threading
+import logging
+from urllib.parse import urlparse
+import requests
+from .flaresolverr import session_pool, request_get, CAPTCHA_MARKERS
+from .http_client import http_client
+from .rate_limiter import rate_limiter, RateLimitError
+from .circuit_breaker import CircuitBreaker
+
+# "direct" reuses FlareSolverr clearance cookies for plain HTTP requests,
+# "flaresolverr" sends every request through the headless browser
+FETCH_MODE = os.environ.get('FETCH_MODE', 'direct').strip().lower()
+
+# Markers of a Cloudflare interstitial instead of the real page
+CHALLENGE_MARKERS = (
+    "cf-chl",
+    "challenge-platform",
+    "cf_chl_opt",
+    "just a moment...",
+    "attention required! | cloudflare",
+)
+CHALLENGE_STATUS_CODES = (403, 429, 503)
+
+logger = logging.getLogger('watcher')
+
+
+def is_challenge_response(status_code, html):
+    """Check whether a direct response is a challenge/CAPTCHA page rather than the listing"""
+    if status_code in CHALLENGE_STATUS_CODES:
+        return True
+    # One lowercased copy for all markers, CAPTCHA ones included
+    lowered = html.lower()
+    return any(marker in lowered for marker in CHALLENGE_MARKERS + CAPTCHA_MARKERS)
+
+
+class PageFetcher:
+    """Fetch listing HTML, preferring a direct HTTP request over a browser solve.
+
+    After FlareSolverr has solved a host once, its clearance cookies and
+    user agent are reused with the shared keep-alive client. FlareSolverr is
+    only used again when the direct response turns out to be a challenge.
+    """
+
+    def __init__(self, pool=None, mode=FETCH_MODE, limiter=None, breaker=None):
+        self.pool = pool or session_pool
+        self.mode = mode
+        self.limiter = limiter or rate_limiter
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self._clearance = {}  # host -> {"cookies": {...}, "user_agent": "..."}
+        self.fast_path_hits = 0
+        self.fast_path_misses = 0
+        self.flaresolverr_solves = 0
+
+    def fetch_html(self, url, max_wait=None, stop_event=None):
+        """Return the HTML of url, raising FlareSolverrError/CaptchaError on failure.
+        
+        Raises CircuitOpenError without fetching while the host's circuit
+        is open. Every request to the host waits for its rate limit; raises
+        RateLimitError when that takes longer than max_wait or stop_event is
+        set meanwhile.
+        """
+        host = urlparse(url).netloc.lower()
+        with self.breaker.attempt(host):
+            self.take_token(host, max_wait=max_wait, stop_event=stop_event)
+            clearance = self.clearance_for(host) if self.mode == "direct" else None
+            if clearance:
+                html = self._fetch_direct(url, host, clearance)
+                if html is not None:
+                    return html
+                # The direct request used up the token, the solve is a second request
+                self.take_token(host, max_wait=max_wait, stop_event=stop_event)
+
+            solution = request_get(url, self.pool)
+            self.record_solve(host, solution)
+            return solution["response"]
+
+    def take_token(self, host, max_wait=None, stop_event=None):
+        """Wait for the rate limit before one request to host.
+
+        An unreadable limiter state file is not the host's failure, so it is
+        raised as RateLimitError, which the circuit breaker does not count.
+        """
+        try:
+            self.limiter.acquire(host, max_wait=max_wait, stop_event=stop_event)
+        except OSError as e:
+            raise RateLimitError(f"Rate limit state unavailable: {e}") from e
+
+    async def take_token_async(self, host):
+        """Async counterpart of take_token()"""
+        try:
+            await self.limiter.acquire_async(host)
+        except OSError as e:
+            raise RateLimitError(f"Rate limit state unavailable: {e}") from e
+
+    def _fetch_direct(self, url, host, clearance):
+        try:
+            resp = http_client.get(
+                url,
+                read_timeout=15,
+                headers={"User-Agent": clearance["user_agent"]},
+                cookies=clearance["cookies"],
+            )
+            html = resp.text
+            if not is_challenge_response(resp.status_code, html) and resp.ok:
+                self.record_direct(host, True)
+                return html
+            logger.info(f"Direct fetch for {host} got a challenge (HTTP {resp.status_code}), falling back to FlareSolverr")
+        except requests.RequestException as e:
+            logger.info(f"Direct fetch for {host} failed ({e}), falling back to FlareSolverr")
+
+        self.record_direct(host, False)
+        return None
+
+    def clearance_for(self, host):
+        """Cookies and user agent from the last FlareSolverr solve of host, or None"""
+        with self._lock:
+            return self._clearance.get(host)
+
+    def record_direct(self, host, success):
+        """Count a direct attempt; a failed one drops the clearance so the next solve renews it"""
+        with self._lock:
+            if success:
+                self.fast_path_hits += 1
+            else:
+                self.fast_path_misses += 1
+                self._clearance.pop(host, None)
+
+    def record_solve(self, host, solution):
+        """Count a FlareSolverr solve and keep its clearance cookies for the fast path"""
+        cookies = {
+            cookie["name"]: cookie["value"]
+            for cookie in solution.get("cookies", [])
+            if cookie.get("name")
+        }
+        user_agent = solution.get("userAgent")
+        with self._lock:
+            self.flaresolverr_solves += 1
+            if cookies and user_agent:
+                self._clearance[host] = {"cookies": cookies, "user_agent": user_agent}
+
+    def stats(self):
+        """Fast path counters; hit_rate is the share of fetches served without FlareSolverr"""
+        with self._lock:
+            fetches = self.fast_path_hits + self.flaresolverr_solves
+            return {
+                "mode": self.mode,
+                "fast_path_hits": self.fast_path_hits,
+                "fast_path_misses": self.fast_path_misses,
+                "flaresolverr_solves": self.flaresolverr_solves,
+                "hit_rate": round(self.fast_path_hits / fetches, 3) if fetches else None,
+            }
+
+
+# Shared fetcher used by both the background watcher and the web API
+page_fetcher = PageFetcher()
@@ -0,0 +1,243 @@
+# app/flaresolverr.py
+import os
+import threading
+import logging
+import itertools
+from contextlib import contextmanager
+from .http_client import http_client
+
+FLARESOLVERR_URL = os.environ.get('FLARESOLVERR_URL', 'http://localhost:8191/v1')
+
+# Number of warm browser sessions kept open in FlareSolverr per process
+FLARESOLVERR_SESSIONS = int(os.environ.get('FLARESOLVERR_SESSIONS', '3'))
+
+SESSION_PREFIX = "vaurioajoneuvo"
+
+# Lowercase text marking a CAPTCHA wall ("recaptcha" contains it as well)
+CAPTCHA_MARKERS = ("captcha",)
+
+logger = logging.getLogger('watcher')
+
+
+class FlareSolverrError(Exception):
+    """FlareSolverr could not deliver a usable page"""
+
+
+class CaptchaError(FlareSolverrError):
+    """The target site answered with a CAPTCHA instead of the listing"""
+
+
+def is_captcha_page(html):
+    """Check whether a fetched page is a CAPTCHA wall instead of the product page"""
+    lowered = html.lower()
+    return any(marker in lowered for marker in CAPTCHA_MARKERS)
+
+
+class SessionPool:
+    """Pool of named FlareSolverr sessions with checkout/return semantics.
+
+    Each session is a separate headless browser tab inside FlareSolverr, so
+    holding several of them lets parallel fetches actually run in parallel.
+    Sessions that error out or hit a CAPTCHA are destroyed on return and a
+    fresh one (with a new name) is created on the next checkout.
+    """
+
+    def __init__(self, size=FLARESOLVERR_SESSIONS, prefix=SESSION_PREFIX, url=None):
+        self.size = max(1, size)
+        self.prefix = prefix
+        self.url = url or FLARESOLVERR_URL
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._all = set()
+        self._counter = itertools.count(1)
+        self.rotations = 0
+
+    def _process_prefix(self):
+        # Include the pid so gunicorn workers never share a browser tab
+        return f"{self.prefix}_{os.getpid()}_"
+
+    def _command(self, payload, timeout):
+        resp = http_client.post(self.url, read_timeout=timeout, json=payload)
+        resp.raise_for_status()
+        return resp.json()
+
+    def new_session_name(self):
+        return f"{self._process_prefix()}{next(self._counter)}"
+
+    def register(self, name):
+        """Track a session created outside _create (e.g. by the asyncio engine)"""
+        with self._lock:
+            self._all.add(name)
+
+    def _create(self):
+        """Create a new session, returning its name or None if FlareSolverr refused"""
+        name = self.new_session_name()
+        try:
+            data = self._command({"cmd": "sessions.create", "session": name}, timeout=30)
+            if data.get("status") != "ok":
+                logger.warning(f"Failed to create FlareSolverr session {name}: {data.get('message')}")
+                return None
+        except Exception as e:
+            logger.warning(f"Could not create FlareSolverr session {name}: {e}")
+            return None
+        self.register(name)
+        logger.info(f"Created FlareSolverr session {name}")
+        return name
+
+    def _destroy(self, name):
+        with self._lock:
+            self._all.discard(name)
+        try:
+            self._command({"cmd": "sessions.destroy", "session": name}, timeout=10)
+        except Exception:
+            pass
+
+    def try_acquire(self, timeout=None):
+        """Reserve a pool slot, waiting up to timeout seconds (default: not at all).
+
+        Returns True when a slot was taken; pair it with checkin() or forget().
+        """
+        if timeout is None:
+            return self._slots.acquire(blocking=False)
+        return self._slots.acquire(timeout=timeout)
+
+    def take_idle(self):
+        """Pop an idle session name, or None; the caller must already hold a slot"""
+        with self._lock:
+            return self._idle.pop() if self._idle else None
+
+    def checkout(self, timeout=120):
+        """Take a session out of the pool, creating one if none is idle.
+
+        Returns the session name, or None when FlareSolverr could not create
+        one (the request can still run without a session).
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise FlareSolverrError("No FlareSolverr session available")
+        return self.take_idle() or self._create()
+
+    def forget(self, name):
+        """Drop a checked-out session from the pool without contacting FlareSolverr"""
+        with self._lock:
+            if name is not None:
+                self.rotations += 1
+                self._all.discard(name)
+        self._slots.release()
+
+    def checkin(self, name, healthy=True):
+        """Return a session to the pool; unhealthy sessions are rotated out"""
+        if name is not None and healthy:
+            with self._lock:
+                if name in self._all:
+                    self._idle.append(name)
+                    self._slots.release()
+                    return
+        self.forget(name)
+        if name is not None:
+            self._destroy(name)
+
+    @contextmanager
+    def session(self, timeout=120):
+        """Context manager around checkout/checkin that rotates on any error"""
+        name = self.checkout(timeout=timeout)
+        try:
+            yield name
+        except BaseException:
+            self.checkin(name, healthy=False)
+            raise
+        self.checkin(name)
+
+    def warm(self):
+        """Open sessions up front so the first cycle does not pay for browser startup"""
+        names = []
+        for _ in range(self.size):
+            if not self._slots.acquire(blocking=False):
+                break
+            with self._lock:
+                name = self._idle.pop() if self._idle else None
+            names.append(name or self._create())
+        for name in names:
+            self.checkin(name)
+
+    def health_check(self):
+        """Reconcile the pool with the sessions FlareSolverr actually has.
+
+        Idle sessions that FlareSolverr no longer knows (e.g. after it was
+        restarted) are dropped, and sessions left behind by dead worker
+        processes are destroyed. Returns True when FlareSolverr is reachable.
+        """
+        try:
+            data = self._command({"cmd": "sessions.list"}, timeout=10)
+        except Exception as e:
+            logger.warning(f"FlareSolverr health check failed: {e}")
+            return False
+        remote = set(data.get("sessions", []))
+        with self._lock:
+            lost = [name for name in self._idle if name not in remote]
+            self._idle = [name for name in self._idle if name in remote]
+            self._all.difference_update(lost)
+        if lost:
+            logger.warning(f"Dropped {len(lost)} FlareSolverr sessions that no longer exist")
+        for name in remote:
+            if not name.startswith(f"{self.prefix}_") or name.startswith(self._process_prefix()):
+                continue
+            try:
+                pid = int(name.split("_")[-2])
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                self._destroy(name)
+            except (ValueError, IndexError, OSError):
+                continue
+        return True
+
+    def close(self):
+        """Destroy every session this pool has created"""
+        with self._lock:
+            names = list(self._all)
+            self._idle = []
+        for name in names:
+            self._destroy(name)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": len(self._all),
+                "idle": len(self._idle),
+                "rotations": self.rotations,
+            }
+
+
+def request_get(url, pool=None, max_timeout=60000):
+    """Fetch a page through FlareSolverr using a pooled session.
+
+    Returns the FlareSolverr "solution" dict. Raises CaptchaError when the
+    page is a CAPTCHA wall and FlareSolverrError for any other failure; in
+    both cases the session used is rotated out of the pool.
+    """
+    pool = pool or session_pool
+    with pool.session() as session_name:
+        payload = {
+            "cmd": "request.get",
+            "url": url,
+            "maxTimeout": max_timeout
+        }
+        if session_name:
+            payload["session"] = session_name
+        try:
+            resp = http_client.post(pool.url, read_timeout=max_timeout / 1000 + 10, json=payload)
+            resp.raise_for_status()
+            solution = resp.json()["solution"]
+            html = solution["response"]
+        except Exception as e:
+            raise FlareSolverrError(f"Flaresolverr error: {e}")
+
+        # Check if we got a CAPTCHA page instead of the product page
+        if is_captcha_page(html):
+            raise CaptchaError("Website is showing CAPTCHA - automated access temporarily blocked")
+        return solution
+
+
+# Shared pool used by both the background watcher and the web API
+session_pool = SessionPool()
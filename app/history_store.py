@@ -0,0 +1,442 @@
+# app/history_store.py
+import math
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+
+# SQLite database holding every price observation made by the watcher
+HISTORY_DB = os.environ.get(
+    'HISTORY_DB', os.path.join(os.path.dirname(__file__), '..', 'watcher', 'history.db')
+)
+
+# Raw samples older than HISTORY_RAW_RETENTION are rolled up into hourly
+# buckets, and hourly buckets older than HISTORY_HOURLY_RETENTION into daily
+# ones; compaction runs every HISTORY_COMPACT_INTERVAL while the watcher runs
+HISTORY_RAW_RETENTION = os.environ.get('HISTORY_RAW_RETENTION', '7d')
+HISTORY_HOURLY_RETENTION = os.environ.get('HISTORY_HOURLY_RETENTION', '365d')
+HISTORY_COMPACT_INTERVAL = os.environ.get('HISTORY_COMPACT_INTERVAL', '1h')
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Rollup resolution -> time span of the block of buckets stored in one row
+ROLLUP_BLOCKS = {HOUR: DAY, DAY: 32 * DAY}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+-- Clustered on (url_id, ts): a URL's samples are stored together in time
+-- order, so range queries are one index seek and appends stay cheap however
+-- many years of samples the table holds
+CREATE TABLE IF NOT EXISTS observations (
+    url_id INTEGER NOT NULL REFERENCES urls(id),
+    ts REAL NOT NULL,
+    price INTEGER NOT NULL,
+    fetch_time REAL,
+    PRIMARY KEY (url_id, ts)
+) WITHOUT ROWID;
+-- Newest observation per URL, kept up to date on every write
+CREATE TABLE IF NOT EXISTS latest (
+    url_id INTEGER PRIMARY KEY REFERENCES urls(id),
+    ts REAL NOT NULL,
+    price INTEGER NOT NULL,
+    fetch_time REAL
+);
+-- Rolled-up history: one row per URL, resolution and block of buckets, with
+-- the block's summary in columns and its buckets packed by pack_buckets()
+CREATE TABLE IF NOT EXISTS rollups (
+    url_id INTEGER NOT NULL REFERENCES urls(id),
+    resolution INTEGER NOT NULL,
+    block_start INTEGER NOT NULL,
+    low INTEGER NOT NULL,
+    high INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    buckets BLOB NOT NULL,
+    PRIMARY KEY (url_id, resolution, block_start)
+) WITHOUT ROWID;
+"""
+
+# Buckets of observations in [?, ?) for a list of url ids: (url_id, bucket,
+# low, high, last, samples). Range scan of the (url_id, ts) primary key, so the
+# cost depends on the samples inside the window, not on how much history
+# exists; the last price of a bucket is a point lookup on its newest ts.
+BUCKETS_QUERY = (
+    "WITH buckets AS ("
+    "  SELECT url_id, CAST(ts / ? AS INTEGER) AS bucket, MIN(price) AS low, MAX(price) AS high, "
+    "         COUNT(*) AS samples, MAX(ts) AS last_ts "
+    "  FROM observations WHERE url_id IN ({}) AND ts >= ? AND ts < ? "
+    "  GROUP BY url_id, bucket"
+    ") "
+    "SELECT b.url_id, b.bucket, b.low, b.high, o.price, b.samples FROM buckets b "
+    "JOIN observations o ON o.url_id = b.url_id AND o.ts = b.last_ts "
+    "ORDER BY b.url_id, b.bucket"
+)
+
+# Ids bound per "IN (...)" query, below SQLite's host parameter limit
+MAX_QUERY_PARAMS = 500
+
+# Summaries of whole rollup blocks of one resolution starting in [?, ?],
+# combined per output bucket like BUCKETS_QUERY does for raw samples
+ROLLUP_SUMMARY_QUERY = (
+    "WITH blocks AS ("
+    "  SELECT url_id, block_start / ? AS bucket, MIN(low) AS low, MAX(high) AS high, "
+    "         SUM(samples) AS samples, MAX(block_start) AS last_block "
+    "  FROM rollups WHERE url_id IN ({}) AND resolution = ? AND block_start >= ? AND block_start <= ? "
+    "  GROUP BY url_id, bucket"
+    ") "
+    "SELECT b.url_id, b.bucket, b.low, b.high, r.last, b.samples FROM blocks b "
+    "JOIN rollups r ON r.url_id = b.url_id AND r.resolution = ? AND r.block_start = b.last_block "
+    "ORDER BY b.url_id, b.bucket"
+)
+
+# Range of the prices pack_buckets() stores (int32); anything outside it is a
+# misparsed page and is clamped rather than failing the whole compaction
+PACKED_PRICE_MIN = -2 ** 31
+PACKED_PRICE_MAX = 2 ** 31 - 1
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_duration(text):
+    """Seconds in a duration like "600", "15m", "1h", "30d" or "2w"; raises ValueError"""
+    s = str(text).strip().lower()
+    unit = DURATION_UNITS.get(s[-1:]) if s else None
+    value = float(s[:-1] if unit else s) * (unit or 1)
+    if not value > 0 or value == float("inf"):
+        raise ValueError(f"invalid duration {text!r}")
+    return value
+
+
+def clamp_bucket(values):
+    """(low, high, last, samples) with the prices clamped to what pack_buckets() stores"""
+    low, high, last, samples = values
+    return (*(min(max(price, PACKED_PRICE_MIN), PACKED_PRICE_MAX) for price in (low, high, last)), samples)
+
+
+def pack_buckets(buckets):
+    """Pack {index in block: (low, high, last, samples)} column by column and compress.
+
+    Consecutive buckets mostly repeat the same price, which the columnar
+    layout turns into long runs that zlib shrinks to a few bytes. Prices
+    must be within PACKED_PRICE_MIN..PACKED_PRICE_MAX, see clamp_bucket().
+    """
+    indexes = sorted(buckets)
+    n = len(indexes)
+    lows, highs, lasts, samples = zip(*(buckets[i] for i in indexes))
+    return zlib.compress(struct.pack(f"<H{n}H{3 * n}i{n}I", n, *indexes, *lows, *highs, *lasts, *samples))
+
+
+def unpack_buckets(data):
+    """Inverse of pack_buckets()"""
+    raw = zlib.decompress(data)
+    (n,) = struct.unpack_from("<H", raw)
+    values = struct.unpack_from(f"<{n}H{3 * n}i{n}I", raw, 2)
+    indexes, lows, highs, lasts, samples = (values[k * n:(k + 1) * n] for k in range(5))
+    return dict(zip(indexes, zip(lows, highs, lasts, samples)))
+
+
+def merge_bucket(current, values):
+    """Combine two (low, high, last, samples) buckets; values is the newer one"""
+    if current is None:
+        return values
+    return (min(current[0], values[0]), max(current[1], values[1]), values[2], current[3] + values[3])
+
+
+class HistoryStore:
+    """Indexed time series of (url, timestamp, price, fetch time) observations.
+
+    Every thread gets its own connection; WAL mode lets the web workers read
+    while the watcher writes, and each cycle is written in one transaction.
+    compact() bounds the growth: raw samples are kept for raw_retention,
+    then rolled up into hourly and later daily buckets.
+    """
+
+    def __init__(self, path=HISTORY_DB, raw_retention=HISTORY_RAW_RETENTION,
+                 hourly_retention=HISTORY_HOURLY_RETENTION):
+        self.path = path
+        self.raw_retention = parse_duration(raw_retention)
+        self.hourly_retention = parse_duration(hourly_retention)
+        self._local = threading.local()
+        self._url_ids = {}
+        self._url_ids_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def _url_id(self, conn, url, new_ids):
+        """Return the id for url, creating it if needed; call inside a transaction.
+
+        Ids created here are collected in new_ids and only cached once the
+        transaction has committed.
+        """
+        url_id = self._url_ids.get(url) or new_ids.get(url)
+        if url_id is None:
+            conn.execute("INSERT OR IGNORE INTO urls (url) VALUES (?)", (url,))
+            url_id = conn.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()[0]
+            new_ids[url] = url_id
+        return url_id
+
+    def record_many(self, observations):
+        """Write (url, ts, price, fetch_time) tuples in a single transaction"""
+        if not observations:
+            return
+        conn = self._connect()
+        new_ids = {}
+        with conn:
+            rows = [(self._url_id(conn, url, new_ids), ts, price, fetch_time) for url, ts, price, fetch_time in observations]
+            conn.executemany(
+                "INSERT OR REPLACE INTO observations (url_id, ts, price, fetch_time) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(
+                "INSERT INTO latest (url_id, ts, price, fetch_time) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url_id) DO UPDATE SET ts = excluded.ts, price = excluded.price, "
+                "fetch_time = excluded.fetch_time WHERE excluded.ts >= latest.ts",
+                rows,
+            )
+        with self._url_ids_lock:
+            self._url_ids.update(new_ids)
+
+    def record(self, url, price, ts=None, fetch_time=None):
+        self.record_many([(url, ts or time.time(), price, fetch_time)])
+
+    def latest_prices(self, urls=None):
+        """Return {url: {"price", "ts", "fetch_time"}} for the newest observation per URL"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT urls.url, latest.price, latest.ts, latest.fetch_time "
+            "FROM latest JOIN urls ON urls.id = latest.url_id"
+        ).fetchall()
+        wanted = set(urls) if urls is not None else None
+        return {
+            url: {"price": price, "ts": ts, "fetch_time": fetch_time}
+            for url, price, ts, fetch_time in rows
+            if wanted is None or url in wanted
+        }
+
+    def _lookup_ids(self, conn, urls):
+        """Return {url_id: url} for the urls that have history"""
+        urls = list(urls)
+        url_ids = {}
+        for i in range(0, len(urls), MAX_QUERY_PARAMS):
+            chunk = urls[i:i + MAX_QUERY_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            url_ids.update(conn.execute(f"SELECT id, url FROM urls WHERE url IN ({placeholders})", chunk).fetchall())
+        return url_ids
+
+    def change_counts(self, urls, since):
+        """Return {url: (price changes, first ts, last ts, samples)} over raw samples since since.
+
+        URLs without samples in the window are left out.
+        """
+        conn = self._connect()
+        ids = self._lookup_ids(conn, urls)
+        counts = {}
+        id_list = list(ids)
+        for i in range(0, len(id_list), MAX_QUERY_PARAMS):
+            chunk = id_list[i:i + MAX_QUERY_PARAMS]
+            rows = conn.execute(
+                "SELECT url_id, SUM(previous IS NOT NULL AND price != previous), MIN(ts), MAX(ts), COUNT(*) FROM ("
+                "  SELECT url_id, ts, price, LAG(price) OVER (PARTITION BY url_id ORDER BY ts) AS previous"
+                f"  FROM observations WHERE url_id IN ({','.join('?' * len(chunk))}) AND ts >= ?"
+                ") GROUP BY url_id",
+                [*chunk, since],
+            ).fetchall()
+            for url_id, changes, first, last, samples in rows:
+                counts[ids[url_id]] = (changes, first, last, samples)
+        return counts
+
+    def history(self, url, start=None, end=None, limit=None):
+        """Return raw [(ts, price, fetch_time)] samples for url between start and end,
+        oldest first; older periods only exist as rollups, see aggregate()"""
+        conn = self._connect()
+        query = (
+            "SELECT ts, price, fetch_time FROM observations "
+            "WHERE url_id = (SELECT id FROM urls WHERE url = ?) AND ts >= ? AND ts <= ? ORDER BY ts"
+        )
+        params = [url, start if start is not None else float("-inf"), end if end is not None else float("inf")]
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return conn.execute(query, params).fetchall()
+
+    def aggregate(self, urls, start, end, resolution):
+        """Downsample the history of urls in [start, end) into resolution-second buckets.
+
+        Buckets are aligned to multiples of resolution since the epoch, so
+        the same bucket has the same bounds in every query. Rolled-up
+        periods are never finer than their rollup. Returns
+        {url: [(bucket_start, min_price, max_price, last_price, count)]}
+        with buckets oldest first; URLs without history are omitted.
+        """
+        resolution = int(resolution)
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        conn = self._connect()
+        url_ids = self._lookup_ids(conn, urls)
+
+        merged = {}  # url_id -> {bucket_start: (low, high, last, samples)}
+        ids = list(url_ids)
+        for i in range(0, len(ids), MAX_QUERY_PARAMS):
+            chunk = ids[i:i + MAX_QUERY_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            # Oldest data first (daily rollups, hourly rollups, raw samples)
+            # so the last price of a merged bucket is the newest one
+            for level in sorted(ROLLUP_BLOCKS, reverse=True):
+                span = ROLLUP_BLOCKS[level]
+                if resolution % span:
+                    self._merge_rollup_buckets(conn, merged, chunk, level, start - span, end, start, end, resolution)
+                    continue
+                # Every block inside the window falls into a single output
+                # bucket: combine their summaries in SQL and only unpack the
+                # blocks cut by the window edges
+                self._merge_rollup_buckets(conn, merged, chunk, level, start - span, start, start, end, resolution)
+                rows = conn.execute(
+                    ROLLUP_SUMMARY_QUERY.format(placeholders),
+                    [resolution, *chunk, level, start, end - span, level],
+                ).fetchall()
+                for url_id, bucket, low, high, last, samples in rows:
+                    buckets = merged.setdefault(url_id, {})
+                    key = bucket * resolution
+                    buckets[key] = merge_bucket(buckets.get(key), (low, high, last, samples))
+                # Blocks from start on that the summary left out; the
+                # leading blocks above all start before start
+                self._merge_rollup_buckets(
+                    conn, merged, chunk, level, max(end - span, math.ceil(start) - 1), end, start, end, resolution,
+                )
+
+            rows = conn.execute(BUCKETS_QUERY.format(placeholders), [resolution, *chunk, start, end]).fetchall()
+            for url_id, bucket, low, high, last, samples in rows:
+                buckets = merged.setdefault(url_id, {})
+                key = bucket * resolution
+                buckets[key] = merge_bucket(buckets.get(key), (low, high, last, samples))
+
+        return {
+            url_ids[url_id]: [(t, *buckets[t]) for t in sorted(buckets)]
+            for url_id, buckets in merged.items()
+        }
+
+    def _merge_rollup_buckets(self, conn, merged, url_ids, level, after, before, start, end, resolution):
+        """Unpack the level rollup blocks starting in (after, before) into merged output buckets"""
+        placeholders = ",".join("?" * len(url_ids))
+        rows = conn.execute(
+            f"SELECT url_id, block_start, buckets FROM rollups WHERE url_id IN ({placeholders}) "
+            "AND resolution = ? AND block_start > ? AND block_start < ? ORDER BY url_id, block_start",
+            [*url_ids, level, after, before],
+        ).fetchall()
+        for url_id, block_start, packed in rows:
+            buckets = merged.setdefault(url_id, {})
+            for index, values in sorted(unpack_buckets(packed).items()):
+                t = block_start + index * level
+                if start <= t < end:
+                    key = t // resolution * resolution
+                    buckets[key] = merge_bucket(buckets.get(key), values)
+
+    def compact(self, now=None, pause=0.0, stop_event=None):
+        """Roll raw samples older than raw_retention into hourly buckets, and
+        hourly buckets older than hourly_retention into daily ones.
+
+        Works one URL per transaction, sleeping pause seconds in between, so
+        the watcher's cycle writes are never held up for long; stop_event
+        ends it early. Returns the number of rows rolled up.
+        """
+        now = time.time() if now is None else now
+        raw_cutoff = int(now - self.raw_retention) // HOUR * HOUR
+        hourly_cutoff = int(now - self.hourly_retention) // DAY * DAY
+        conn = self._connect()
+        stats = {"observations": 0, "hourly_blocks": 0}
+        for (url_id,) in conn.execute("SELECT id FROM urls").fetchall():
+            if stop_event is not None and stop_event.is_set():
+                break
+            with conn:
+                stats["observations"] += self._roll_observations(conn, url_id, raw_cutoff)
+                stats["hourly_blocks"] += self._roll_hourly(conn, url_id, hourly_cutoff)
+            if pause:
+                time.sleep(pause)
+        return stats
+
+    def _roll_observations(self, conn, url_id, cutoff):
+        """Move one URL's samples older than cutoff into hourly rollups; call inside a transaction"""
+        rows = conn.execute(BUCKETS_QUERY.format("?"), [HOUR, url_id, float("-inf"), cutoff]).fetchall()
+        if not rows:
+            return 0
+        span = ROLLUP_BLOCKS[HOUR]
+        blocks = {}
+        for _, bucket, low, high, last, samples in rows:
+            t = bucket * HOUR
+            block_start = t - t % span
+            blocks.setdefault(block_start, {})[(t - block_start) // HOUR] = (low, high, last, samples)
+        for block_start, buckets in blocks.items():
+            self._merge_block(conn, url_id, HOUR, block_start, buckets)
+        return conn.execute("DELETE FROM observations WHERE url_id = ? AND ts < ?", (url_id, cutoff)).rowcount
+
+    def _roll_hourly(self, conn, url_id, cutoff):
+        """Fold one URL's hourly blocks (days) ending before cutoff into daily rollups"""
+        rows = conn.execute(
+            "SELECT block_start, low, high, last, samples FROM rollups "
+            "WHERE url_id = ? AND resolution = ? AND block_start <= ? ORDER BY block_start",
+            (url_id, HOUR, cutoff - ROLLUP_BLOCKS[HOUR]),
+        ).fetchall()
+        if not rows:
+            return 0
+        span = ROLLUP_BLOCKS[DAY]
+        blocks = {}
+        for day_start, low, high, last, samples in rows:
+            block_start = day_start - day_start % span
+            blocks.setdefault(block_start, {})[(day_start - block_start) // DAY] = (low, high, last, samples)
+        for block_start, buckets in blocks.items():
+            self._merge_block(conn, url_id, DAY, block_start, buckets)
+        conn.execute(
+            "DELETE FROM rollups WHERE url_id = ? AND resolution = ? AND block_start <= ?",
+            (url_id, HOUR, cutoff - ROLLUP_BLOCKS[HOUR]),
+        )
+        return len(rows)
+
+    def _merge_block(self, conn, url_id, resolution, block_start, buckets):
+        """Add buckets to a stored rollup block (creating it if needed)"""
+        row = conn.execute(
+            "SELECT buckets FROM rollups WHERE url_id = ? AND resolution = ? AND block_start = ?",
+            (url_id, resolution, block_start),
+        ).fetchone()
+        if row:
+            stored = unpack_buckets(row[0])
+            for index, values in buckets.items():
+                stored[index] = merge_bucket(stored.get(index), values)
+            buckets = stored
+        buckets = {index: clamp_bucket(values) for index, values in buckets.items()}
+        summary = None
+        for index in sorted(buckets):
+            summary = merge_bucket(summary, buckets[index])
+        conn.execute(
+            "INSERT OR REPLACE INTO rollups (url_id, resolution, block_start, low, high, last, samples, buckets) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url_id, resolution, block_start, *summary, pack_buckets(buckets)),
+        )
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Shared store written by the watcher and read by the web API
+history_store = HistoryStore()
@@ -0,0 +1,50 @@
+# app/http_client.py
+import os
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connection pool sizing: number of per-host pools kept, and keep-alive
+# connections per host (should cover the watcher's parallel checks)
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '4'))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '16'))
+
+# Connect timeout is short for everything; read timeouts are chosen per call
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '5'))
+
+
+class HttpClient:
+    """Shared keep-alive HTTP client.
+
+    Wraps a single requests.Session whose urllib3 connection pools are
+    thread-safe, so FlareSolverr commands, Telegram messages and direct page
+    fetches from any thread reuse open TCP/TLS connections instead of
+    opening a new one per call.
+    """
+
+    def __init__(self, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 connect_timeout=HTTP_CONNECT_TIMEOUT):
+        self.connect_timeout = connect_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def timeout(self, read_timeout):
+        """Build a (connect, read) timeout tuple"""
+        return (self.connect_timeout, read_timeout)
+
+    def get(self, url, read_timeout=30, **kwargs):
+        return self.session.get(url, timeout=self.timeout(read_timeout), **kwargs)
+
+    def post(self, url, read_timeout=30, **kwargs):
+        return self.session.post(url, timeout=self.timeout(read_timeout), **kwargs)
+
+    def send_telegram(self, token, chat_id, text):
+        """Send a Telegram message, returning the response"""
+        url = f"https://api.telegram.org/bot{token}/sendMessage"
+        payload = {"chat_id": chat_id, "text": text}
+        return self.post(url, read_timeout=10, json=payload)
+
+
+# Process-wide client used by the web app, the watcher service and the CLI
+http_client = HttpClient()
@@ -0,0 +1,292 @@
+# app/leader.py
+import atexit
+import json
+import logging
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process runs its own watcher
+    fcntl = None
+
+from .watcher_service import watcher_service, STOP_TIMEOUT
+
+# Only the process holding an exclusive flock on LEADER_LOCK_FILE runs the
+# watcher. Every LEADER_HEARTBEAT seconds it rewrites LEADER_FILE with its
+# pid, its control socket and whether the watcher should be running; the
+# other processes forward watcher requests to it over that socket and take
+# the lock over within a heartbeat when the leader exits
+WATCHER_DIR = os.path.join(os.path.dirname(__file__), "..", "watcher")
+LEADER_LOCK_FILE = os.path.join(WATCHER_DIR, "leader.lock")
+LEADER_FILE = os.path.join(WATCHER_DIR, "leader.json")
+LEADER_HEARTBEAT = float(os.environ.get('LEADER_HEARTBEAT', '5'))
+
+# A leader whose heartbeat is this many intervals old is reported as stale
+STALE_HEARTBEATS = 3
+
+# Longest a forwarded request waits for the leader; stop() may take STOP_TIMEOUT
+FORWARD_TIMEOUT = STOP_TIMEOUT + 15
+
+logger = logging.getLogger('watcher')
+
+
+class LeaderError(Exception):
+    """The watcher leader process could not be reached"""
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON reply line out"""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            reply = {"result": self.server.leader._dispatch(request["cmd"], request.get("args") or {})}
+        except Exception as e:
+            logger.error(f"Watcher control request failed: {e}", exc_info=True)
+            reply = {"error": str(e)}
+        self.wfile.write(json.dumps(reply, default=str).encode() + b"\n")
+
+
+class WatcherLeader:
+    """Runs the watcher in exactly one process and routes control calls to it.
+
+    Every gunicorn worker tries to take the leader lock without blocking,
+    once from the post_fork hook in gunicorn.conf.py (or on its first
+    watcher request) and then every heartbeat. The winner serves a unix socket; start(), stop(),
+    check_now() and status() run locally in the leader and are forwarded
+    there from the other workers. Whether the watcher should run is kept in
+    LEADER_FILE, so a new leader resumes it after the old one exits (e.g.
+    when gunicorn recycles it after --max-requests).
+    Without fcntl every process simply controls its own watcher.
+    """
+
+    def __init__(self, service=watcher_service, lock_path=LEADER_LOCK_FILE, state_path=LEADER_FILE,
+                 heartbeat=LEADER_HEARTBEAT):
+        self.service = service
+        self.lock_path = os.path.abspath(lock_path)
+        self.state_path = os.path.abspath(state_path)
+        self.heartbeat = heartbeat
+        self.enabled = fcntl is not None and hasattr(socket, "AF_UNIX")
+        self._lock = threading.RLock()
+        self._pid = None  # Process the election thread runs in
+        self._lock_fd = None  # Open, and flocked, while this process is the leader
+        self._server = None
+        self._socket_path = None
+        self._wanted = False  # Whether the watcher should run; handed over to the next leader
+        self._stale_warned = False
+
+    @property
+    def is_leader(self):
+        return self._lock_fd is not None and self._pid == os.getpid()
+
+    def ensure_started(self):
+        """Join the election from this process; threads do not survive gunicorn's fork"""
+        if not self.enabled:
+            return
+        pid = os.getpid()
+        with self._lock:
+            if self._pid == pid:
+                return
+            # State inherited from the parent belongs to the parent
+            self._pid = pid
+            self._lock_fd = None
+            self._server = None
+            self._socket_path = None
+        try:
+            self._elect()
+        except Exception as e:
+            logger.error(f"Watcher leader election error: {e}", exc_info=True)
+        threading.Thread(target=self._election_loop, daemon=True, name="watcher-leader").start()
+
+    def _election_loop(self):
+        while True:
+            time.sleep(self.heartbeat)
+            try:
+                if self.is_leader:
+                    self._write_state()
+                else:
+                    self._elect()
+            except Exception as e:
+                logger.error(f"Watcher leader election error: {e}", exc_info=True)
+
+    def _elect(self):
+        """Become the leader if the lock is free; returns True if this process leads"""
+        with self._lock:
+            if self.is_leader:
+                return True
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                self._check_heartbeat()
+                return False
+            previous = self._read_state()
+            if previous.get("socket"):
+                try:
+                    os.unlink(previous["socket"])
+                except OSError:
+                    pass
+            try:
+                self._serve()
+                self._lock_fd = fd
+                self._wanted = bool(previous.get("watcher"))
+                self._write_state()
+            except Exception:
+                # Leading without a control socket would strand the other workers
+                self._lock_fd = None
+                if self._server is not None:
+                    self._server.shutdown()
+                    self._server.server_close()
+                    self._server = None
+                os.close(fd)
+                raise
+            logger.info(f"Process {os.getpid()} is now the watcher leader")
+            if self._wanted and not self.service.is_running:
+                logger.info("Resuming the watcher started under the previous leader")
+                self.service.start()
+            return True
+
+    def _check_heartbeat(self):
+        """Warn once when the process holding the lock stops writing heartbeats"""
+        state = self._read_state()
+        age = time.time() - state.get("heartbeat", 0)
+        stale = age > STALE_HEARTBEATS * self.heartbeat
+        if stale and not self._stale_warned:
+            logger.warning(f"Watcher leader (pid {state.get('pid')}) holds the lock but its "
+                           f"last heartbeat was {int(age)}s ago")
+        self._stale_warned = stale
+
+    def _serve(self):
+        """Open this leader's control socket"""
+        path = os.path.join(os.path.dirname(self.state_path), f"leader-{os.getpid()}.sock")
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        server = socketserver.ThreadingUnixStreamServer(path, _ControlHandler)
+        server.daemon_threads = True
+        server.leader = self
+        os.chmod(path, 0o600)
+        threading.Thread(target=server.serve_forever, daemon=True, name="watcher-control").start()
+        self._server = server
+        self._socket_path = path
+        atexit.register(self._remove_socket, path)
+
+    @staticmethod
+    def _remove_socket(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self):
+        """Heartbeat: rewrite LEADER_FILE atomically"""
+        state = {
+            "pid": os.getpid(),
+            "socket": self._socket_path,
+            "heartbeat": time.time(),
+            "watcher": self._wanted,
+        }
+        directory = os.path.dirname(self.state_path)
+        fd, tmp_path = tempfile.mkstemp(prefix=".leader.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _set_wanted(self, wanted):
+        self._wanted = wanted
+        if self.is_leader:
+            self._write_state()
+
+    def _dispatch(self, cmd, args):
+        """Run a control command against this process's watcher"""
+        if cmd == "status":
+            status = self.service.status()
+            status["leader"] = {"pid": os.getpid(), "election": self.enabled}
+            return status
+        if cmd == "start":
+            self._set_wanted(True)
+            return self.service.start()
+        if cmd == "stop":
+            self._set_wanted(False)
+            return self.service.stop()
+        if cmd == "check":
+            return self.service.check_now(args.get("id"))
+        raise ValueError(f"Unknown watcher command {cmd!r}")
+
+    def _call(self, cmd, **args):
+        """Run cmd in the leader, here or over its control socket"""
+        self.ensure_started()
+        if not self.enabled or self._elect():
+            return self._dispatch(cmd, args)
+        state = self._read_state()
+        path = state.get("socket")
+        if not path:
+            raise LeaderError("No watcher leader has been elected yet")
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(FORWARD_TIMEOUT)
+                sock.connect(path)
+                sock.sendall(json.dumps({"cmd": cmd, "args": args}).encode() + b"\n")
+                with sock.makefile("rb") as reader:
+                    reply = json.loads(reader.readline())
+        except (OSError, ValueError) as e:
+            raise LeaderError(f"Watcher leader (pid {state.get('pid')}) is not responding: {e}")
+        if "error" in reply:
+            raise LeaderError(reply["error"])
+        return reply["result"]
+
+    def start(self):
+        try:
+            return tuple(self._call("start"))
+        except LeaderError as e:
+            return False, str(e)
+
+    def stop(self):
+        try:
+            return tuple(self._call("stop"))
+        except LeaderError as e:
+            return False, str(e)
+
+    def check_now(self, product_id=None):
+        try:
+            return tuple(self._call("check", id=product_id))
+        except LeaderError as e:
+            return False, str(e)
+
+    def status(self):
+        """The leader's watcher status, with "leader" naming the process that answered"""
+        try:
+            return self._call("status")
+        except LeaderError as e:
+            status = self.service.status()
+            status["status"] = "Unknown"
+            status["leader"] = {"error": str(e)}
+            return status
+
+
+# Shared by every worker of the web app
+watcher_leader = WatcherLeader()
@@ -0,0 +1,81 @@
+# app/price_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# How long a fetched price is served without a new FlareSolverr call,
+# and how many URLs are kept before the least recently used are evicted
+PRICE_CACHE_TTL = int(os.environ.get('PRICE_CACHE_TTL', '900'))
+PRICE_CACHE_SIZE = int(os.environ.get('PRICE_CACHE_SIZE', '5000'))
+
+
+class PriceCache:
+    """Thread-safe TTL + LRU cache of the latest fetched data per listing URL.
+
+    The background watcher writes every successful check into it and the
+    /api/price endpoint reads from it, so a dashboard refresh right after a
+    watcher cycle costs no FlareSolverr calls.
+    """
+
+    def __init__(self, ttl=PRICE_CACHE_TTL, max_entries=PRICE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # url -> (timestamp, data)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url, max_age=None):
+        """Return (data, age_seconds) for a fresh entry, or None"""
+        max_age = self.ttl if max_age is None else max_age
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                self.misses += 1
+                return None
+            timestamp, data = entry
+            age = now - timestamp
+            if age > max_age:
+                if age > self.ttl:
+                    del self._entries[url]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(url)
+            self.hits += 1
+            return dict(data), age
+
+    def put(self, url, data, timestamp=None):
+        """Store the latest data for url, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[url] = (timestamp or time.time(), dict(data))
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url):
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def evict_expired(self):
+        """Drop every entry older than the TTL; returns how many were removed"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [url for url, (timestamp, _) in self._entries.items() if timestamp < cutoff]
+            for url in expired:
+                del self._entries[url]
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Shared cache used by the background watcher and the web API
+price_cache = PriceCache()
@@ -0,0 +1,296 @@
+# app/product_io.py
+import csv
+import io
+import json
+import re
+from .product_store import new_product_id
+from .validators import is_valid_url, is_valid_price, is_valid_name, is_valid_priority, sanitize_string, normalize_url
+
+# Columns written by export and understood by import
+FIELDS = ("id", "url", "target_price", "name", "priority")
+FORMATS = ("csv", "jsonl")
+
+MIMETYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+_FORMAT_BY_MIMETYPE = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+
+# Upper bound on rows per import, and on rows listed in the error report
+MAX_IMPORT_ROWS = 10000
+MAX_REPORTED_ERRORS = 500
+
+# Upper bound on operations per apply_operations() call
+MAX_BATCH_OPERATIONS = 1000
+OPERATIONS = ("insert", "update", "delete")
+
+# Rows buffered per chunk yielded by export_products()
+EXPORT_CHUNK_ROWS = 500
+
+_PRODUCT_ID = re.compile(r"p[0-9a-f]{12}")
+
+
+class ImportFormatError(ValueError):
+    """The import file cannot be parsed as a whole (unknown format, no url column)"""
+
+
+def detect_format(fmt=None, mimetype=None, filename=None):
+    """Pick "csv" or "jsonl" from an explicit format, a content type or a file name"""
+    if fmt:
+        fmt = fmt.lower().lstrip(".")
+        if fmt == "ndjson":
+            fmt = "jsonl"
+        if fmt not in FORMATS:
+            raise ImportFormatError(f"Unknown format {fmt!r}, expected one of: {', '.join(FORMATS)}")
+        return fmt
+    if mimetype in _FORMAT_BY_MIMETYPE:
+        return _FORMAT_BY_MIMETYPE[mimetype]
+    if filename and "." in filename:
+        return detect_format(filename.rsplit(".", 1)[1])
+    raise ImportFormatError("Cannot tell the file format, pass format=csv or format=jsonl")
+
+
+def iter_rows(lines, fmt):
+    """Yield (line number, row dict or None, error or None) from an iterable of text lines"""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        if not reader.fieldnames or "url" not in [f.strip().lower() for f in reader.fieldnames]:
+            raise ImportFormatError("CSV header must include a url column")
+        for row in reader:
+            row = {(k or "").strip().lower(): v for k, v in row.items()}
+            yield reader.line_num, row, None
+        return
+
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_num, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_num, None, "Expected a JSON object"
+            continue
+        yield line_num, row, None
+
+
+def validate_row(row):
+    """Return (product fields, None) for a valid row, or (None, error message).
+
+    A priority given as empty or null comes back as None, which
+    apply_fields() turns into removing it; a row without one has none.
+    """
+    url = row.get("url")
+    url = url.strip() if isinstance(url, str) else ""
+    if not is_valid_url(url):
+        return None, "Invalid URL format"
+
+    target_price = row.get("target_price")
+    if isinstance(target_price, str):
+        target_price = target_price.strip()
+    if not is_valid_price(target_price):
+        return None, "Invalid target price"
+
+    name = sanitize_string(row.get("name") or "")
+    if name and not is_valid_name(name):
+        return None, "Invalid product name"
+
+    fields = {"url": url, "target_price": int(float(target_price)), "name": name}
+    if "priority" in row:
+        priority = row["priority"]
+        if isinstance(priority, str):
+            priority = priority.strip()
+        if priority in (None, ""):
+            fields["priority"] = None
+        elif not is_valid_priority(priority):
+            return None, "Invalid priority"
+        else:
+            fields["priority"] = priority.lower()
+    product_id = row.get("id")
+    if isinstance(product_id, str) and _PRODUCT_ID.fullmatch(product_id.strip()):
+        fields["id"] = product_id.strip()
+    return fields, None
+
+
+def apply_fields(product, fields):
+    """Update product with validated fields; a None value removes that field"""
+    for key, value in fields.items():
+        if value is None:
+            product.pop(key, None)
+        else:
+            product[key] = value
+    return product
+
+
+def import_products(store, rows, update=False, dry_run=False):
+    """Validate rows from iter_rows() and add them to store in one atomic write.
+
+    Rows whose URL (normalized) is already watched are reported as
+    duplicates, or update that product's target price and name when update
+    is set (an empty priority cell removes the priority, a missing priority
+    column keeps it); repeated URLs within the import keep the first row. Returns a
+    report dict with counts and per-row errors.
+    """
+    report = {"rows": 0, "added": 0, "updated": 0, "skipped": 0, "errors": [], "errors_truncated": False}
+
+    def reject(line, error):
+        report["skipped"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line, "error": error})
+        else:
+            report["errors_truncated"] = True
+
+    # Parse and validate everything before taking the store lock
+    valid = []
+    seen = {}  # normalized URL -> line of its first row in this import
+    for line, row, error in rows:
+        report["rows"] += 1
+        if report["rows"] > MAX_IMPORT_ROWS:
+            report["rows"] -= 1
+            reject(line, f"Import limit of {MAX_IMPORT_ROWS} rows reached, remaining rows ignored")
+            break
+        if error is None:
+            fields, error = validate_row(row)
+        if error:
+            reject(line, error)
+            continue
+        key = normalize_url(fields["url"])
+        if key in seen:
+            reject(line, f"Duplicate of line {seen[key]}")
+            continue
+        seen[key] = line
+        valid.append((line, fields))
+
+    if dry_run:
+        _merge(store, store.load(), valid, update, report, reject)
+    else:
+        with store.transaction() as products:
+            _merge(store, products, valid, update, report, reject)
+    report["errors"].sort(key=lambda error: error["line"])
+    return report
+
+
+def _merge(store, products, valid, update, report, reject):
+    """Apply validated rows to products, the store's list as of the transaction"""
+    used_ids = {p["id"] for p in products}
+    for line, fields in valid:
+        existing = store.find_by_url(fields["url"])
+        if existing is not None:
+            if not update:
+                reject(line, f"Product with this URL already exists ({existing['id']})")
+                continue
+            product = products[store.position(existing["id"])]
+            product["target_price"] = fields["target_price"]
+            if fields["name"]:
+                product["name"] = fields["name"]
+            if "priority" in fields:
+                apply_fields(product, {"priority": fields["priority"]})
+            report["updated"] += 1
+            continue
+        product_id = fields.pop("id", None)
+        if not product_id or product_id in used_ids:
+            product_id = new_product_id()
+        used_ids.add(product_id)
+        products.append(apply_fields({"id": product_id}, fields))
+        report["added"] += 1
+
+
+def apply_operations(store, operations, atomic=True):
+    """Apply a list of insert/update/delete operations in one store write.
+
+    Operations run in order against the list as left by the previous ones:
+    {"op": "insert", "url", "target_price", "name"},
+    {"op": "update", "id", ...fields to change} and {"op": "delete", "id"}.
+    Fields left out of an update keep their value; an empty or null
+    priority removes the product's priority.
+    With atomic set nothing is saved unless every operation succeeds.
+    Returns (applied, per-operation results).
+    """
+    results = []
+    with store.transaction() as products:
+        # Work on copies so a rejected atomic batch leaves the list untouched
+        by_id = {p["id"]: dict(p) for p in products}
+        by_url = {normalize_url(p["url"]): p["id"] for p in products}
+        order = [p["id"] for p in products]
+
+        for index, op in enumerate(operations):
+            result = {"index": index, "op": op.get("op") if isinstance(op, dict) else None, "id": None}
+            error = _apply_operation(op, result, by_id, by_url, order) if isinstance(op, dict) else "Operation must be an object"
+            result["success"] = error is None
+            if error:
+                result["error"] = error
+            results.append(result)
+
+        applied = not atomic or all(r["success"] for r in results)
+        if applied:
+            products[:] = [by_id[product_id] for product_id in order if product_id in by_id]
+    return applied, results
+
+
+def _apply_operation(op, result, by_id, by_url, order):
+    """Apply one operation to the id/URL indexes; returns an error message or None"""
+    kind = result["op"]
+    if kind not in OPERATIONS:
+        return f"Unknown op, expected one of: {', '.join(OPERATIONS)}"
+
+    if kind == "insert":
+        product_id, current = None, {}
+    else:
+        product_id = op.get("id") if isinstance(op.get("id"), str) else None
+        current = by_id.get(product_id)
+        if current is None:
+            return "Product not found"
+        result["id"] = product_id
+
+    if kind == "delete":
+        del by_url[normalize_url(current["url"])]
+        del by_id[product_id]
+        return None
+
+    fields, error = validate_row({**current, **op, "id": None})
+    if error:
+        return error
+    key = normalize_url(fields["url"])
+    if by_url.get(key, product_id) != product_id:
+        return "Product with this URL already exists"
+
+    if kind == "insert":
+        product_id = result["id"] = new_product_id()
+        current = by_id[product_id] = {"id": product_id}
+        order.append(product_id)
+    else:
+        del by_url[normalize_url(current["url"])]
+    apply_fields(current, fields)
+    by_url[key] = product_id
+    return None
+
+
+def export_products(products, fmt):
+    """Yield products serialized as CSV or JSONL, a chunk of rows at a time"""
+    if fmt == "jsonl":
+        chunk = []
+        for product in products:
+            chunk.append(json.dumps({key: product.get(key) for key in FIELDS}, ensure_ascii=False) + "\n")
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for n, product in enumerate(products, 1):
+        writer.writerow(product)
+        if n % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,203 @@
+# app/product_store.py
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from .validators import normalize_url
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+PRODUCTS_FILE = os.path.join(os.path.dirname(__file__), "..", "watcher", "products.json")
+
+logger = logging.getLogger('watcher')
+
+
+def new_product_id():
+    """Stable product id; the "p" prefix keeps it from ever parsing as a list index"""
+    return "p" + uuid.uuid4().hex[:12]
+
+
+class ProductStoreError(Exception):
+    """The products file could not be read or written"""
+
+
+class ProductStore:
+    """Cached, atomically written watcher/products.json shared by the web app,
+    the watcher service and the CLI.
+
+    load() only re-reads the file when its inode, mtime or size changed.
+    Writes go to a temp file that is renamed over the original, so readers
+    never see a half-written list, and read-modify-write cycles hold an
+    exclusive lock on a sidecar .lock file across processes.
+
+    Every product has a stable "id" (assigned on first load or write) and
+    the cached list is indexed by id and by normalized URL.
+    """
+
+    def __init__(self, path=PRODUCTS_FILE):
+        self.path = os.path.abspath(path)
+        self.lock_path = self.path + ".lock"
+        self._lock = threading.RLock()
+        self._lock_depth = 0  # flock is only taken by the outermost locked()
+        self._cache_key = None  # (st_ino, st_mtime_ns, st_size) of the cached file
+        self._products = []
+        self._by_id = {}  # product id -> position in _products
+        self._by_url = {}  # normalize_url(url) -> position in _products
+        self._listeners = []
+
+    def subscribe(self, callback):
+        """Call callback() after every write of the product list from this process"""
+        self._listeners.append(callback)
+
+    def load(self):
+        """Return a copy of the product list"""
+        with self._lock:
+            self._refresh()
+            return self._copy(self._products)
+
+    def get(self, product_id):
+        """Return a copy of the product with this id, or None"""
+        with self._lock:
+            self._refresh()
+            position = self._by_id.get(product_id)
+            return dict(self._products[position]) if position is not None else None
+
+    def position(self, product_id):
+        """Return the list position of the product with this id, or None"""
+        with self._lock:
+            self._refresh()
+            return self._by_id.get(product_id)
+
+    def find_by_url(self, url):
+        """Return a copy of the product watching this URL (normalized), or None"""
+        with self._lock:
+            self._refresh()
+            position = self._by_url.get(normalize_url(url))
+            return dict(self._products[position]) if position is not None else None
+
+    def _refresh(self):
+        """Re-read the file if it changed since it was cached; caller holds _lock"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            with self.locked():
+                if not os.path.exists(self.path):
+                    self._write([])
+            return
+
+        if (st.st_ino, st.st_mtime_ns, st.st_size) == self._cache_key:
+            return
+        try:
+            products = self._read()
+        except (OSError, ValueError) as e:
+            # Keep serving the last good list rather than an empty one
+            logger.error(f"Error loading products: {e}")
+            return
+        if all(p.get("id") for p in products):
+            self._set_cache(products, st)
+            return
+        # Products written before ids existed (or by hand): assign and persist ids
+        with self.locked():
+            try:
+                products = self._read()
+                self._write(products)
+            except (OSError, ValueError, ProductStoreError) as e:
+                # Read-only or full disk: keep the ids in memory so reads still work
+                logger.error(f"Error assigning product ids: {e}")
+                self._assign_ids(products)
+                self._set_cache(products, st)
+
+    def _read(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            products = json.load(f)
+        if not isinstance(products, list):
+            raise ValueError("products file must contain a list")
+        return products
+
+    def _set_cache(self, products, st):
+        self._products = products
+        self._cache_key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        self._by_id = {p["id"]: i for i, p in enumerate(products)}
+        self._by_url = {normalize_url(p["url"]): i for i, p in enumerate(products)}
+
+    def save(self, products):
+        """Replace the whole product list"""
+        with self.locked():
+            self._write(products)
+
+    @contextmanager
+    def transaction(self):
+        """Lock, yield the current list for editing, and save it if it changed"""
+        with self.locked():
+            products = self.load()
+            original = self._copy(products)
+            yield products
+            if products != original:
+                self._write(products)
+
+    @contextmanager
+    def locked(self):
+        """Hold the in-process lock and, where available, an exclusive file lock"""
+        with self._lock:
+            if fcntl is None or self._lock_depth:
+                # A second flock on a new descriptor would block on our own lock
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _assign_ids(products):
+        for product in products:
+            if not product.get("id"):
+                product["id"] = new_product_id()
+
+    def _write(self, products):
+        self._assign_ids(products)
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".products.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(products, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise ProductStoreError(f"Error saving products: {e}") from e
+        self._set_cache(self._copy(products), os.stat(self.path))
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Product change listener failed: {e}", exc_info=True)
+
+    @staticmethod
+    def _copy(products):
+        return [dict(p) for p in products]
+
+
+# Shared store for the web app and the watcher service
+product_store = ProductStore()
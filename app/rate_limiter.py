@@ -0,0 +1,181 @@
+# app/rate_limiter.py
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+# Requests per minute allowed against one target host across the web app,
+# the watcher and the CLI, with bursts of up to RATE_LIMIT_BURST; each
+# request is delayed by a random extra of up to RATE_LIMIT_JITTER times the
+# mean gap between requests. RATE_LIMIT_PER_MINUTE=0 turns the limit off.
+RATE_LIMIT_PER_MINUTE = float(os.environ.get('RATE_LIMIT_PER_MINUTE', '20'))
+RATE_LIMIT_BURST = float(os.environ.get('RATE_LIMIT_BURST', '5'))
+RATE_LIMIT_JITTER = float(os.environ.get('RATE_LIMIT_JITTER', '0.3'))
+
+# Bucket state shared by every process on the machine
+RATE_LIMIT_FILE = os.environ.get(
+    'RATE_LIMIT_FILE', os.path.join(os.path.dirname(__file__), '..', 'watcher', 'rate_limits.json')
+)
+
+logger = logging.getLogger('watcher')
+
+
+class RateLimitError(Exception):
+    """No request slot for the host within the allowed wait"""
+
+
+class HostRateLimiter:
+    """Token bucket per target host, shared across threads and processes.
+
+    The buckets live in a small JSON file that is only read and written
+    under an exclusive flock, so the watcher, every gunicorn worker and the
+    CLI draw from the same budget. reserve() takes a token right away and
+    returns how long the caller must wait for it (the bucket may go
+    negative), which keeps callers in arrival order without holding the
+    lock while they sleep.
+    """
+
+    def __init__(self, path=RATE_LIMIT_FILE, per_minute=RATE_LIMIT_PER_MINUTE,
+                 burst=RATE_LIMIT_BURST, jitter=RATE_LIMIT_JITTER):
+        self.path = os.path.abspath(path)
+        self.rate = per_minute / 60
+        self.capacity = max(burst, 1.0)
+        self.jitter = jitter
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    @contextmanager
+    def _buckets(self, write=True):
+        """Yield the {host: {"tokens", "updated"}} state, saving it afterwards if write"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+                raw = b""
+                while True:
+                    chunk = os.read(fd, 65536)
+                    if not chunk:
+                        break
+                    raw += chunk
+                try:
+                    buckets = json.loads(raw) if raw else {}
+                except ValueError:
+                    logger.warning(f"Resetting unreadable rate limit state in {self.path}")
+                    buckets = {}
+                yield buckets
+                if write:
+                    data = json.dumps(buckets).encode()
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    os.ftruncate(fd, 0)
+                    os.write(fd, data)
+            finally:
+                os.close(fd)  # Also releases the flock
+
+    def _refill(self, bucket, now):
+        """Tokens in bucket at now"""
+        return min(self.capacity, bucket["tokens"] + (now - bucket["updated"]) * self.rate)
+
+    def reserve(self, host, max_wait=None):
+        """Take a token for host; returns the seconds to wait before using it.
+
+        Returns None, without taking anything, when the wait would exceed
+        max_wait.
+        """
+        if not self.enabled:
+            return 0.0
+        now = time.time()
+        with self._buckets() as buckets:
+            bucket = buckets.get(host) or {"tokens": self.capacity, "updated": now}
+            tokens = self._refill(bucket, now) - 1
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+            if max_wait is not None and wait > max_wait:
+                return None
+            buckets[host] = {"tokens": tokens, "updated": now}
+            # Hosts whose buckets have been full for an hour are forgotten
+            for other in [h for h, b in buckets.items() if now - b["updated"] > 3600 + self.capacity / self.rate]:
+                del buckets[other]
+        return wait
+
+    def refund(self, host):
+        """Give back a token reserved for a request that was not made"""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._buckets() as buckets:
+            bucket = buckets.get(host)
+            if bucket:
+                buckets[host] = {"tokens": min(self.capacity, self._refill(bucket, now) + 1), "updated": now}
+
+    def _jitter(self):
+        return random.uniform(0, self.jitter / self.rate) if self.enabled and self.jitter > 0 else 0.0
+
+    def acquire(self, host, max_wait=None, stop_event=None):
+        """Wait for a request slot for host; raises RateLimitError past max_wait or on stop_event"""
+        wait = self.reserve(host, max_wait)
+        if wait is None:
+            raise RateLimitError(f"Rate limit for {host} reached, try again later")
+        delay = wait + self._jitter()
+        if delay > 0:
+            if wait > 1:
+                logger.info(f"Rate limit: waiting {wait:.1f}s for {host}")
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    self.refund(host)
+                    raise RateLimitError("Stopped while waiting for the rate limit")
+            else:
+                time.sleep(delay)
+
+    async def acquire_async(self, host, max_wait=None):
+        """Async counterpart of acquire(); cancelling the caller cancels the wait"""
+        wait = await asyncio.to_thread(self.reserve, host, max_wait)
+        if wait is None:
+            raise RateLimitError(f"Rate limit for {host} reached, try again later")
+        delay = wait + self._jitter()
+        if delay > 0:
+            if wait > 1:
+                logger.info(f"Rate limit: waiting {wait:.1f}s for {host}")
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                await asyncio.to_thread(self.refund, host)
+                raise
+
+    def levels(self):
+        """Current fill level per host: {host: {"tokens", "capacity", "per_minute"}}.
+
+        Tokens go negative while requests are waiting for their slot.
+        """
+        if not self.enabled:
+            return {}
+        now = time.time()
+        try:
+            with self._buckets(write=False) as buckets:
+                return {
+                    host: {
+                        "tokens": round(self._refill(bucket, now), 2),
+                        "capacity": self.capacity,
+                        "per_minute": self.rate * 60,
+                    }
+                    for host, bucket in buckets.items()
+                }
+        except OSError as e:
+            logger.error(f"Error reading rate limit state: {e}")
+            return {}
+
+
+# Shared limiter for every fetch path
+rate_limiter = HostRateLimiter()
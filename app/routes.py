@@ -1,151 +1,111 @@
 # app/routes.py
-import json
+import io
+import math
 import os
-import requests
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
+import time
+from flask import Blueprint, Response, render_template, request, jsonify, redirect, url_for, flash, stream_with_context
 from flask_login import login_required, login_user, logout_user, current_user
-from bs4 import BeautifulSoup
 from .watcher_service import watcher_service
+from .leader import watcher_leader
+from .flaresolverr import FlareSolverrError
+from .fetcher import page_fetcher
+from .rate_limiter import RateLimitError
+from .circuit_breaker import CircuitOpenError
+from .extractors import get_extractor, ExtractionError
+from .snapshot_archive import extract_and_record
+from .price_cache import price_cache
+from .events import event_bus, format_sse
+from .product_store import product_store, new_product_id
+from .product_io import (
+    detect_format, iter_rows, import_products, export_products, apply_operations, apply_fields,
+    ImportFormatError, MIMETYPES, MAX_BATCH_OPERATIONS,
+)
+from .config_store import config_store, NOTIFICATION_MODES
+from .history_store import history_store, parse_duration
 from .auth import User
-from .validators import is_valid_url, is_valid_price, is_valid_name, sanitize_string
+from .validators import is_valid_url, is_valid_price, is_valid_name, is_valid_priority, sanitize_string
 from . import limiter
 
 main = Blueprint("main", __name__)
 
-PRODUCTS_FILE = os.path.join(os.path.dirname(__file__), "../watcher/products.json")
-CONFIG_FILE = os.path.join(os.path.dirname(__file__), "../config.json")
 
-# Get FlareSolverr URL from environment
-FLARESOLVERR_URL = os.environ.get('FLARESOLVERR_URL', 'http://localhost:8191/v1')
+# Lifetime of one /api/watcher/events stream, keep-alive comment interval
+# and the reconnect delay sent to the browser
+EVENT_STREAM_SECONDS = 55
+EVENT_KEEPALIVE_SECONDS = 15
+EVENT_RETRY_MS = 3000
+
+# Price history queries: window when no start is given, buckets per product
+# when no resolution is given, and the bounds every query is clamped to
+HISTORY_DEFAULT_RANGE = "7d"
+HISTORY_DEFAULT_POINTS = 200
+HISTORY_MAX_POINTS = 2000
+HISTORY_MIN_RESOLUTION = 60
 
 def load_products():
-    """Load products, creating empty list if missing"""
-    try:
-        with open(PRODUCTS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Create empty products file if it doesn't exist
-        default_products = []
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(PRODUCTS_FILE), exist_ok=True)
-        save_products(default_products)
-        return default_products
-    except Exception as e:
-        # Log error and return empty list
-        print(f"Error loading products: {e}")
-        return []
+    """Load products (cached until watcher/products.json changes)"""
+    return product_store.load()
 
 def save_products(products):
-    """Save products to file"""
-    try:
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(PRODUCTS_FILE), exist_ok=True)
-        with open(PRODUCTS_FILE, "w", encoding="utf-8") as f:
-            json.dump(products, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving products: {e}")
-        raise
-
-def load_config():
-    """Load configuration, creating default if missing"""
-    try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Create default config if it doesn't exist
-        default_config = {
-            "interval": "600",  # 10 minutes default
-            "telegram_token": "",
-            "telegram_chat_id": ""
-        }
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-        save_config(default_config)
-        return default_config
-    except Exception as e:
-        # Log error and return minimal config
-        print(f"Error loading config: {e}")
-        return {"interval": "600"}
+    """Atomically replace the product list"""
+    product_store.save(products)
 
-def save_config(config):
-    """Save configuration to file"""
-    try:
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving config: {e}")
-        raise
-
-# Global session for API requests
-api_flaresolverr_session = None
-
-def ensure_api_session():
-    """Ensure FlareSolverr session exists for API requests"""
-    global api_flaresolverr_session
-    if not api_flaresolverr_session:
-        try:
-            payload = {
-                "cmd": "sessions.create",
-                "session": "vaurioajoneuvo_api"
-            }
-            resp = requests.post(FLARESOLVERR_URL, json=payload, timeout=30)
-            if resp.ok and resp.json().get("status") == "ok":
-                api_flaresolverr_session = "vaurioajoneuvo_api"
-                print("[INFO] Created FlareSolverr session for API access")
-            else:
-                print(f"[WARNING] Failed to create FlareSolverr API session: {resp.text}")
-        except Exception as e:
-            print(f"[WARNING] Could not create FlareSolverr API session: {e}")
+# Longest /api/price waits for the site's rate limit before giving up
+PRICE_RATE_LIMIT_WAIT = 10
 
 def fetch_product_data(url):
-    ensure_api_session()
-    
-    payload = {
-        "cmd": "request.get",
-        "url": url,
-        "maxTimeout": 60000
-    }
-    
-    # Use session if available
-    if api_flaresolverr_session:
-        payload["session"] = api_flaresolverr_session
-        
     try:
-        resp = requests.post(FLARESOLVERR_URL, json=payload, timeout=70)
-        resp.raise_for_status()
-        html = resp.json()["solution"]["response"]
-    except Exception as e:
-        return {"error": f"Flaresolverr error: {e}"}
-    
-    # Check if we got a CAPTCHA page instead of the product page
-    if "captcha" in html.lower() or "recaptcha" in html.lower():
-        return {"error": "Website is showing CAPTCHA - automated access temporarily blocked"}
-        
-    soup = BeautifulSoup(html, "html.parser")
-    price_tag = soup.find("p", class_="price")
-    if not price_tag:
-        # Try alternative price selectors
-        price_tag = soup.find("span", class_="price") or soup.find("div", class_="price")
-        if not price_tag:
-            # Look for any element containing price-related text
-            price_elements = soup.find_all(text=lambda text: text and ("€" in text or "euro" in text.lower()))
-            if price_elements:
-                return {"error": f"Price element structure changed - found {len(price_elements)} price-like elements"}
-            else:
-                return {"error": "Price not found - page structure may have changed"}
-                
-    price = parse_price(price_tag.get_text(strip=True))
-    name_tag = soup.find("h1", class_="name")
-    name = name_tag.get_text(strip=True) if name_tag else url
-    return {"price": price, "name": name}
-
-def parse_price(price_str):
-    # Extract digits from price string, e.g. "3 000 €" -> 3000
-    import re
-    price = re.sub(r"[^0-9]", "", price_str)
-    return int(price) if price else 0
+        html = page_fetcher.fetch_html(url, max_wait=PRICE_RATE_LIMIT_WAIT)
+        return extract_and_record(get_extractor(), html, url)
+    except (FlareSolverrError, ExtractionError, RateLimitError, CircuitOpenError) as e:
+        return {"error": str(e)}
+
+def cached_price(url):
+    """Return (data, age_seconds) for a fresh price of url, or None.
+
+    The price cache only holds this worker's fetches (and the watcher's when
+    it leads from this process); other workers fall back to the watcher's
+    latest results, which the leader shares through LATEST_FILE.
+    """
+    cached = price_cache.get(url)
+    if cached:
+        return cached
+    result = watcher_service.latest().get(url)
+    if not result or result.get("price") is None or result.get("error") or not result.get("checked_at"):
+        return None
+    age = time.time() - result["checked_at"]
+    if age > price_cache.ttl:
+        return None
+    data = {"price": result["price"], "name": result["name"]}
+    price_cache.put(url, data, timestamp=result["checked_at"])
+    return data, age
+
+def history_window(args):
+    """Return (start, end, resolution) from history query parameters; raises ValueError"""
+    end = float(args["end"]) if args.get("end") else time.time()
+    if args.get("start"):
+        start = float(args["start"])
+    else:
+        start = end - parse_duration(args.get("range", HISTORY_DEFAULT_RANGE))
+    if not (math.isfinite(start) and math.isfinite(end) and start < end):
+        raise ValueError("start must be before end")
+    span = end - start
+    if args.get("resolution"):
+        resolution = parse_duration(args["resolution"])
+    else:
+        points = int(args.get("points", HISTORY_DEFAULT_POINTS))
+        if points <= 0:
+            raise ValueError("points must be positive")
+        resolution = span / points
+    # Coarser buckets rather than more than HISTORY_MAX_POINTS per product
+    resolution = max(resolution, span / HISTORY_MAX_POINTS, HISTORY_MIN_RESOLUTION)
+    return start, end, int(math.ceil(resolution))
+
+def format_buckets(buckets):
+    return [
+        {"t": t, "min": low, "max": high, "last": last, "count": count}
+        for t, low, high, last, count in buckets
+    ]
 
 # --- Authentication routes ---
 @main.route("/login", methods=["GET", "POST"])
@@ -194,93 +154,257 @@ def index():
 def api_get_products():
     return jsonify(load_products())
 
-@main.route("/api/products", methods=["POST"])
-@login_required
-@limiter.limit("20 per minute")
-def api_add_product():
-    data = request.json
+def validate_product_payload(data):
+    """Return (fields, None) for a valid add/update body, or (None, error response)"""
     if not data:
-        return jsonify({"error": "No data provided"}), 400
+        return None, (jsonify({"error": "No data provided"}), 400)
     
-    # Validate required fields
     url = data.get("url", "").strip()
     target_price = data.get("target_price")
     name = sanitize_string(data.get("name", ""))
     
     if not is_valid_url(url):
-        return jsonify({"error": "Invalid URL format"}), 400
+        return None, (jsonify({"error": "Invalid URL format"}), 400)
     
     if not is_valid_price(target_price):
-        return jsonify({"error": "Invalid target price"}), 400
+        return None, (jsonify({"error": "Invalid target price"}), 400)
     
     if name and not is_valid_name(name):
-        return jsonify({"error": "Invalid product name"}), 400
+        return None, (jsonify({"error": "Invalid product name"}), 400)
     
-    products = load_products()
-    
-    # Check for duplicate URLs
-    if any(p["url"] == url for p in products):
+    fields = {"url": url, "target_price": int(target_price), "name": name}
+    # Left out: an update keeps the product's priority; empty or null removes it
+    if "priority" in data:
+        priority = data["priority"]
+        if isinstance(priority, str):
+            priority = priority.strip()
+        if priority in (None, ""):
+            fields["priority"] = None
+        elif not is_valid_priority(priority):
+            return None, (jsonify({"error": "Invalid priority"}), 400)
+        else:
+            fields["priority"] = priority.lower()
+    return fields, None
+
+def update_product_at(products, position, fields):
+    """Apply validated fields to products[position] inside a transaction"""
+    # Check for duplicate URLs (excluding current product)
+    existing = product_store.find_by_url(fields["url"])
+    if existing and existing["id"] != products[position]["id"]:
         return jsonify({"error": "Product with this URL already exists"}), 400
+    old_url = products[position]["url"]
+    apply_fields(products[position], fields)
+    if products[position]["url"] != old_url:
+        price_cache.invalidate(old_url)
+    return jsonify({"success": True, "product": products[position]})
+
+@main.route("/api/products", methods=["POST"])
+@login_required
+@limiter.limit("20 per minute")
+def api_add_product():
+    fields, error = validate_product_payload(request.json)
+    if error:
+        return error
     
-    products.append({
-        "url": url,
-        "target_price": int(target_price),
-        "name": name
-    })
-    save_products(products)
-    return jsonify({"success": True})
+    with product_store.transaction() as products:
+        # Check for duplicate URLs
+        if product_store.find_by_url(fields["url"]):
+            return jsonify({"error": "Product with this URL already exists"}), 400
+        
+        product = apply_fields({"id": new_product_id()}, fields)
+        products.append(product)
+    return jsonify({"success": True, "id": product["id"]})
 
 @main.route("/api/products/<int:idx>", methods=["PUT"])
 @login_required
 @limiter.limit("20 per minute")
 def api_update_product(idx):
+    fields, error = validate_product_payload(request.json)
+    if error:
+        return error
+    
+    with product_store.transaction() as products:
+        if 0 <= idx < len(products):
+            return update_product_at(products, idx, fields)
+    return jsonify({"error": "Invalid index"}), 400
+
+@main.route("/api/products/<int:idx>", methods=["DELETE"])
+@login_required
+@limiter.limit("30 per minute")
+def api_delete_product(idx):
+    with product_store.transaction() as products:
+        if 0 <= idx < len(products):
+            removed = products.pop(idx)
+            price_cache.invalidate(removed["url"])
+            return jsonify({"success": True})
+    return jsonify({"error": "Invalid index"}), 400
+
+@main.route("/api/products/batch", methods=["POST"])
+@login_required
+@limiter.limit("20 per minute")
+def api_batch_products():
+    """Apply many insert/update/delete operations in one write.
+
+    Body: {"operations": [{"op": "update", "id": ..., "target_price": ...}, ...],
+    "atomic": true}. Atomic batches (the default) are saved only if every
+    operation succeeds; the response lists each operation's result.
+    """
     data = request.json
-    if not data:
-        return jsonify({"error": "No data provided"}), 400
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "No operations provided"}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({"error": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}), 400
     
-    # Validate input
-    url = data.get("url", "").strip()
-    target_price = data.get("target_price")
-    name = sanitize_string(data.get("name", ""))
+    before = {product["url"] for product in load_products()}
+    applied, results = apply_operations(product_store, operations, atomic=data.get("atomic", True) is not False)
+    # Cached prices of edited or deleted URLs are no longer wanted
+    for url in before - {product["url"] for product in load_products()}:
+        price_cache.invalidate(url)
+    body = {"success": all(r["success"] for r in results), "applied": applied, "results": results}
+    return jsonify(body), 200 if applied else 400
+
+@main.route("/api/products/import", methods=["POST"])
+@login_required
+@limiter.limit("5 per minute")
+def api_import_products():
+    """Bulk add products from a CSV or JSONL upload (multipart "file" or raw body).
+
+    Rows are validated and deduplicated by URL, then saved in one write.
+    ?update=1 updates the target price and name of already watched URLs
+    instead of skipping them, ?dry_run=1 only reports what would happen.
+    """
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    try:
+        fmt = detect_format(
+            request.args.get("format"),
+            upload.mimetype if upload else request.mimetype,
+            upload.filename if upload else None,
+        )
+        # Decoded line by line as the rows are read, not buffered whole
+        lines = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+        report = import_products(
+            product_store,
+            iter_rows(lines, fmt),
+            update=request.args.get("update") in ("1", "true", "yes"),
+            dry_run=request.args.get("dry_run") in ("1", "true", "yes"),
+        )
+    except ImportFormatError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"success": True, **report})
+
+@main.route("/api/products/export", methods=["GET"])
+@login_required
+@limiter.limit("10 per minute")
+def api_export_products():
+    """Download the watchlist as CSV (default) or JSONL, streamed in chunks"""
+    try:
+        fmt = detect_format(request.args.get("format", "csv"))
+    except ImportFormatError as e:
+        return jsonify({"error": str(e)}), 400
+    response = Response(stream_with_context(export_products(load_products(), fmt)), mimetype=MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename=products.{fmt}"
+    return response
+
+@main.route("/api/products/history", methods=["GET"])
+@login_required
+def api_products_history():
+    """Downsampled price history of several products (?ids=a,b; all by default).
+
+    Same window and resolution parameters as /api/products/<id>/history.
+    """
+    try:
+        start, end, resolution = history_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid history query: {e}"}), 400
     
-    if not is_valid_url(url):
-        return jsonify({"error": "Invalid URL format"}), 400
+    products = load_products()
+    unknown = []
+    if request.args.get("ids"):
+        by_id = {p["id"]: p for p in products}
+        ids = [i for i in request.args["ids"].split(",") if i]
+        unknown = [i for i in ids if i not in by_id]
+        products = [by_id[i] for i in ids if i in by_id]
     
-    if not is_valid_price(target_price):
-        return jsonify({"error": "Invalid target price"}), 400
+    history = history_store.aggregate([p["url"] for p in products], start, end, resolution)
+    return jsonify({
+        "start": start,
+        "end": end,
+        "resolution": resolution,
+        "products": [
+            {"id": p["id"], "url": p["url"], "buckets": format_buckets(history.get(p["url"], []))}
+            for p in products
+        ],
+        "unknown_ids": unknown,
+    })
+
+# Stable-id variants: unaffected by other products being added or removed
+@main.route("/api/products/<product_id>", methods=["GET"])
+@login_required
+def api_get_product_by_id(product_id):
+    product = product_store.get(product_id)
+    if product is None:
+        return jsonify({"error": "Product not found"}), 404
+    return jsonify(product)
+
+@main.route("/api/products/<product_id>/history", methods=["GET"])
+@login_required
+def api_product_history(product_id):
+    """Price history of one product, downsampled into time buckets.
+
+    ?start=&end= (unix seconds) or ?range=30d picks the window (default the
+    last 7 days); ?resolution=1h sets the bucket size, otherwise it is
+    chosen to give about ?points= buckets. Each bucket has min, max, last
+    price and the number of observations.
+    """
+    product = product_store.get(product_id)
+    if product is None:
+        return jsonify({"error": "Product not found"}), 404
+    try:
+        start, end, resolution = history_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid history query: {e}"}), 400
     
-    if name and not is_valid_name(name):
-        return jsonify({"error": "Invalid product name"}), 400
+    buckets = history_store.aggregate([product["url"]], start, end, resolution).get(product["url"], [])
+    return jsonify({
+        "id": product["id"],
+        "url": product["url"],
+        "start": start,
+        "end": end,
+        "resolution": resolution,
+        "buckets": format_buckets(buckets),
+    })
+
+@main.route("/api/products/<product_id>", methods=["PUT"])
+@login_required
+@limiter.limit("20 per minute")
+def api_update_product_by_id(product_id):
+    fields, error = validate_product_payload(request.json)
+    if error:
+        return error
     
-    products = load_products()
-    if 0 <= idx < len(products):
-        # Check for duplicate URLs (excluding current product)
-        if any(i != idx and p["url"] == url for i, p in enumerate(products)):
-            return jsonify({"error": "Product with this URL already exists"}), 400
-            
-        products[idx]["url"] = url
-        products[idx]["target_price"] = int(target_price)
-        products[idx]["name"] = name
-        save_products(products)
-        return jsonify({"success": True})
-    return jsonify({"error": "Invalid index"}), 400
+    with product_store.transaction() as products:
+        position = product_store.position(product_id)
+        if position is not None:
+            return update_product_at(products, position, fields)
+    return jsonify({"error": "Product not found"}), 404
 
-@main.route("/api/products/<int:idx>", methods=["DELETE"])
+@main.route("/api/products/<product_id>", methods=["DELETE"])
 @login_required
 @limiter.limit("30 per minute")
-def api_delete_product(idx):
-    products = load_products()
-    if 0 <= idx < len(products):
-        products.pop(idx)
-        save_products(products)
-        return jsonify({"success": True})
-    return jsonify({"error": "Invalid index"}), 400
+def api_delete_product_by_id(product_id):
+    with product_store.transaction() as products:
+        position = product_store.position(product_id)
+        if position is not None:
+            products.pop(position)
+            return jsonify({"success": True})
+    return jsonify({"error": "Product not found"}), 404
 
 @main.route("/api/interval", methods=["GET"])
 @login_required
 def api_get_interval():
-    config = load_config()
-    return jsonify({"interval": config.get("interval", "")})
+    return jsonify({"interval": config_store.get().interval})
 
 @main.route("/api/interval", methods=["PUT"])
 @login_required
@@ -294,9 +418,8 @@ def api_set_interval():
     if len(interval) > 50:  # Reasonable limit
         return jsonify({"error": "Interval string too long"}), 400
     
-    config = load_config()
-    config["interval"] = interval
-    save_config(config)
+    # Also reschedules the running watcher's next check right away
+    config_store.update(interval=interval)
     return jsonify({"success": True})
 
 @main.route("/api/telegram", methods=["GET"])
@@ -321,15 +444,13 @@ def api_set_telegram():
     token = sanitize_string(data.get("token", ""))
     chat_id = sanitize_string(data.get("chat_id", ""))
     
-    config = load_config()
-    config["telegram_token"] = token
-    config["telegram_chat_id"] = chat_id
-    save_config(config)
+    config_store.update(telegram_token=token, telegram_chat_id=chat_id)
     return jsonify({"success": True, "warning": "Consider using environment variables for production"})
 
 @main.route("/api/price", methods=["POST"])
 @login_required
-@limiter.limit("10 per minute")  # More restrictive as this makes external requests
+# More restrictive as this makes external requests; cache hits are not counted
+@limiter.limit("10 per minute", deduct_when=lambda response: response.headers.get("X-Price-Cache") != "hit")
 def api_get_price():
     data = request.json
     if not data:
@@ -338,31 +459,113 @@ def api_get_price():
     url = data.get("url", "").strip()
     if not is_valid_url(url):
         return jsonify({"error": "Invalid URL format"}), 400
+    
+    # Serve the watcher's (or a previous request's) result while it is fresh
+    cached = None if data.get("refresh") else cached_price(url)
+    if cached:
+        result, age = cached
+        result.update(cached=True, age=round(age, 1))
+        response = jsonify(result)
+        response.headers["X-Price-Cache"] = "hit"
+        return response
         
     try:
         result = fetch_product_data(url)
+        if "error" not in result:
+            price_cache.put(url, result)
+            result.update(cached=False, age=0)
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@main.route("/api/prices", methods=["GET"])
+@login_required
+def api_get_prices():
+    """Latest known price of every product, from watcher results only (no fetching)"""
+    products = load_products()
+    latest = watcher_service.latest()
+    now = time.time()
+    prices = []
+    for product in products:
+        url = product["url"]
+        result = latest.get(url)
+        if result is None:
+            # Checked on demand through /api/price but not yet by the watcher
+            cached = price_cache.get(url)
+            if cached:
+                data, age = cached
+                result = {"price": data["price"], "name": data["name"], "error": None, "checked_at": now - age}
+        entry = {"id": product["id"], "url": url, "price": None, "name": None, "error": None, "checked_at": None, "age": None}
+        if result:
+            entry.update(result)
+            entry["age"] = round(now - result["checked_at"], 1)
+        entry["below_target"] = entry["price"] is not None and entry["price"] < product["target_price"]
+        prices.append(entry)
+    return jsonify({"prices": prices})
+
 @main.route("/api/watcher/start", methods=["POST"])
 @login_required
 @limiter.limit("10 per minute")
 def api_start_watcher():
-    success, message = watcher_service.start()
+    success, message = watcher_leader.start()
     return jsonify({"success": success, "message": message})
 
 @main.route("/api/watcher/stop", methods=["POST"])
 @login_required
 @limiter.limit("10 per minute")
 def api_stop_watcher():
-    success, message = watcher_service.stop()
+    success, message = watcher_leader.stop()
+    return jsonify({"success": success, "message": message})
+
+@main.route("/api/watcher/check", methods=["POST"])
+@login_required
+@limiter.limit("10 per minute")
+def api_check_now():
+    """Check every product right away, or only the one given as {"id": ...}"""
+    data = request.get_json(silent=True) or {}
+    product_id = data.get("id")
+    if product_id is not None and not isinstance(product_id, str):
+        return jsonify({"error": "Invalid product id"}), 400
+    success, message = watcher_leader.check_now(product_id)
     return jsonify({"success": success, "message": message})
 
 @main.route("/api/watcher/status", methods=["GET"])
 @login_required
 def api_watcher_status():
-    return jsonify(watcher_service.status())
+    return jsonify(watcher_leader.status())
+
+@main.route("/api/watcher/events", methods=["GET"])
+@login_required
+@limiter.exempt  # EventSource reconnects every EVENT_STREAM_SECONDS
+def api_watcher_events():
+    """Server-sent events stream of watcher results.
+
+    Each stream ends after EVENT_STREAM_SECONDS so it only holds a gthread
+    worker thread for a bounded time; the browser reconnects on its own and
+    resumes from Last-Event-ID without missing events.
+    """
+    last_id = request.headers.get("Last-Event-ID", request.args.get("last_id", ""))
+    cursor = event_bus.cursor(int(last_id) if last_id.isdigit() else None)
+
+    def stream():
+        deadline = time.time() + EVENT_STREAM_SECONDS
+        last_sent = time.time()
+        yield f"retry: {EVENT_RETRY_MS}\n\n"
+        while time.time() < deadline:
+            events = cursor.poll(timeout=1.0)
+            for event in events:
+                yield format_sse(event)
+            if events:
+                last_sent = time.time()
+            elif time.time() - last_sent >= EVENT_KEEPALIVE_SECONDS:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                last_sent = time.time()
+
+    response = Response(stream_with_context(stream()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 @main.route("/api/notifications", methods=["GET"])
 @login_required
@@ -370,10 +573,9 @@ def api_watcher_status():
 def api_get_notifications():
     """Get notification settings"""
     try:
-        config = load_config()
         return jsonify({
             "success": True,
-            "notification_mode": config.get("notification_mode", "below_target")
+            "notification_mode": config_store.get().notification_mode
         })
     except Exception as e:
         return jsonify({"error": f"Failed to load notification settings: {str(e)}"}), 500
@@ -389,14 +591,10 @@ def api_set_notifications():
             return jsonify({"error": "No data provided"}), 400
             
         mode = data.get("notification_mode", "").strip()
-        valid_modes = ["any_change", "below_target", "both", "none"]
-        
-        if mode not in valid_modes:
-            return jsonify({"error": f"Invalid notification mode. Must be one of: {', '.join(valid_modes)}"}), 400
+        if mode not in NOTIFICATION_MODES:
+            return jsonify({"error": f"Invalid notification mode. Must be one of: {', '.join(NOTIFICATION_MODES)}"}), 400
         
-        config = load_config()
-        config["notification_mode"] = mode
-        save_config(config)
+        config_store.update(notification_mode=mode)
         
         return jsonify({"success": True, "message": "Notification settings updated"})
         
@@ -0,0 +1,220 @@
+# app/scheduler.py
+import heapq
+import itertools
+import threading
+
+# Interval multiplier per user-set product priority (validators.PRIORITIES)
+PRIORITY_WEIGHTS = {"low": 0.5, "normal": 1.0, "high": 2.0}
+
+# (price distance from target as a share of the target, weight): listings
+# priced close to their target are checked more often than far-off ones
+DISTANCE_WEIGHTS = ((0.05, 4.0), (0.25, 2.0), (1.0, 1.0))
+FAR_WEIGHT = 0.5
+
+# Weight of a listing whose price changed within RECENT_CHANGE seconds
+CHANGE_WEIGHT = 2.0
+RECENT_CHANGE = 24 * 3600
+
+# Per-product intervals stay within these multiples of the configured
+# interval, and never go below MIN_INTERVAL seconds
+MIN_INTERVAL_FACTOR = 0.25
+MAX_INTERVAL_FACTOR = 4.0
+MIN_INTERVAL = 30
+
+# Seconds between watchlist re-reads while the watcher waits for the next
+# due product, so products added by another process are checked within
+# seconds; writes from the watcher's own process wake it at once
+WATCHLIST_POLL = 5
+
+
+def product_priority(item, price, last_change=None, now=None):
+    """Check priority of a product; 1.0 is the configured interval, 2.0 twice as often.
+
+    Combines the user-set priority, how close the last price is to the
+    target (from either side) and whether the price changed recently.
+    """
+    priority = PRIORITY_WEIGHTS.get(item.get("priority") or "normal", 1.0)
+    if price is not None and item.get("target_price"):
+        distance = abs(price - item["target_price"]) / item["target_price"]
+        priority *= next((weight for limit, weight in DISTANCE_WEIGHTS if distance <= limit), FAR_WEIGHT)
+    if last_change is not None and now is not None and now - last_change <= RECENT_CHANGE:
+        priority *= CHANGE_WEIGHT
+    return priority
+
+
+def scaled_interval(base, priority):
+    """Interval in seconds for a product of this priority, base being the configured one"""
+    factor = min(max(1 / priority, MIN_INTERVAL_FACTOR), MAX_INTERVAL_FACTOR)
+    return max(base * factor, MIN_INTERVAL)
+
+
+# Adaptive scheduling aims for this many checks per expected price change.
+# Rates are smoothed with a prior of PRIOR_CHANGES per PRIOR_SPAN seconds,
+# so a listing with little history starts out as if it changed every four
+# days and a day of observations already moves its estimate
+CHECKS_PER_CHANGE = 4
+PRIOR_CHANGES = 0.25
+PRIOR_SPAN = 24 * 3600
+
+
+def change_rate(changes, span):
+    """Smoothed price changes per second from changes seen over span seconds"""
+    return (changes + PRIOR_CHANGES) / (max(span, 0) + PRIOR_SPAN)
+
+
+def adaptive_intervals(rates, weights, min_interval, max_interval, budget=None):
+    """Check intervals from change rates, within bounds and an hourly fetch budget.
+
+    rates maps keys to changes per second and weights to a priority
+    multiplier. Each interval is 1 / (rate * CHECKS_PER_CHANGE * weight),
+    clamped to [min_interval, max_interval]. When the resulting checks
+    would exceed budget fetches per hour, every interval is stretched by
+    the same factor, past max_interval if need be. Returns
+    ({key: interval}, stretch factor).
+    """
+    intervals = {}
+    for key, rate in rates.items():
+        interval = 1 / (rate * CHECKS_PER_CHANGE * weights.get(key, 1.0))
+        intervals[key] = min(max(interval, min_interval), max_interval)
+    stretch = 1.0
+    if budget and intervals:
+        demand = sum(3600 / interval for interval in intervals.values())
+        if demand > budget:
+            stretch = demand / budget
+            intervals = {key: interval * stretch for key, interval in intervals.items()}
+    return intervals, stretch
+
+
+class CheckScheduler:
+    """Heap of watched products ordered by next due time, then priority.
+
+    Products are keyed by id. sync() follows the watchlist (new products
+    are due at once, removed ones are dropped lazily from the heap),
+    pop_due() hands out the products to check now in dispatch order, and
+    schedule() puts a checked product back with its next due time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []  # (due, -priority, seq, product id); stale when seq no longer matches
+        self._entries = {}  # product id -> {"item", "due", "priority", "interval", "checked_at", "seq"}
+        self._seq = itertools.count()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._heap = []
+            self._entries = {}
+
+    def sync(self, products, now):
+        """Match the scheduled products to the current watchlist"""
+        with self._lock:
+            current = {item["id"]: item for item in products if item.get("id")}
+            for product_id in list(self._entries):
+                if product_id not in current:
+                    del self._entries[product_id]
+            for product_id, item in current.items():
+                entry = self._entries.get(product_id)
+                if entry is None:
+                    self._push(product_id, {"item": item, "checked_at": None, "interval": None}, now, 1.0)
+                else:
+                    entry["item"] = item
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                self._compact()
+
+    def pop_due(self, now):
+        """Remove and return the products due at now, most overdue and then highest priority first"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, seq, product_id = heapq.heappop(self._heap)
+                entry = self._entries.get(product_id)
+                if entry is None or entry["seq"] != seq:
+                    continue
+                entry["due"] = None  # In flight until schedule()
+                entry["seq"] = None
+                due.append(entry["item"])
+        return due
+
+    def schedule(self, item, checked_at, interval, priority):
+        """Put a checked product back, due interval seconds after checked_at"""
+        with self._lock:
+            entry = self._entries.get(item.get("id"))
+            if entry is None:
+                return  # Removed from the watchlist while it was being checked
+            entry["checked_at"] = checked_at
+            entry["interval"] = interval
+            self._push(item["id"], entry, checked_at + interval, priority)
+
+    def reschedule(self, plan):
+        """Recompute every waiting product's due time with plan(entry) -> (interval, priority)"""
+        with self._lock:
+            for product_id, entry in self._entries.items():
+                if entry["due"] is None or entry["checked_at"] is None:
+                    continue
+                interval, priority = plan(entry)
+                entry["interval"] = interval
+                self._push(product_id, entry, entry["checked_at"] + interval, priority)
+            self._compact()
+
+    def expedite(self, now, product_ids=None):
+        """Make the given products (default: all) due at now; returns how many are due or in flight"""
+        with self._lock:
+            count = 0
+            for product_id, entry in self._entries.items():
+                if product_ids is not None and product_id not in product_ids:
+                    continue
+                count += 1
+                if entry["due"] is not None and entry["due"] > now:
+                    self._push(product_id, entry, now, entry["priority"])
+            return count
+
+    def planned_per_hour(self):
+        """Checks per hour the current intervals add up to"""
+        with self._lock:
+            return sum(3600 / e["interval"] for e in self._entries.values() if e["interval"])
+
+    def next_due(self):
+        """Due time of the first waiting product, or None"""
+        with self._lock:
+            while self._heap:
+                _, _, seq, product_id = self._heap[0]
+                entry = self._entries.get(product_id)
+                if entry is not None and entry["seq"] == seq:
+                    return self._heap[0][0]
+                heapq.heappop(self._heap)
+            return None
+
+    def upcoming(self, limit=10):
+        """The next limit waiting products as dicts, in dispatch order"""
+        with self._lock:
+            live = (e for e in self._heap if e[3] in self._entries and self._entries[e[3]]["seq"] == e[2])
+            rows = []
+            for due, negative_priority, _, product_id in heapq.nsmallest(limit, live):
+                entry = self._entries[product_id]
+                rows.append({
+                    "id": product_id,
+                    "url": entry["item"]["url"],
+                    "name": entry["item"].get("name") or "",
+                    "due": due,
+                    "priority": round(-negative_priority, 2),
+                    "interval": entry["interval"],
+                })
+            return rows
+
+    def _push(self, product_id, entry, due, priority):
+        seq = next(self._seq)
+        entry.update(due=due, priority=priority, seq=seq)
+        self._entries[product_id] = entry
+        heapq.heappush(self._heap, (due, -priority, seq, product_id))
+
+    def _compact(self):
+        """Drop stale heap entries left behind by reschedules and removals"""
+        self._heap = [
+            e for e in self._heap
+            if e[3] in self._entries and self._entries[e[3]]["seq"] == e[2]
+        ]
+        heapq.heapify(self._heap)
@@ -0,0 +1,234 @@
+# app/snapshot_archive.py
+import hashlib
+import logging
+import lzma
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# Opt-in archive of fetched listing HTML: set SNAPSHOT_ARCHIVE to a database
+# path (e.g. watcher/snapshots.db) to enable it. Pages are stored compressed
+# with SNAPSHOT_COMPRESSION ("zlib" or "lzma"), once per distinct content,
+# and the least recently seen ones are evicted above SNAPSHOT_ARCHIVE_MAX_MB
+SNAPSHOT_ARCHIVE = os.environ.get('SNAPSHOT_ARCHIVE', '').strip()
+SNAPSHOT_COMPRESSION = os.environ.get('SNAPSHOT_COMPRESSION', 'zlib').strip().lower()
+SNAPSHOT_ARCHIVE_MAX_MB = float(os.environ.get('SNAPSHOT_ARCHIVE_MAX_MB', '200'))
+
+CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+# Snapshots removed per eviction query once the archive is over its cap
+EVICT_BATCH = 50
+
+SCHEMA = """
+-- One row per distinct page content, keyed by its digest
+CREATE TABLE IF NOT EXISTS snapshots (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_last_seen ON snapshots (last_seen);
+-- Which URL served which content, and what extracting it gave
+CREATE TABLE IF NOT EXISTS captures (
+    url TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES snapshots(hash),
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    hits INTEGER NOT NULL,
+    error TEXT,
+    PRIMARY KEY (url, hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS captures_hash ON captures (hash);
+"""
+
+logger = logging.getLogger('watcher')
+
+
+def content_hash(data):
+    """Digest identifying a page's exact bytes"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class SnapshotArchive:
+    """Compressed, deduplicated store of fetched listing pages in SQLite.
+
+    record() is called with every page the watcher fetches and the error
+    its extraction raised, if any. Content already archived only has its
+    last_seen time bumped, so an unchanged page costs a hash and one small
+    write; new content is compressed and, when the archive grows past
+    max_bytes, the least recently seen snapshots are evicted.
+    Every thread gets its own connection, as in HistoryStore.
+    """
+
+    def __init__(self, path=SNAPSHOT_ARCHIVE, codec=SNAPSHOT_COMPRESSION, max_bytes=SNAPSHOT_ARCHIVE_MAX_MB * 1024 * 1024):
+        if codec not in CODECS:
+            logger.warning(f"Unknown snapshot compression {codec!r}, using zlib")
+            codec = "zlib"
+        self.path = path
+        self.codec = codec
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._initialized = False
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def record(self, url, html, error=None, now=None):
+        """Archive html as fetched from url; returns its content hash, or None when disabled"""
+        if not self.enabled:
+            return None
+        now = time.time() if now is None else now
+        data = html.encode("utf-8", "surrogatepass")
+        digest = content_hash(data)
+        error = str(error) if error is not None else None
+        conn = self._connect()
+        with conn:
+            known = conn.execute("UPDATE snapshots SET last_seen = ? WHERE hash = ?", (now, digest)).rowcount
+            if not known:
+                compressed = CODECS[self.codec][0](data)
+                conn.execute(
+                    "INSERT INTO snapshots (hash, codec, size, stored, data, last_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, self.codec, len(data), len(compressed), compressed, now),
+                )
+            conn.execute(
+                "INSERT INTO captures (url, hash, first_seen, last_seen, hits, error) VALUES (?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT(url, hash) DO UPDATE SET last_seen = excluded.last_seen, hits = hits + 1, "
+                "error = excluded.error",
+                (url, digest, now, now, error),
+            )
+            if not known:
+                self._evict(conn, keep=digest)
+        return digest
+
+    def _evict(self, conn, keep):
+        """Drop least recently seen snapshots until the archive fits max_bytes; call inside a transaction"""
+        total = conn.execute("SELECT COALESCE(SUM(stored), 0) FROM snapshots").fetchone()[0]
+        while total > self.max_bytes:
+            victims = conn.execute(
+                "SELECT hash, stored FROM snapshots WHERE hash != ? ORDER BY last_seen LIMIT ?",
+                (keep, EVICT_BATCH),
+            ).fetchall()
+            if not victims:
+                return
+            removed = []
+            for digest, stored in victims:
+                if total <= self.max_bytes:
+                    break
+                removed.append((digest,))
+                total -= stored
+            conn.executemany("DELETE FROM captures WHERE hash = ?", removed)
+            conn.executemany("DELETE FROM snapshots WHERE hash = ?", removed)
+
+    def captures(self, url=None, failed_only=False):
+        """Return capture dicts (url, hash, first_seen, last_seen, hits, error), newest first"""
+        if not self.enabled:
+            return []
+        query = "SELECT url, hash, first_seen, last_seen, hits, error FROM captures WHERE 1 = 1"
+        params = []
+        if url:
+            query += " AND url = ?"
+            params.append(url)
+        if failed_only:
+            query += " AND error IS NOT NULL"
+        rows = self._connect().execute(query + " ORDER BY last_seen DESC", params).fetchall()
+        keys = ("url", "hash", "first_seen", "last_seen", "hits", "error")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def load(self, digest):
+        """Return the archived HTML with this content hash, or None"""
+        if not self.enabled:
+            return None
+        row = self._connect().execute("SELECT codec, data FROM snapshots WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        codec, data = row
+        return CODECS[codec][1](data).decode("utf-8", "surrogatepass")
+
+    def stats(self):
+        """Snapshot and capture counts with raw and stored sizes in bytes"""
+        if not self.enabled:
+            return {"enabled": False}
+        conn = self._connect()
+        snapshots, size, stored, codecs = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored), 0), GROUP_CONCAT(DISTINCT codec) "
+            "FROM snapshots"
+        ).fetchone()
+        captures = conn.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+        return {
+            "enabled": True,
+            "codec": self.codec,
+            "stored_codecs": sorted((codecs or "").split(",")) if codecs else [],
+            "snapshots": snapshots,
+            "captures": captures,
+            "size": size,
+            "stored": stored,
+            "max_bytes": int(self.max_bytes),
+        }
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def extract_and_record(extractor, html, url, archive=None):
+    """Run extractor.extract(html, url) and archive the page with the outcome.
+
+    Archive failures are logged and never affect the extraction result.
+    """
+    archive = archive or snapshot_archive
+    if not archive.enabled:
+        return extractor.extract(html, url)
+    error = None
+    try:
+        return extractor.extract(html, url)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _record_quietly(archive, url, html, error)
+
+
+def archive_unparsed(html, url, archive=None):
+    """Archive a page whose parsing was skipped because it matched the last parsed one.
+
+    Keeps last_seen current for pages that are still watched and unchanged,
+    so eviction does not mistake them for stale ones.
+    """
+    archive = archive or snapshot_archive
+    if archive.enabled:
+        _record_quietly(archive, url, html, None)
+
+
+def _record_quietly(archive, url, html, error):
+    try:
+        archive.record(url, html, error)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Could not archive snapshot of {url}: {e}")
+
+
+# Shared archive written by the watcher, the web API and the CLI; disabled unless SNAPSHOT_ARCHIVE is set
+snapshot_archive = SnapshotArchive()
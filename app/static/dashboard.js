@@ -38,8 +38,10 @@ async function addProduct(product) {
   await refreshProducts();
 }
 
-async function updateProduct(idx, product) {
-  await fetchJSON(`/api/products/${idx}`, {
+// Products are addressed by their stable id, so an edit can't hit the wrong
+// product if the list changed since it was rendered
+async function updateProduct(id, product) {
+  await fetchJSON(`/api/products/${encodeURIComponent(id)}`, {
     method: 'PUT',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(product)
@@ -47,11 +49,27 @@ async function updateProduct(idx, product) {
   await refreshProducts();
 }
 
-async function deleteProduct(idx) {
-  await fetchJSON(`/api/products/${idx}`, { method: 'DELETE' });
+async function deleteProduct(id) {
+  await fetchJSON(`/api/products/${encodeURIComponent(id)}`, { method: 'DELETE' });
   await refreshProducts();
 }
 
+// Many inserts/updates/deletes in one request and one write. Resolves with
+// the per-operation results, also when an atomic batch was rejected
+async function batchProducts(operations) {
+  const res = await fetch('/api/products/batch', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ operations })
+  });
+  const data = await res.json().catch(() => null);
+  if (!data || !data.results) {
+    throw new Error((data && data.error) || `HTTP ${res.status}: ${res.statusText}`);
+  }
+  if (data.applied) await refreshProducts();
+  return data;
+}
+
 // Interval management
 async function loadInterval() {
   const data = await fetchJSON('/api/interval');
@@ -126,9 +144,18 @@ document.addEventListener('DOMContentLoaded', () => {
   const watcherStatus = document.getElementById('watcher-status');
   const startWatcherBtn = document.getElementById('start-watcher-btn');
   const stopWatcherBtn = document.getElementById('stop-watcher-btn');
+  const checkNowBtn = document.getElementById('check-now-btn');
   const mainWatcherStatus = document.getElementById('main-watcher-status');
+  const bulkSelectAll = document.getElementById('bulk-select-all');
+  const bulkCount = document.getElementById('bulk-count');
+  const bulkTargetPrice = document.getElementById('bulk-target-price');
+  const bulkSetTargetBtn = document.getElementById('bulk-set-target-btn');
+  const bulkDeleteBtn = document.getElementById('bulk-delete-btn');
 
-  let editingIdx = null;
+  let editingId = null;
+  const productCards = new Map(); // url -> { li, product, res } for in-place updates
+  let liveEvents = null; // EventSource while the watcher event stream is connected
+  const selectedIds = new Set(); // Product ids ticked for bulk actions, kept across re-renders
 
   // Show loading state
   function showLoading(element, message = 'Loading...') {
@@ -182,6 +209,12 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
+  // Format the age of a cached price, e.g. "checked 4m ago"
+  function formatAge(seconds) {
+    if (seconds < 60) return 'checked just now';
+    return `checked ${formatCountdown(Math.round(seconds))} ago`;
+  }
+
   // Add CSS animations
   const style = document.createElement('style');
   style.textContent = `
@@ -196,22 +229,63 @@ document.addEventListener('DOMContentLoaded', () => {
   `;
   document.head.appendChild(style);
 
-  // Render products with live prices
+  // Show a product's price (from /api/prices, /api/price or a live event) on its card
+  function renderPrice(li, product, res, notify = true) {
+    const card = productCards.get(product.url);
+    if (card) card.res = res;
+    const lastSpan = li.querySelector('.product-last');
+    if (res.price === null || res.price === undefined) {
+      lastSpan.innerHTML = res.error
+        ? '<span class="error">✗ Unable to fetch price</span>'
+        : '<span class="loading">⏳ Not checked yet</span>';
+      return;
+    }
+    const currentPrice = res.price;
+    const isBelowTarget = currentPrice < product.target_price;
+    const age = res.age !== null && res.age !== undefined
+      ? `<small class="price-age">${formatAge(res.age)}</small>`
+      : '';
+    lastSpan.innerHTML = `
+      <span class="price-indicator ${isBelowTarget ? 'below-target' : 'above-target'}">
+        €${currentPrice.toLocaleString()}
+      </span>
+      ${age}
+      ${res.error ? '<small class="error">✗ last check failed</small>' : ''}
+    `;
+    
+    // Add visual indicator to card
+    li.classList.toggle('price-alert', isBelowTarget);
+    if (isBelowTarget && notify) {
+      showNotification(`${product.name || 'Product'} dropped below target price: €${currentPrice}!`);
+    }
+  }
+
+  // Render products with the latest prices known to the watcher
   async function renderProducts() {
     showLoading(productList, 'Loading products...');
     
     try {
-      const products = await fetchJSON('/api/products');
+      // One request for all prices instead of one /api/price call per card
+      const [products, latest] = await Promise.all([
+        fetchJSON('/api/products'),
+        fetchJSON('/api/prices').catch(() => ({ prices: [] }))
+      ]);
+      const pricesByUrl = new Map(latest.prices.map(p => [p.url, p]));
       productList.innerHTML = '';
+      productCards.clear();
+      const productIds = new Set(products.map(p => p.id));
+      for (const id of [...selectedIds]) {
+        if (!productIds.has(id)) selectedIds.delete(id);
+      }
+      updateBulkActions();
       
       if (!products.length) {
         productList.innerHTML = '<div style="text-align:center;padding:3rem;color:#a0aec0;"><h3>No products being watched</h3><p>Add your first product below to get started!</p></div>';
         return;
       }
       
-      // Process products sequentially to avoid race conditions
-      for (let idx = 0; idx < products.length; idx++) {
-        const product = products[idx];
+      const unchecked = [];
+      for (const product of products) {
         const node = productTemplate.content.cloneNode(true);
         const li = node.querySelector('li');
         li.querySelector('.product-name').textContent = product.name || 'Unnamed Product';
@@ -222,15 +296,26 @@ document.addEventListener('DOMContentLoaded', () => {
         link.href = product.url;
         link.textContent = 'View Listing';
         
-        // Add the product to DOM immediately so it's visible
+        // Multi-select for the bulk actions toolbar
+        const checkbox = li.querySelector('.product-select');
+        checkbox.checked = selectedIds.has(product.id);
+        li.classList.toggle('selected', checkbox.checked);
+        checkbox.onchange = () => {
+          if (checkbox.checked) selectedIds.add(product.id);
+          else selectedIds.delete(product.id);
+          li.classList.toggle('selected', checkbox.checked);
+          updateBulkActions();
+        };
+        
         productList.appendChild(node);
+        productCards.set(product.url, { li, product, res: null });
         
         // Setup edit/delete handlers
         li.querySelector('.edit-btn').onclick = () => {
           addProductForm.url.value = product.url;
           addProductForm.target_price.value = product.target_price;
           addProductForm.name.value = product.name || '';
-          editingIdx = idx;
+          editingId = product.id;
           const submitBtn = addProductForm.querySelector('.add-btn');
           const btnText = submitBtn.querySelector('.btn-text');
           const btnIcon = submitBtn.querySelector('.btn-icon');
@@ -248,7 +333,7 @@ document.addEventListener('DOMContentLoaded', () => {
           const productName = product.name || 'this product';
           if (confirm(`Are you sure you want to remove "${productName}"?\n\nThis action cannot be undone.`)) {
             try {
-              await deleteProduct(idx);
+              await deleteProduct(product.id);
               showNotification(`Removed ${productName}`);
             } catch (error) {
               showNotification('Failed to remove product', 'error');
@@ -256,47 +341,153 @@ document.addEventListener('DOMContentLoaded', () => {
           }
         };
         
-        // Fetch live price asynchronously (doesn't block product display)
-        const lastSpan = li.querySelector('.product-last');
-        lastSpan.innerHTML = '<span class="loading">⏳ Checking price...</span>';
-        
-        // Use setTimeout to make price fetching non-blocking
-        setTimeout(async () => {
-          try {
-            const res = await fetchJSON('/api/price', {
-              method: 'POST',
-              headers: { 'Content-Type': 'application/json' },
-              body: JSON.stringify({ url: product.url })
-            });
-            
-            if (res.error) {
-              lastSpan.innerHTML = '<span class="error">✗ Unable to fetch price</span>';
-            } else {
-              const currentPrice = res.price;
-              const isBelowTarget = currentPrice < product.target_price;  // Changed from <= to <
-              
-              lastSpan.innerHTML = `
-                <span class="price-indicator ${isBelowTarget ? 'below-target' : 'above-target'}">
-                  €${currentPrice.toLocaleString()}
-                </span>
-              `;
-              
-              // Add visual indicator to card
-              if (isBelowTarget) {
-                li.classList.add('price-alert');
-                showNotification(`${product.name || 'Product'} dropped below target price: €${currentPrice}!`);
-              }
-            }
-          } catch (error) {
-            lastSpan.innerHTML = '<span class="error">✗ Connection failed</span>';
-          }
-        }, idx * 1000); // Stagger price checks to avoid overwhelming FlareSolverr
+        const res = pricesByUrl.get(product.url);
+        if (res && (res.price !== null || res.error)) {
+          renderPrice(li, product, res);
+        } else {
+          li.querySelector('.product-last').innerHTML = '<span class="loading">⏳ Checking price...</span>';
+          unchecked.push([li, product]);
+        }
+      }
+      updateBulkActions();
+      
+      // Products the watcher has not seen yet (e.g. just added) are fetched
+      // one at a time so FlareSolverr is not flooded
+      for (const [li, product] of unchecked) {
+        try {
+          const res = await fetchJSON('/api/price', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ url: product.url })
+          });
+          renderPrice(li, product, res.error ? { price: null, error: res.error } : res);
+        } catch (error) {
+          li.querySelector('.product-last').innerHTML = '<span class="error">✗ Connection failed</span>';
+        }
       }
     } catch (error) {
       showError(productList, 'Failed to load products. Please refresh the page.');
     }
   }
 
+  // Bulk actions on the selected products, each a single /api/products/batch call
+  function updateBulkActions() {
+    const count = selectedIds.size;
+    bulkCount.textContent = `${count} selected`;
+    bulkSetTargetBtn.disabled = count === 0;
+    bulkDeleteBtn.disabled = count === 0;
+    bulkSelectAll.checked = count > 0 && count === productCards.size;
+    bulkSelectAll.indeterminate = count > 0 && count < productCards.size;
+  }
+  
+  bulkSelectAll.onchange = () => {
+    for (const { li, product } of productCards.values()) {
+      if (bulkSelectAll.checked) selectedIds.add(product.id);
+      else selectedIds.delete(product.id);
+      li.querySelector('.product-select').checked = bulkSelectAll.checked;
+      li.classList.toggle('selected', bulkSelectAll.checked);
+    }
+    updateBulkActions();
+  };
+  
+  async function runBulkAction(button, operations, successMessage) {
+    button.disabled = true;
+    try {
+      const data = await batchProducts(operations);
+      if (data.applied) {
+        showNotification(successMessage);
+      } else {
+        const failed = data.results.find(r => !r.success);
+        showNotification(`Nothing changed: ${failed ? failed.error : 'batch rejected'}`, 'error');
+      }
+      return data.applied;
+    } catch (error) {
+      showNotification(`Bulk action failed: ${error.message}`, 'error');
+      return false;
+    } finally {
+      updateBulkActions();
+    }
+  }
+  
+  bulkSetTargetBtn.onclick = async () => {
+    const targetPrice = parseFloat(bulkTargetPrice.value);
+    if (!targetPrice || targetPrice <= 0) {
+      showNotification('Enter a valid target price', 'error');
+      return;
+    }
+    const ids = [...selectedIds];
+    const operations = ids.map(id => ({ op: 'update', id, target_price: targetPrice }));
+    if (await runBulkAction(bulkSetTargetBtn, operations, `Set target price of ${ids.length} products to €${targetPrice}`)) {
+      bulkTargetPrice.value = '';
+    }
+  };
+  
+  bulkDeleteBtn.onclick = async () => {
+    const ids = [...selectedIds];
+    if (!confirm(`Are you sure you want to remove ${ids.length} products?\n\nThis action cannot be undone.`)) {
+      return;
+    }
+    const operations = ids.map(id => ({ op: 'delete', id }));
+    if (await runBulkAction(bulkDeleteBtn, operations, `Removed ${ids.length} products`)) {
+      selectedIds.clear();
+      updateBulkActions();
+    }
+  };
+
+  // Live watcher results: update cards in place instead of re-rendering on a timer
+  function subscribeWatcherEvents() {
+    if (!window.EventSource) return;
+    liveEvents = new EventSource('/api/watcher/events');
+    
+    liveEvents.addEventListener('price', e => {
+      const data = JSON.parse(e.data);
+      const card = productCards.get(data.url);
+      if (card) {
+        // Alerts arrive as their own event, so don't notify twice
+        renderPrice(card.li, card.product, { price: data.price, age: 0, error: null }, false);
+      }
+    });
+    
+    liveEvents.addEventListener('check_error', e => {
+      const data = JSON.parse(e.data);
+      const card = productCards.get(data.url);
+      if (card) {
+        renderPrice(card.li, card.product, { ...(card.res || { price: null }), error: data.error }, false);
+      }
+    });
+    
+    liveEvents.addEventListener('alert', e => {
+      const data = JSON.parse(e.data);
+      const card = productCards.get(data.url);
+      const name = card ? (card.product.name || 'Product') : 'Product';
+      showNotification(`${name}: ${data.message.split('\n')[0]}`);
+    });
+    
+    liveEvents.addEventListener('watcher', e => {
+      const data = JSON.parse(e.data);
+      if (data.next_check === undefined) {
+        // Started or stopped: the buttons and schedule come from the status route
+        renderWatcherStatus();
+        return;
+      }
+      // Scheduling passes are frequent; render them from the event itself
+      showWatcherStatus({
+        is_running: data.is_running,
+        countdown: Math.max(0, Math.floor(data.next_check - Date.now() / 1000)),
+        interval: data.interval
+      });
+    });
+    
+    liveEvents.onerror = () => {
+      // EventSource reconnects by itself (and resumes from the last event id);
+      // only give up and fall back to polling if the server refused the stream
+      if (liveEvents.readyState === EventSource.CLOSED) {
+        liveEvents = null;
+        setupAutoRefresh();
+      }
+    };
+  }
+
   // Add or edit product with better feedback
   addProductForm.onsubmit = async e => {
     e.preventDefault();
@@ -330,10 +521,10 @@ document.addEventListener('DOMContentLoaded', () => {
     try {
       const product = { url, target_price: targetPrice, name };
       
-      if (editingIdx !== null) {
-        await updateProduct(editingIdx, product);
+      if (editingId !== null) {
+        await updateProduct(editingId, product);
         showNotification(`Updated ${name || 'product'} successfully!`);
-        editingIdx = null;
+        editingId = null;
         btnText.textContent = 'Add Product';
         btnIcon.textContent = '+';
         submitBtn.style.background = 'linear-gradient(135deg, #2563eb, #3b82f6)';
@@ -347,7 +538,7 @@ document.addEventListener('DOMContentLoaded', () => {
       showNotification('Failed to save product. Please try again.', 'error');
     } finally {
       submitBtn.disabled = false;
-      if (editingIdx === null) {
+      if (editingId === null) {
         btnText.textContent = originalText;
         btnIcon.textContent = originalIcon;
       }
@@ -490,63 +681,67 @@ document.addEventListener('DOMContentLoaded', () => {
   // Watcher control functions
   async function renderWatcherStatus() {
     try {
-      const data = await fetchJSON('/api/watcher/status');
-      const isRunning = data.is_running;
-      
-      // Update main status indicator
+      showWatcherStatus(await fetchJSON('/api/watcher/status'));
+    } catch (error) {
       if (mainWatcherStatus) {
-        const statusDot = mainWatcherStatus.querySelector('.status-dot');
-        const statusText = mainWatcherStatus.querySelector('.status-text');
-        
-        if (isRunning) {
-          statusDot.className = 'status-dot running';
-          
-          // Show countdown if available
-          if (data.countdown !== undefined) {
-            const countdown = formatCountdown(data.countdown);
-            statusText.textContent = `Active (${countdown})`;
-          } else {
-            statusText.textContent = 'Watcher Active';
-          }
-        } else {
-          statusDot.className = 'status-dot stopped';
-          statusText.textContent = 'Watcher Stopped';
-        }
+        mainWatcherStatus.querySelector('.status-text').textContent = 'Status Unknown';
       }
-      
-      // Update settings page status
       if (watcherStatus) {
-        let statusHTML = `
-          <div><strong>Status:</strong> ${isRunning ? '<span class="success">Running</span>' : '<span class="error">Stopped</span>'}</div>
-        `;
+        watcherStatus.innerHTML = '<span class="error">Failed to load watcher status</span>';
+      }
+    }
+  }
+
+  function showWatcherStatus(data) {
+    const isRunning = data.is_running;
+    
+    // Update main status indicator
+    if (mainWatcherStatus) {
+      const statusDot = mainWatcherStatus.querySelector('.status-dot');
+      const statusText = mainWatcherStatus.querySelector('.status-text');
+      
+      if (isRunning) {
+        statusDot.className = 'status-dot running';
         
-        if (isRunning && data.countdown !== undefined) {
+        // Show countdown if available
+        if (data.countdown !== undefined) {
           const countdown = formatCountdown(data.countdown);
-          const intervalText = data.interval ? `${data.interval}s` : 'unknown';
-          statusHTML += `
-            <div style="margin-top: 0.5rem;"><strong>Next check in:</strong> <span class="countdown">${countdown}</span></div>
-            <div style="margin-top: 0.25rem; font-size: 0.85rem; color: #6b7280;">Interval: ${intervalText}</div>
-          `;
+          statusText.textContent = `Active (${countdown})`;
+        } else {
+          statusText.textContent = 'Watcher Active';
         }
-        
+      } else {
+        statusDot.className = 'status-dot stopped';
+        statusText.textContent = 'Watcher Stopped';
+      }
+    }
+    
+    // Update settings page status
+    if (watcherStatus) {
+      let statusHTML = `
+        <div><strong>Status:</strong> ${isRunning ? '<span class="success">Running</span>' : '<span class="error">Stopped</span>'}</div>
+      `;
+      
+      if (isRunning && data.countdown !== undefined) {
+        const countdown = formatCountdown(data.countdown);
+        const intervalText = data.interval ? `${data.interval}s` : 'unknown';
         statusHTML += `
-          <div style="margin-top: 0.5rem; font-size: 0.9rem; color: #6b7280;">
-            ${isRunning ? 'The watcher is actively monitoring your products and will send Telegram notifications when target prices are reached.' : 'The watcher is stopped. Products are not being monitored for price changes.'}
-          </div>
+          <div style="margin-top: 0.5rem;"><strong>Next check in:</strong> <span class="countdown">${countdown}</span></div>
+          <div style="margin-top: 0.25rem; font-size: 0.85rem; color: #6b7280;">Interval: ${intervalText}</div>
         `;
-        
-        watcherStatus.innerHTML = statusHTML;
-        
-        if (startWatcherBtn) startWatcherBtn.disabled = isRunning;
-        if (stopWatcherBtn) stopWatcherBtn.disabled = !isRunning;
-      }
-    } catch (error) {
-      if (mainWatcherStatus) {
-        mainWatcherStatus.querySelector('.status-text').textContent = 'Status Unknown';
-      }
-      if (watcherStatus) {
-        watcherStatus.innerHTML = '<span class="error">Failed to load watcher status</span>';
       }
+      
+      statusHTML += `
+        <div style="margin-top: 0.5rem; font-size: 0.9rem; color: #6b7280;">
+          ${isRunning ? 'The watcher is actively monitoring your products and will send Telegram notifications when target prices are reached.' : 'The watcher is stopped. Products are not being monitored for price changes.'}
+        </div>
+      `;
+      
+      watcherStatus.innerHTML = statusHTML;
+      
+      if (startWatcherBtn) startWatcherBtn.disabled = isRunning;
+      if (stopWatcherBtn) stopWatcherBtn.disabled = !isRunning;
+      if (checkNowBtn) checkNowBtn.disabled = !isRunning;
     }
   }
 
@@ -630,6 +825,28 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
+  async function checkNow() {
+    if (checkNowBtn.disabled) {
+      return;
+    }
+    checkNowBtn.disabled = true;
+    try {
+      const response = await fetchJSON('/api/watcher/check', { method: 'POST' });
+      if (response.success) {
+        showNotification(`✓ ${response.message}`);
+      } else {
+        showNotification(`❌ ${response.message}`, 'error');
+      }
+      setTimeout(async () => {
+        await renderWatcherStatus();
+      }, 1000);
+    } catch (error) {
+      showNotification(`❌ Failed to start check: ${error.message}`, 'error');
+    } finally {
+      checkNowBtn.disabled = false;
+    }
+  }
+
   // Event listeners for watcher control with debouncing
   startWatcherBtn.onclick = async (e) => {
     e.preventDefault();
@@ -642,6 +859,12 @@ document.addEventListener('DOMContentLoaded', () => {
     e.stopPropagation();
     await stopWatcher();
   };
+
+  checkNowBtn.onclick = async (e) => {
+    e.preventDefault();
+    e.stopPropagation();
+    await checkNow();
+  };
   
   telegramForm.onsubmit = async e => {
     e.preventDefault();
@@ -735,8 +958,8 @@ document.addEventListener('DOMContentLoaded', () => {
     }
     
     // Escape to cancel editing
-    if (e.key === 'Escape' && editingIdx !== null) {
-      editingIdx = null;
+    if (e.key === 'Escape' && editingId !== null) {
+      editingId = null;
       const submitBtn = addProductForm.querySelector('.add-btn');
       const btnText = submitBtn.querySelector('.btn-text');
       const btnIcon = submitBtn.querySelector('.btn-icon');
@@ -789,6 +1012,16 @@ document.addEventListener('DOMContentLoaded', () => {
   let nextAutoRefreshTime = null;
   
   async function setupAutoRefresh() {
+    if (liveEvents) {
+      // Cards are updated by the event stream, no periodic re-render needed
+      if (autoRefreshInterval) clearInterval(autoRefreshInterval);
+      if (autoRefreshCountdown) clearInterval(autoRefreshCountdown);
+      autoRefreshInterval = autoRefreshCountdown = nextAutoRefreshTime = null;
+      const autoRefreshElement = document.getElementById('auto-refresh-countdown');
+      if (autoRefreshElement) autoRefreshElement.style.display = 'none';
+      return;
+    }
+    
     try {
       const intervalData = await fetchJSON('/api/interval');
       const intervalStr = intervalData.interval || '60';
@@ -874,6 +1107,7 @@ document.addEventListener('DOMContentLoaded', () => {
   // Initial load with staggered timing for better UX and rate limiting
   console.log('[DOMContentLoaded] Starting initial load sequence...');
   renderProducts();
+  subscribeWatcherEvents();
   setTimeout(() => {
     console.log('[DOMContentLoaded] Loading interval...');
     renderInterval();
@@ -910,9 +1144,9 @@ document.addEventListener('DOMContentLoaded', () => {
     setupAutoRefresh();
   }, 5000); // Wait 5 seconds before starting auto-refresh
   
-  // Auto-refresh watcher status every 2 minutes (much less aggressive)
+  // Auto-refresh watcher status every 2 minutes, unless the event stream pushes it
   setInterval(() => {
-    if (document.visibilityState === 'visible') {
+    if (document.visibilityState === 'visible' && !liveEvents) {
       console.log('[Auto-refresh] Refreshing watcher status...');
       renderWatcherStatus();
     }
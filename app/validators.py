@@ -56,6 +56,13 @@ def is_valid_name(name):
         
     return True
 
+# User-set check priority of a product; "normal" when unset
+PRIORITIES = ("low", "normal", "high")
+
+def is_valid_priority(priority):
+    """Validate a product priority level"""
+    return isinstance(priority, str) and priority.strip().lower() in PRIORITIES
+
 def sanitize_string(text):
     """Basic string sanitization"""
     if not isinstance(text, str):
@@ -64,3 +71,25 @@ def sanitize_string(text):
     # Remove potentially dangerous characters
     text = re.sub(r'[<>"\']', '', text)
     return text.strip()[:200]  # Limit length
+
+
+def normalize_url(url):
+    """Canonical form of a URL for duplicate detection.
+
+    Lowercases scheme and host, drops default ports, fragments and trailing
+    slashes, so "https://WWW.site.fi/tuote/1/#kuvat" and
+    "https://www.site.fi/tuote/1" are the same listing.
+    """
+    parts = urlparse(str(url).strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if (scheme, port) in (("http", 80), ("https", 443)):
+        port = None
+    netloc = f"{host}:{port}" if port else host
+    path = parts.path.rstrip("/")
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{scheme}://{netloc}{path}{query}"
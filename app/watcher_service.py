@@ -4,56 +4,166 @@ import sys
 import threading
 import time
 import json
-import requests
 import logging
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
 from .logging_config import log_watcher_event
+from .flaresolverr import session_pool
+from .fetcher import page_fetcher
+from .rate_limiter import rate_limiter, RateLimitError
+from .circuit_breaker import CircuitOpenError
+from .http_client import http_client
+from .extractors import get_extractor, page_fingerprint
+from .snapshot_archive import extract_and_record, archive_unparsed
+from .price_cache import price_cache
+from .events import event_bus
+from .history_store import history_store, parse_duration, HISTORY_COMPACT_INTERVAL
+from .product_store import product_store
+from .config_store import config_store
+from .async_engine import AsyncWatchEngine
+from .scheduler import (
+    CheckScheduler, product_priority, scaled_interval, change_rate, adaptive_intervals, WATCHLIST_POLL
+)
 
 # Add watcher directory to path so we can import from it
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'watcher'))
 
-FLARESOLVERR_URL = os.environ.get('FLARESOLVERR_URL', 'http://localhost:8191/v1')
+# Latest check result per product URL, written after every cycle so the
+# /api/prices endpoint can serve it from whichever gunicorn worker it hits
+LATEST_FILE = os.path.join(os.path.dirname(__file__), "..", "watcher", "latest_prices.json")
+
+# Upcoming checks listed by status()
+STATUS_SCHEDULE_LENGTH = 10
+
+# Seconds between re-learning each product's rate of price change from the
+# history when scheduling is "adaptive"
+ADAPTIVE_REFRESH = 3600
+
+# Seconds after start before the first history compaction pass, and the pause
+# between URLs within a pass so the cycle's history writes get the lock
+COMPACT_START_DELAY = 60
+COMPACT_URL_PAUSE = 0.01
+
+# Longest stop() waits for the watcher threads to finish their current work
+STOP_TIMEOUT = 15
 
 class WatcherService:
     def __init__(self):
         self.is_running = False
         self.watcher_thread = None
+        self.compact_thread = None  # Rolls old price history up while the watcher runs
         self.stop_event = threading.Event()
         self.next_check_time = None
         self.current_interval = None
-        self.flaresolverr_session = None
+        self.engine = "thread"
+        self.async_engine = None
         self.logger = logging.getLogger('watcher')
-        self.price_history = {}  # Track previous prices for change detection
+        self.price_history = {}  # Latest price per URL for change detection, seeded from history_store
+        self._pending_observations = []  # (url, ts, price, fetch_time) written at the end of each cycle
+        self.latest_results = {}  # url -> last price/name/error seen by the watcher
+        self._latest_file_cache = (None, {})  # (mtime, results) read from LATEST_FILE
+        self._fingerprints = {}  # url -> page fingerprint of the last parsed check
+        self._last_change = {}  # url -> time the watcher last saw its price change
+        self._state_lock = threading.Lock()  # Guards price_history, latest_results, _fingerprints and _last_change
+        self._wake = threading.Event()  # Interrupts the wait between cycles (stop, config or product change, check now)
+        self.scheduler = CheckScheduler()  # Next due time and priority of every product
+        self._schedule_setting = None  # _schedule_key() of the config the schedule was computed from
+        self._adaptive = {"intervals": {}, "stretch": 1.0, "learned_at": None, "setting": None}
+        self._checks_done = 0  # Successful checks and price changes seen since start()
+        self._changes_seen = 0
+        self._solves_at_start = 0  # page_fetcher solve count when the watcher started
+        self._deferred = {}  # product id -> time its host's circuit allows a retry, for checks cut short by the breaker
+        config_store.subscribe(self._on_config_change)
+        product_store.subscribe(self._on_products_change)
         
     def start(self):
         """Start the watcher service in a background thread"""
         if self.is_running:
             self.logger.warning("Attempted to start watcher that's already running")
             return False, "Watcher is already running"
+        if any(t is not None and t.is_alive() for t in (self.watcher_thread, self.compact_thread)):
+            return False, "Watcher is still stopping, try again shortly"
             
         self.stop_event.clear()
-        self.watcher_thread = threading.Thread(target=self._watch_loop, daemon=True)
+        # Carry over results from a previous run or another worker
+        results = self.latest()
+        try:
+            # Previous prices survive restarts, so "any_change" works from the first cycle
+            previous = {url: row["price"] for url, row in history_store.latest_prices().items()}
+        except Exception as e:
+            self.logger.error(f"Error loading price history: {e}")
+            previous = {}
+        with self._state_lock:
+            self.latest_results = results
+            self.price_history.update(previous)
+            self._checks_done = 0
+            self._changes_seen = 0
+            self._deferred = {}
+        self._solves_at_start = page_fetcher.stats()["flaresolverr_solves"]
+        self._adaptive["learned_at"] = None
+        self._wake.clear()
+        # Every product is checked right after a start
+        self.scheduler.clear()
+        self.engine = self._load_config().engine
+        if self.engine == "asyncio":
+            self.async_engine = AsyncWatchEngine(self)
+            target = self.async_engine.run
+        else:
+            self.async_engine = None
+            target = self._watch_loop
+        self.watcher_thread = threading.Thread(target=target, daemon=True)
         self.watcher_thread.start()
+        self.compact_thread = threading.Thread(target=self._compact_loop, daemon=True, name="history-compact")
+        self.compact_thread.start()
         self.is_running = True
-        self.logger.info("Watcher service started successfully")
+        event_bus.publish("watcher", is_running=True, engine=self.engine)
+        self.logger.info(f"Watcher service started successfully ({self.engine} engine)")
         return True, "Watcher started successfully"
         
-    def stop(self):
-        """Stop the watcher service"""
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Stop the watcher service, waiting up to timeout seconds for its threads to finish"""
         if not self.is_running:
             self.logger.warning("Attempted to stop watcher that's not running")
             return False, "Watcher is not running"
             
         self.stop_event.set()
+        self._wake.set()
+        if self.async_engine:
+            # Cancels in-flight fetches and the interval sleep right away
+            self.async_engine.cancel()
+        deadline = time.time() + timeout
+        for thread in (self.watcher_thread, self.compact_thread):
+            if thread is not None:
+                thread.join(max(0, deadline - time.time()))
         self.is_running = False
+        event_bus.publish("watcher", is_running=False, engine=self.engine)
+        if self.watcher_thread is not None and self.watcher_thread.is_alive():
+            # A FlareSolverr request that ignores the stop can take a minute
+            self.logger.warning(f"Watcher thread still finishing a check after {timeout}s")
+            return True, "Watcher stopping, the check in progress will finish in the background"
         self.logger.info("Watcher service stopped")
         return True, "Watcher stopped successfully"
+    
+    def check_now(self, product_id=None):
+        """Check every product, or just product_id, right away instead of at its next due time"""
+        if not self.is_running:
+            return False, "Watcher is not running"
+        products = self._load_products()
+        if product_id is not None and not any(item.get("id") == product_id for item in products):
+            return False, "Product not found"
+        now = time.time()
+        self.scheduler.sync(products, now)
+        count = self.scheduler.expedite(now, None if product_id is None else {product_id})
+        self._wake_up()
+        self.logger.info(f"Immediate check requested for {count} products")
+        return True, f"Checking {count} product{'s' if count != 1 else ''} now"
         
     def status(self):
         """Get current watcher status"""
         status_data = {
             "is_running": self.is_running,
-            "status": "Running" if self.is_running else "Stopped"
+            "status": "Running" if self.is_running else "Stopped",
+            "engine": self.engine
         }
         
         if self.is_running and self.next_check_time:
@@ -61,75 +171,126 @@ class WatcherService:
             status_data["countdown"] = remaining
             status_data["next_check"] = self.next_check_time
             status_data["interval"] = self.current_interval
+            now = time.time()
+            upcoming = self.scheduler.upcoming(STATUS_SCHEDULE_LENGTH)
+            for row in upcoming:
+                row["countdown"] = max(0, int(row["due"] - now))
+            config = self._load_config()
+            status_data["schedule"] = {
+                "mode": config.scheduling,
+                "products": len(self.scheduler),
+                "planned_per_hour": round(self.scheduler.planned_per_hour(), 1),
+                "upcoming": upcoming,
+            }
+            if config.scheduling == "adaptive":
+                status_data["schedule"]["fetch_budget"] = config.fetch_budget
+                status_data["schedule"]["budget_stretch"] = round(self._adaptive["stretch"], 2)
+            status_data["efficiency"] = self._efficiency()
         
+        status_data["fetch"] = page_fetcher.stats()
+        status_data["price_cache"] = price_cache.stats()
+        status_data["rate_limit"] = rate_limiter.levels()
+        status_data["breaker"] = page_fetcher.breaker.states()
         return status_data
     
-    def _load_config(self):
-        """Load configuration from config.json"""
-        config_path = os.path.join(os.path.dirname(__file__), "..", "config.json")
+    def latest(self):
+        """Return {url: result} for every product the watcher has checked.
+
+        Results come from memory when the watcher runs in this process and
+        from LATEST_FILE otherwise (re-read only when the file changes).
+        """
+        if self.is_running:
+            with self._state_lock:
+                return {url: dict(result) for url, result in self.latest_results.items()}
         try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            # Create default config if it doesn't exist
-            default_config = {
-                "interval": "600",  # 10 minutes default
-                "telegram_token": "",
-                "telegram_chat_id": "",
-                "notification_mode": "below_target"  # New setting
-            }
-            self._create_default_config(config_path, default_config)
-            return default_config
+            mtime = os.stat(LATEST_FILE).st_mtime_ns
+        except OSError:
+            return {}
+        cached_mtime, results = self._latest_file_cache
+        if mtime != cached_mtime:
+            try:
+                with open(LATEST_FILE, "r", encoding="utf-8") as f:
+                    results = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Error loading latest results: {e}")
+                return {}
+            self._latest_file_cache = (mtime, results)
+        return {url: dict(result) for url, result in results.items()}
+    
+    def _save_latest(self):
+        """Atomically write latest_results to LATEST_FILE"""
+        with self._state_lock:
+            snapshot = dict(self.latest_results)
+        tmp_path = f"{LATEST_FILE}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, LATEST_FILE)
         except Exception as e:
-            self.logger.error(f"Error loading config: {e}")
-            return {"interval": "600", "notification_mode": "below_target"}  # Fallback
+            self.logger.error(f"Error saving latest results: {e}")
     
-    def _create_default_config(self, config_path, default_config):
-        """Create default config.json file"""
+    def _flush_history(self):
+        """Write the observations buffered during the cycle in one transaction"""
+        with self._state_lock:
+            observations, self._pending_observations = self._pending_observations, []
         try:
-            with open(config_path, "w", encoding="utf-8") as f:
-                json.dump(default_config, f, indent=2)
-            self.logger.info(f"Created default config file at {config_path}")
+            history_store.record_many(observations)
         except Exception as e:
-            self.logger.error(f"Error creating default config: {e}")
+            self.logger.error(f"Error saving price history ({len(observations)} observations): {e}")
     
-    def _load_products(self):
-        """Load products from products.json"""
-        products_path = os.path.join(os.path.dirname(__file__), "..", "watcher", "products.json")
-        
-        # Ensure watcher directory exists
-        watcher_dir = os.path.dirname(products_path)
-        if not os.path.exists(watcher_dir):
+    def _compact_loop(self):
+        """Roll up old price history (and drop expired cached prices) every
+        HISTORY_COMPACT_INTERVAL until stopped"""
+        delay = COMPACT_START_DELAY
+        while not self.stop_event.wait(delay):
             try:
-                os.makedirs(watcher_dir, mode=0o755)
-                self.logger.info(f"Created watcher directory at {watcher_dir}")
+                delay = parse_duration(HISTORY_COMPACT_INTERVAL)
+                price_cache.evict_expired()
+                start = time.time()
+                stats = history_store.compact(pause=COMPACT_URL_PAUSE, stop_event=self.stop_event)
+                if any(stats.values()):
+                    self.logger.info(
+                        f"Compacted price history in {time.time() - start:.1f}s: {stats['observations']} "
+                        f"samples rolled up hourly, {stats['hourly_blocks']} days rolled up daily"
+                    )
             except Exception as e:
-                self.logger.error(f"Error creating watcher directory: {e}")
-                return []
-        
+                self.logger.error(f"Error compacting price history: {e}")
+    
+    def _record_result(self, url, **fields):
+        """Merge fields into the latest result for url; caller holds _state_lock"""
+        result = self.latest_results.setdefault(url, {"price": None, "name": None, "error": None})
+        result.update(fields, checked_at=time.time())
+    
+    def _load_config(self):
+        """Return the current WatcherConfig (cached until config.json changes)"""
+        return config_store.get()
+    
+    def _on_config_change(self, old, new):
+        """Config subscriber: apply new scheduling settings to the running wait at once"""
+        if self.is_running and self._schedule_key(new) != self._schedule_key(old):
+            self._wake_up()
+    
+    def _on_products_change(self):
+        """Product store subscriber: pick up added, edited or removed products without waiting"""
+        if self.is_running:
+            self._wake_up()
+    
+    def _wake_up(self):
+        """Interrupt the wait between cycles of whichever engine is running"""
+        self._wake.set()
+        if self.async_engine:
+            self.async_engine.wake()
+    
+    def _load_products(self):
+        """Load products from products.json (cached until the file changes)"""
         try:
-            with open(products_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            # Create empty products file if it doesn't exist
-            default_products = []
-            self._create_default_products(products_path, default_products)
-            return default_products
+            return product_store.load()
         except Exception as e:
             self.logger.error(f"Error loading products: {e}")
             return []
     
-    def _create_default_products(self, products_path, default_products):
-        """Create default products.json file"""
-        try:
-            with open(products_path, "w", encoding="utf-8") as f:
-                json.dump(default_products, f, indent=2)
-            self.logger.info(f"Created default products file at {products_path}")
-        except Exception as e:
-            self.logger.error(f"Error creating default products file: {e}")
-    
-    def _send_telegram_message(self, text: str):
-        """Send a Telegram message"""
+    def _telegram_credentials(self):
+        """Return (token, chat_id), or (None, None) when Telegram is not configured"""
         # Get credentials from environment variables first, fallback to config
         token = os.environ.get('TELEGRAM_TOKEN')
         chat_id = os.environ.get('TELEGRAM_CHAT_ID')
@@ -137,87 +298,33 @@ class WatcherService:
         # Fallback to config file if env vars not set
         if not token or not chat_id:
             config = self._load_config()
-            token = token or config.get("telegram_token")
-            chat_id = chat_id or config.get("telegram_chat_id")
+            token = token or config.telegram_token
+            chat_id = chat_id or config.telegram_chat_id
         
         if not token or not chat_id:
+            return None, None
+        return token, chat_id
+    
+    def _send_telegram_message(self, text: str):
+        """Send a Telegram message"""
+        token, chat_id = self._telegram_credentials()
+        if not token:
             return  # Telegram is not configured
             
         try:
-            url = f"https://api.telegram.org/bot{token}/sendMessage"
-            payload = {"chat_id": chat_id, "text": text}
-            response = requests.post(url, json=payload, timeout=10)
+            response = http_client.send_telegram(token, chat_id, text)
             if not response.ok:
                 print(f"[ERROR] Telegram send failed: {response.text}")
         except Exception as e:
             print(f"[ERROR] Telegram exception: {e}")
     
-    def _ensure_session(self):
-        """Ensure FlareSolverr session exists"""
-        if not hasattr(self, 'flaresolverr_session') or not self.flaresolverr_session:
-            try:
-                payload = {
-                    "cmd": "sessions.create",
-                    "session": "vaurioajoneuvo_watcher"
-                }
-                resp = requests.post(FLARESOLVERR_URL, json=payload, timeout=30)
-                if resp.ok and resp.json().get("status") == "ok":
-                    self.flaresolverr_session = "vaurioajoneuvo_watcher"
-                    print("[INFO] Created FlareSolverr session for persistent access")
-                else:
-                    print(f"[WARNING] Failed to create FlareSolverr session: {resp.text}")
-            except Exception as e:
-                print(f"[WARNING] Could not create FlareSolverr session: {e}")
-                self.flaresolverr_session = None
-    
     def _fetch_product_data(self, url):
-        """Fetch product data using FlareSolverr"""
-        self._ensure_session()
-        
-        payload = {
-            "cmd": "request.get",
-            "url": url,
-            "maxTimeout": 60000
-        }
-        
-        # Use session if available
-        if self.flaresolverr_session:
-            payload["session"] = self.flaresolverr_session
-            
-        try:
-            resp = requests.post(FLARESOLVERR_URL, json=payload, timeout=70)
-            resp.raise_for_status()
-            html = resp.json()["solution"]["response"]
-        except Exception as e:
-            raise Exception(f"Flaresolverr error: {e}")
-            
-        # Check if we got a CAPTCHA page instead of the product page
-        if "captcha" in html.lower() or "recaptcha" in html.lower():
-            raise Exception("Website is showing CAPTCHA - automated access temporarily blocked")
-            
-        soup = BeautifulSoup(html, "html.parser")
-        price_tag = soup.find("p", class_="price")
-        if not price_tag:
-            # Try alternative price selectors
-            price_tag = soup.find("span", class_="price") or soup.find("div", class_="price")
-            if not price_tag:
-                # Look for any element containing price-related text
-                price_elements = soup.find_all(text=lambda text: text and ("€" in text or "euro" in text.lower()))
-                if price_elements:
-                    raise Exception(f"Price element structure changed - found {len(price_elements)} price-like elements")
-                else:
-                    raise Exception("Price not found - page structure may have changed")
-            
-        price = self._parse_price(price_tag.get_text(strip=True))
-        name_tag = soup.find("h1", class_="name")
-        name = name_tag.get_text(strip=True) if name_tag else url
-        return {"price": price, "name": name}
+        """Fetch product data, reusing clearance cookies before falling back to FlareSolverr"""
+        return self._extract_product_data(page_fetcher.fetch_html(url), url)
     
-    def _parse_price(self, price_str):
-        """Extract digits from price string, e.g. "3 000 €" -> 3000"""
-        import re
-        price = re.sub(r"[^0-9]", "", price_str)
-        return int(price) if price else 0
+    def _extract_product_data(self, html, url):
+        """Extract price and name from a listing page with the configured extractor"""
+        return extract_and_record(get_extractor(), html, url)
     
     def _parse_interval(self, interval_str):
         """Parse interval string and return seconds"""
@@ -253,167 +360,457 @@ class WatcherService:
     def _cleanup_sessions(self):
         """Clean up crashed FlareSolverr sessions"""
         try:
-            # Destroy all sessions
-            payload = {"cmd": "sessions.destroy", "session": "vaurioajoneuvo_watcher"}
-            requests.post(FLARESOLVERR_URL, json=payload, timeout=10)
-            payload = {"cmd": "sessions.destroy", "session": "vaurioajoneuvo_api"}  
-            requests.post(FLARESOLVERR_URL, json=payload, timeout=10)
-            self.flaresolverr_session = None
-        except:
+            session_pool.close()
+        except Exception:
             pass
     
     def _watch_loop(self):
         """Main watcher loop with enhanced logging"""
         self.logger.info("Watcher service started")
+        session_pool.warm()
         
         while not self.stop_event.is_set():
             try:
-                config = self._load_config()
                 products = self._load_products()
                 
                 if not products:
                     self.logger.info("No products to watch, sleeping...")
-                    time.sleep(30)
+                    if self._wake.wait(WATCHLIST_POLL * 6):
+                        self._wake.clear()
                     continue
                 
-                self.logger.info(f"Starting price check for {len(products)} products")
-                
-                alerts_sent = 0
-                errors_count = 0
-                
-                for item in products:
-                    if self.stop_event.is_set():
-                        break
-                        
-                    url = item["url"]
-                    target = item["target_price"]
-                    product_name = item.get("name", "Unknown Product")
-                    
-                    try:
-                        start_time = time.time()
-                        data = self._fetch_product_data(url)
-                        fetch_time = time.time() - start_time
-                        
-                        price = data["price"]
-                        name = item.get("name", data["name"])
-                        
-                        # Get previous price for change detection
-                        previous_price = self.price_history.get(url, None)
-                        self.price_history[url] = price
-                        
-                        # Determine notification mode
-                        notification_mode = config.get("notification_mode", "below_target")
-                        
-                        log_watcher_event(
-                            self.logger,
-                            'price_check',
-                            product_url=url,
-                            target_price=target,
-                            current_price=price,
-                            details={
-                                'product_name': name,
-                                'fetch_time': fetch_time,
-                                'price_difference': price - target,
-                                'previous_price': previous_price,
-                                'notification_mode': notification_mode
-                            }
-                        )
-                        
-                        # Check for notifications based on mode
-                        should_notify = False
-                        alert_message = ""
-                        
-                        if notification_mode == "any_change" and previous_price is not None and price != previous_price:
-                            # Notify on any price change
-                            change = price - previous_price
-                            direction = "increased" if change > 0 else "decreased"
-                            should_notify = True
-                            alert_message = f"💰 PRICE CHANGE: {name} {direction} from €{previous_price} to €{price} (target: €{target})\n{url}"
-                            
-                        elif notification_mode == "below_target" and price < target:
-                            # Notify only when below target (current behavior)
-                            should_notify = True
-                            alert_message = f"🎯 PRICE ALERT: {name} has dropped to €{price} (below your target of €{target})!\n{url}"
-                            
-                        elif notification_mode == "both":
-                            # Notify on any change OR below target
-                            if previous_price is not None and price != previous_price:
-                                change = price - previous_price
-                                direction = "increased" if change > 0 else "decreased"
-                                should_notify = True
-                                alert_message = f"💰 PRICE CHANGE: {name} {direction} from €{previous_price} to €{price} (target: €{target})\n{url}"
-                            elif price < target:
-                                should_notify = True
-                                alert_message = f"🎯 PRICE ALERT: {name} has dropped to €{price} (below your target of €{target})!\n{url}"
-                        
-                        # notification_mode == "none" means no notifications
-                        
-                        if should_notify:
-                            self.logger.info(f"ALERT: {alert_message.split(':', 1)[1].split(chr(10))[0].strip()}")
-                            log_watcher_event(
-                                self.logger,
-                                'price_alert',
-                                product_url=url,
-                                target_price=target,
-                                current_price=price,
-                                details={
-                                    'product_name': name, 
-                                    'alert_type': 'price_change' if 'CHANGE' in alert_message else 'price_drop',
-                                    'previous_price': previous_price,
-                                    'notification_mode': notification_mode
-                                }
-                            )
-                            self._send_telegram_message(alert_message)
-                            alerts_sent += 1
-                        else:
-                            self.logger.debug(f"Price check: {name} = €{price} (target: €{target}, previous: €{previous_price})")
-                            
-                    except Exception as e:
-                        errors_count += 1
-                        self.logger.error(
-                            f"Error checking {product_name}: {str(e)}",
-                            extra={
-                                'product_url': url, 
-                                'target_price': target,
-                                'product_name': product_name
-                            },
-                            exc_info=True
-                        )
-                        log_watcher_event(
-                            self.logger,
-                            'price_check_error',
-                            product_url=url,
-                            target_price=target,
-                            details={
-                                'product_name': product_name,
-                                'error': str(e)
-                            }
-                        )
-                
-                self.logger.info(
-                    f"Price check completed: {len(products)} products checked, "
-                    f"{alerts_sent} alerts sent, {errors_count} errors"
-                )
-                
-                # Parse interval and wait
-                interval_str = config.get("interval", "60")
-                interval_seconds = self._parse_interval(interval_str)
-                self.current_interval = interval_seconds
-                self.next_check_time = time.time() + interval_seconds
-                
-                self.logger.info(f"Next check in {interval_seconds} seconds")
-                
-                # Wait with ability to stop
-                for i in range(interval_seconds):
-                    if self.stop_event.is_set():
-                        break
-                    time.sleep(1)
+                due = self._due_products(products)
+                if due:
+                    session_pool.health_check()
+                    # No fixed config: checks read the live one, so a new
+                    # notification mode applies even in the middle of a cycle
+                    self._run_cycle(None, due)
+                    self._schedule_checked(due, products)
+                self._schedule_next()
+                self._wait_for_next_cycle()
                     
             except Exception as e:
                 self.logger.error(f"Watcher loop error: {str(e)}", exc_info=True)
-                time.sleep(30)  # Wait 30 seconds before retrying
+                self.stop_event.wait(30)  # Wait 30 seconds before retrying
         
         self.logger.info("Watcher service stopped")
+    
+    def _due_products(self, products):
+        """Follow the watchlist and return the products due now, in dispatch order"""
+        now = time.time()
+        self.scheduler.sync(products, now)
+        return self.scheduler.pop_due(now)
+    
+    def _plan(self, item, config):
+        """Return (interval seconds, priority) for the next check of item"""
+        base = self._parse_interval(config.interval)
+        if config.scheduling == "fixed":
+            return base, 1.0
+        if config.scheduling == "adaptive":
+            interval = self._adaptive["intervals"].get(item["url"])
+            if interval is None:
+                # Added since the rates were learned
+                low, high = parse_duration(config.adaptive_min_interval), parse_duration(config.adaptive_max_interval)
+                interval = min(max(base, low), high)
+            return interval, base / interval
+        url = item["url"]
+        with self._state_lock:
+            price = self.price_history.get(url)
+            last_change = self._last_change.get(url)
+        priority = product_priority(item, price, last_change, time.time())
+        return scaled_interval(base, priority), priority
+    
+    def _learn_intervals(self, products, config, force=False):
+        """Refresh the adaptive intervals of products from their recent price changes.
+        
+        Runs at most every ADAPTIVE_REFRESH seconds unless forced or the
+        bounds, budget or watchlist changed.
+        """
+        now = time.time()
+        setting = (config.adaptive_min_interval, config.adaptive_max_interval, config.fetch_budget,
+                   frozenset((p["url"], p["target_price"], p.get("priority")) for p in products))
+        learned_at = self._adaptive["learned_at"]
+        if not force and setting == self._adaptive["setting"] and learned_at and now - learned_at < ADAPTIVE_REFRESH:
+            return
+        urls = [item["url"] for item in products]
+        try:
+            counts = history_store.change_counts(urls, now - history_store.raw_retention)
+        except Exception as e:
+            self.logger.error(f"Error loading price changes: {e}")
+            counts = {}
+        rates, weights = {}, {}
+        with self._state_lock:
+            prices = {url: self.price_history.get(url) for url in urls}
+        for item in products:
+            url = item["url"]
+            changes, first, last, _ = counts.get(url, (0, now, now, 0))
+            rates[url] = change_rate(changes, last - first)
+            weights[url] = product_priority(item, prices[url])
+        intervals, stretch = adaptive_intervals(
+            rates, weights,
+            parse_duration(config.adaptive_min_interval), parse_duration(config.adaptive_max_interval),
+            config.fetch_budget,
+        )
+        self._adaptive.update(intervals=intervals, stretch=stretch, learned_at=now, setting=setting)
+        planned = sum(3600 / interval for interval in intervals.values())
+        self.logger.info(
+            f"Adaptive schedule: {len(intervals)} products, {planned:.0f} checks/hour planned"
+            + (f", stretched {stretch:.2f}x to fit the budget of {config.fetch_budget}/hour" if stretch > 1 else "")
+        )
+    
+    def _schedule_checked(self, products, watchlist=None, checked_at=None):
+        """Put checked products back on the schedule, counted from the end of their cycle.
+        
+        watchlist is the full product list, which adaptive scheduling
+        spreads the hourly fetch budget over.
+        """
+        config = self._load_config()
+        if config.scheduling == "adaptive":
+            self._learn_intervals(watchlist or products, config)
+        checked_at = checked_at or time.time()
+        with self._state_lock:
+            deferred = {item["id"]: self._deferred.pop(item["id"], None) for item in products if item.get("id")}
+        for item in products:
+            interval, priority = self._plan(item, config)
+            retry_at = deferred.get(item.get("id"))
+            if retry_at is not None:
+                # Skipped by an open circuit: due again when it lets a probe through
+                interval = max(retry_at - checked_at, 0)
+            self.scheduler.schedule(item, checked_at, interval, priority)
+    
+    def _schedule_next(self):
+        """Set and announce the time of the next check, the earliest due product"""
+        config = self._load_config()
+        self._schedule_setting = self._schedule_key(config)
+        interval_seconds = self._parse_interval(config.interval)
+        self.current_interval = interval_seconds
+        next_due = self.scheduler.next_due()
+        self.next_check_time = next_due if next_due is not None else time.time() + interval_seconds
+        self.logger.info(f"Next check in {max(0, int(self.next_check_time - time.time()))} seconds")
+        event_bus.publish("watcher", is_running=True, engine=self.engine,
+                          next_check=self.next_check_time, interval=interval_seconds)
+        return self.next_check_time
+    
+    @staticmethod
+    def _schedule_key(config):
+        """The config settings product intervals are computed from"""
+        return (config.interval, config.scheduling, config.adaptive_min_interval,
+                config.adaptive_max_interval, config.fetch_budget)
+    
+    def _reschedule_if_changed(self):
+        """Recompute every due time if the scheduling settings changed during the wait"""
+        config = self._load_config()
+        if self._schedule_key(config) != self._schedule_setting:
+            if config.scheduling == "adaptive":
+                self._learn_intervals(self._load_products(), config, force=True)
+            self.scheduler.reschedule(lambda entry: self._plan(entry["item"], config))
+            self._schedule_next()
+    
+    def _wait_for_next_cycle(self):
+        """Sleep until next_check_time.
+        
+        Woken early by stop(), check_now() and changes to the config or the
+        watchlist, which can move next_check_time forward.
+        """
+        while not self.stop_event.is_set():
+            remaining = self.next_check_time - time.time()
+            if remaining <= 0:
+                return
+            if self._wake.wait(min(remaining, WATCHLIST_POLL)):
+                self._wake.clear()
+                self._reschedule_if_changed()
+            self._sync_watchlist()
+    
+    def _sync_watchlist(self):
+        """Follow watchlist changes during the wait; new products are due at once"""
+        self.scheduler.sync(self._load_products(), time.time())
+        next_due = self.scheduler.next_due()
+        if next_due is not None and next_due < self.next_check_time:
+            self._schedule_next()
+    
+    def _start_cycle(self, products, max_workers, max_per_host):
+        self.logger.info(
+            f"Starting price check for {len(products)} products "
+            f"({self.engine}, workers: {max_workers}, per host: {max_per_host})"
+        )
+        event_bus.publish("cycle_start", products=len(products))
+    
+    def _finish_cycle(self, products, alerts_sent, errors_count, unchanged_count=0, deferred_count=0):
+        """Persist the cycle's results and report it"""
+        self._flush_history()
+        self._save_latest()
+        fetch_stats = page_fetcher.stats()
+        efficiency = self._efficiency()
+        self.logger.info(
+            f"Price check completed: {len(products)} products checked, "
+            f"{unchanged_count} unchanged, {alerts_sent} alerts sent, {errors_count} errors, "
+            f"{deferred_count} deferred by the circuit breaker, "
+            f"fast path hit rate {fetch_stats['hit_rate']}, "
+            f"{efficiency['changes_per_solve']} changes detected per FlareSolverr solve"
+        )
+        event_bus.publish("cycle_end", products=len(products), alerts=alerts_sent, errors=errors_count,
+                          unchanged=unchanged_count, deferred=deferred_count)
+    
+    def _efficiency(self):
+        """Price changes detected since start() per check and per FlareSolverr solve"""
+        solves = page_fetcher.stats()["flaresolverr_solves"] - self._solves_at_start
+        with self._state_lock:
+            checks, changes = self._checks_done, self._changes_seen
+        return {
+            "checks": checks,
+            "changes_detected": changes,
+            "flaresolverr_solves": solves,
+            "changes_per_check": round(changes / checks, 3) if checks else None,
+            "changes_per_solve": round(changes / solves, 3) if solves else None,
+        }
+    
+    def _concurrency_limits(self, config=None):
+        """Return (max_workers, max_per_host) for a cycle"""
+        config = config or self._load_config()
+        return config.max_workers, config.max_per_host
+    
+    def _run_cycle(self, config, products):
+        """Check all products once using a bounded worker pool.
+        
+        config is a WatcherConfig to use for the whole cycle, or None to
+        read the live config for every check.
+        """
+        max_workers, max_per_host = self._concurrency_limits(config)
+        
+        # One semaphore per target host so a single site never sees more than
+        # max_per_host parallel requests, whatever the global limit is
+        host_limits = {}
+        for item in products:
+            host = urlparse(item["url"]).netloc.lower()
+            if host not in host_limits:
+                host_limits[host] = threading.BoundedSemaphore(max_per_host)
+        
+        self._start_cycle(products, max_workers, max_per_host)
+        
+        alerts_sent = 0
+        errors_count = 0
+        unchanged_count = 0
+        deferred_count = 0
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="watcher-check")
+        try:
+            futures = [
+                executor.submit(self._check_product, item, config, host_limits)
+                for item in products
+            ]
+            for future in as_completed(futures):
+                outcome = future.result()
+                if outcome == "alert":
+                    alerts_sent += 1
+                elif outcome == "error":
+                    errors_count += 1
+                elif outcome == "unchanged":
+                    unchanged_count += 1
+                elif outcome == "deferred":
+                    deferred_count += 1
+        finally:
+            # Pending checks are dropped when the watcher is stopped mid-cycle
+            executor.shutdown(wait=True, cancel_futures=self.stop_event.is_set())
+        
+        self._finish_cycle(products, alerts_sent, errors_count, unchanged_count, deferred_count)
+        return alerts_sent, errors_count
+    
+    def _check_product(self, item, config, host_limits):
+        """Fetch and evaluate a single product.
+        
+        Returns "alert", "ok", "unchanged", "error", "skipped" or
+        "deferred" (the host's circuit is open).
+        """
+        if self.stop_event.is_set():
+            return "skipped"
+            
+        url = item["url"]
+        host_limit = host_limits[urlparse(url).netloc.lower()]
+        
+        try:
+            with host_limit:
+                if self.stop_event.is_set():
+                    return "skipped"
+                start_time = time.time()
+                html = page_fetcher.fetch_html(url, stop_event=self.stop_event)
+                fetch_time = time.time() - start_time
+            
+            outcome, alert_message = self._evaluate_page(item, html, fetch_time, config)
+            if alert_message:
+                self._send_telegram_message(alert_message)
+            return outcome
+                
+        except CircuitOpenError as e:
+            self._defer_check(item, e)
+            return "deferred"
+        except RateLimitError as e:
+            if self.stop_event.is_set():
+                return "skipped"
+            self._record_check_error(item, e)
+            return "error"
+        except Exception as e:
+            self._record_check_error(item, e)
+            return "error"
+    
+    def _evaluate_page(self, item, html, fetch_time, config):
+        """Record a fetched page; returns ("unchanged", "ok" or "alert", alert message or None).
+        
+        "unchanged" means the page was not parsed because its price and name
+        regions match the last parsed page; the alert is still decided.
+        """
+        fingerprint = page_fingerprint(html)
+        data = self._unchanged_data(item["url"], fingerprint)
+        unchanged = data is not None
+        if unchanged:
+            archive_unparsed(html, item["url"])
+        else:
+            data = self._extract_product_data(html, item["url"])
+        alert_message = self._handle_price(item, data, fetch_time, config, fingerprint)
+        if alert_message:
+            return "alert", alert_message
+        return ("unchanged" if unchanged else "ok"), None
+    
+    def _defer_check(self, item, error):
+        """Note a check the circuit breaker refused, to retry it when the circuit allows"""
+        if item.get("id"):
+            with self._state_lock:
+                self._deferred[item["id"]] = error.retry_at
+    
+    def _record_check_error(self, item, error):
+        """Log a failed product check"""
+        url = item["url"]
+        target = item["target_price"]
+        product_name = item.get("name", "Unknown Product")
+        with self._state_lock:
+            # Keep the last good price, the dashboard shows it next to the error
+            self._record_result(url, error=str(error))
+        event_bus.publish("check_error", url=url, error=str(error))
+        self.logger.error(
+            f"Error checking {product_name}: {str(error)}",
+            extra={
+                'product_url': url, 
+                'target_price': target,
+                'product_name': product_name
+            },
+            exc_info=error
+        )
+        log_watcher_event(
+            self.logger,
+            'price_check_error',
+            product_url=url,
+            target_price=target,
+            details={
+                'product_name': product_name,
+                'error': str(error)
+            }
+        )
+    
+    def _unchanged_data(self, url, fingerprint):
+        """Price and name of the last parsed page of url if fingerprint matches it, else None.
+        
+        Such a page would parse to the same price and name, so only the
+        parsing is skipped: the check is recorded and the alert decided
+        from the cached values exactly as for a parsed page.
+        """
+        if fingerprint is None:
+            return None
+        with self._state_lock:
+            price = self.price_history.get(url)
+            result = self.latest_results.get(url)
+            if price is None or result is None or self._fingerprints.get(url) != fingerprint:
+                return None
+            return {"price": price, "name": result["name"]}
+    
+    def _handle_price(self, item, data, fetch_time, config, fingerprint=None):
+        """Record a fetched price and decide on an alert. Returns the alert text or None."""
+        url = item["url"]
+        target = item["target_price"]
+        price = data["price"]
+        name = item.get("name", data["name"])
+        
+        # Determine notification mode
+        notification_mode = (config or self._load_config()).notification_mode
+        
+        # Reading and updating the previous price must happen atomically,
+        # otherwise two workers could both see the same "previous" value
+        with self._state_lock:
+            previous_price = self.price_history.get(url, None)
+            self.price_history[url] = price
+            self._checks_done += 1
+            if previous_price is not None and price != previous_price:
+                self._last_change[url] = time.time()
+                self._changes_seen += 1
+            self._pending_observations.append((url, time.time(), price, fetch_time))
+            self._record_result(url, price=price, name=data["name"], error=None)
+            self._fingerprints[url] = fingerprint
+        price_cache.put(url, data)
+        event_bus.publish("price", url=url, price=price, name=data["name"], target_price=target,
+                          previous_price=previous_price, below_target=price < target)
+        
+        log_watcher_event(
+            self.logger,
+            'price_check',
+            product_url=url,
+            target_price=target,
+            current_price=price,
+            details={
+                'product_name': name,
+                'fetch_time': fetch_time,
+                'price_difference': price - target,
+                'previous_price': previous_price,
+                'notification_mode': notification_mode
+            }
+        )
+        
+        # Check for notifications based on mode
+        should_notify = False
+        alert_message = ""
+        
+        if notification_mode == "any_change" and previous_price is not None and price != previous_price:
+            # Notify on any price change
+            change = price - previous_price
+            direction = "increased" if change > 0 else "decreased"
+            should_notify = True
+            alert_message = f"💰 PRICE CHANGE: {name} {direction} from €{previous_price} to €{price} (target: €{target})\n{url}"
+            
+        elif notification_mode == "below_target" and price < target:
+            # Notify only when below target (current behavior)
+            should_notify = True
+            alert_message = f"🎯 PRICE ALERT: {name} has dropped to €{price} (below your target of €{target})!\n{url}"
+            
+        elif notification_mode == "both":
+            # Notify on any change OR below target
+            if previous_price is not None and price != previous_price:
+                change = price - previous_price
+                direction = "increased" if change > 0 else "decreased"
+                should_notify = True
+                alert_message = f"💰 PRICE CHANGE: {name} {direction} from €{previous_price} to €{price} (target: €{target})\n{url}"
+            elif price < target:
+                should_notify = True
+                alert_message = f"🎯 PRICE ALERT: {name} has dropped to €{price} (below your target of €{target})!\n{url}"
+        
+        # notification_mode == "none" means no notifications
+        
+        if should_notify:
+            self.logger.info(f"ALERT: {alert_message.split(':', 1)[1].split(chr(10))[0].strip()}")
+            log_watcher_event(
+                self.logger,
+                'price_alert',
+                product_url=url,
+                target_price=target,
+                current_price=price,
+                details={
+                    'product_name': name, 
+                    'alert_type': 'price_change' if 'CHANGE' in alert_message else 'price_drop',
+                    'previous_price': previous_price,
+                    'notification_mode': notification_mode
+                }
+            )
+            event_bus.publish("alert", url=url, message=alert_message)
+            return alert_message
+        
+        self.logger.debug(f"Price check: {name} = €{price} (target: €{target}, previous: €{previous_price})")
+        return None
 
 # Global watcher instance
 watcher_service = WatcherService()
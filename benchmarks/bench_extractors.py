@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Compare extractor backends on listing HTML: CPU time and peak memory per
+page, after checking that every backend extracts the same result (or the
+same error) as the BeautifulSoup reference. The "fingerprint" row is what
+the watcher spends on a page whose price and name regions are unchanged.
+
+Exits with status 1 if any backend disagrees with the reference.
+
+Usage: python benchmarks/bench_extractors.py [--html-dir DIR] [--rounds 50] [--parity-only]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from listing_fixtures import generate_pages, load_pages
+from app.extractors import EXTRACTORS, ExtractionError, page_fingerprint
+
+REFERENCE = "bs4"
+
+
+class FingerprintOnly:
+    """page_fingerprint() behind the extractor interface, for measure()"""
+
+    def extract(self, html, url):
+        return page_fingerprint(html)
+
+
+def run_extractor(extractor, html, url):
+    try:
+        return extractor.extract(html, url)
+    except ExtractionError as e:
+        return f"ExtractionError: {e}"
+
+
+def check_parity(pages):
+    """Return a list of (page, backend, expected, got) mismatches"""
+    mismatches = []
+    reference = EXTRACTORS[REFERENCE]
+    for page_name, html in pages.items():
+        url = f"https://www.vaurioajoneuvo.fi/tuote/{page_name}/"
+        expected = run_extractor(reference, html, url)
+        for backend, extractor in EXTRACTORS.items():
+            if backend == REFERENCE:
+                continue
+            got = run_extractor(extractor, html, url)
+            if got != expected:
+                mismatches.append((page_name, backend, expected, got))
+    return mismatches
+
+
+def measure(extractor, pages, rounds):
+    """Return (CPU ms per page, peak KiB for one pass over all pages)"""
+    items = list(pages.items())
+    start = time.process_time()
+    for _ in range(rounds):
+        for page_name, html in items:
+            run_extractor(extractor, html, page_name)
+    cpu_ms = (time.process_time() - start) * 1000 / (rounds * len(items))
+
+    tracemalloc.start()
+    for page_name, html in items:
+        run_extractor(extractor, html, page_name)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_ms, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing extractors")
+    parser.add_argument("--html-dir", help="Directory of recorded *.html listing pages")
+    parser.add_argument("--rounds", type=int, default=50, help="Passes over all pages per backend")
+    parser.add_argument("--parity-only", action="store_true", help="Only run the parity check")
+    args = parser.parse_args()
+
+    pages = load_pages(args.html_dir) if args.html_dir else generate_pages()
+    if not pages:
+        print("No pages to benchmark")
+        return 1
+    total_kib = sum(len(html.encode("utf-8")) for html in pages.values()) / 1024
+    print(f"{len(pages)} pages, {total_kib:.0f} KiB total")
+
+    mismatches = check_parity(pages)
+    for page_name, backend, expected, got in mismatches:
+        print(f"PARITY MISMATCH {page_name} [{backend}]: expected {expected!r}, got {got!r}")
+    print(f"Parity: {'FAILED' if mismatches else 'OK'} ({len(EXTRACTORS) - 1} backend(s) vs {REFERENCE})")
+    if mismatches:
+        return 1
+    if args.parity_only:
+        return 0
+
+    print(f"{'backend':<11} {'CPU ms/page':>12} {'peak KiB':>10}")
+    for backend, extractor in EXTRACTORS.items():
+        cpu_ms, peak_kib = measure(extractor, pages, args.rounds)
+        print(f"{backend:<11} {cpu_ms:>12.3f} {peak_kib:>10.0f}")
+    cpu_ms, peak_kib = measure(FingerprintOnly(), pages, args.rounds)
+    print(f"{'fingerprint':<11} {cpu_ms:>12.3f} {peak_kib:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Simulate a year of watcher cycles against the price history store with
+compaction running once per simulated day, then report the database size
+(against the same samples kept raw) and query latencies on the compacted
+data, plus cycle write latency with and without a compaction pass running.
+
+Usage: python benchmarks/bench_history_retention.py [--products 1000] [--days 365]
+           [--raw-retention 7d] [--hourly-retention 365d] [--db PATH]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.history_store import HistoryStore, DAY, HOUR
+
+SAMPLE_INTERVAL = 600  # seconds between watcher cycles
+
+
+def url_for(i):
+    return f"https://www.vaurioajoneuvo.fi/tuote/{i}/"
+
+
+def timed_ms(func, repeat=10):
+    """Return the median wall time of func() in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def used_bytes(path):
+    """Bytes in use by the database, excluding free pages kept for reuse"""
+    conn = sqlite3.connect(path)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return pages * page_size
+    finally:
+        conn.close()
+
+
+def simulate(store, products, days, start_ts):
+    """Write days of cycles for products, compacting after each day.
+
+    Prices move rarely, like real listings. Returns the bytes per raw sample
+    measured before the first compaction removed anything, and the total
+    compaction time.
+    """
+    rng = random.Random(1)
+    prices = [rng.randint(500, 20000) for _ in range(products)]
+    samples_per_day = DAY // SAMPLE_INTERVAL
+    raw_bytes_per_sample = None
+    compact_s = 0.0
+    for day in range(days):
+        batch = []
+        for n in range(samples_per_day):
+            ts = start_ts + day * DAY + n * SAMPLE_INTERVAL
+            for i in range(products):
+                if rng.random() < 0.002:
+                    prices[i] = max(1, int(prices[i] * rng.uniform(0.9, 1.05)))
+                batch.append((url_for(i), ts, prices[i], 1.0))
+        store.record_many(batch)
+        if raw_bytes_per_sample is None and (day + 1) * DAY > store.raw_retention + HOUR:
+            raw_bytes_per_sample = used_bytes(store.path) / ((day + 1) * samples_per_day * products)
+        start = time.perf_counter()
+        store.compact(now=start_ts + (day + 1) * DAY)
+        compact_s += time.perf_counter() - start
+        if (day + 1) % 30 == 0:
+            print(f"  day {day + 1}/{days}: {used_bytes(store.path) / 1024 / 1024:.0f} MiB in use", flush=True)
+    return raw_bytes_per_sample, compact_s
+
+
+def write_latency(store, products, now, writes=20):
+    """Max and median cycle write time (ms) with nothing else running"""
+    times = []
+    for n in range(writes):
+        start = time.perf_counter()
+        store.record_many([(url_for(i), now - DAY + n, 1000, 1.0) for i in range(products)])
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[-1], times[len(times) // 2], len(times)
+
+
+def write_latency_during_compaction(store, products, now):
+    """Max and median cycle write time (ms) while a compaction pass runs alongside"""
+    # A day of samples left uncompacted gives the pass real work to do
+    store.record_many([(url_for(i), now - store.raw_retention - DAY + n * SAMPLE_INTERVAL, 1000, 1.0)
+                       for n in range(DAY // SAMPLE_INTERVAL) for i in range(products)])
+    done = threading.Event()
+
+    def compact():
+        store.compact(now=now, pause=0.01)
+        done.set()
+
+    thread = threading.Thread(target=compact)
+    thread.start()
+    writes = []
+    n = 0
+    while not done.is_set():
+        n += 1
+        start = time.perf_counter()
+        store.record_many([(url_for(i), now + n, 1000, 1.0) for i in range(products)])
+        writes.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.05)
+    thread.join()
+    writes.sort()
+    return writes[-1], writes[len(writes) // 2], len(writes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price history retention and rollups")
+    parser.add_argument("--products", type=int, default=1000, help="Watched products")
+    parser.add_argument("--days", type=int, default=365, help="Days of 10-minute samples to simulate")
+    parser.add_argument("--raw-retention", default="7d", help="Raw sample retention")
+    parser.add_argument("--hourly-retention", default="365d", help="Hourly rollup retention")
+    parser.add_argument("--db", help="Database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "history.db")
+    store = HistoryStore(path, raw_retention=args.raw_retention, hourly_retention=args.hourly_retention)
+    now = int(time.time()) // DAY * DAY
+    start_ts = now - args.days * DAY
+
+    start = time.perf_counter()
+    raw_bytes_per_sample, compact_s = simulate(store, args.products, args.days, start_ts)
+    samples = args.days * (DAY // SAMPLE_INTERVAL) * args.products
+    print(f"Simulated {samples} samples in {time.perf_counter() - start:.0f}s "
+          f"({compact_s:.0f}s of it compacting)")
+
+    compacted = used_bytes(path)
+    print(f"{'storage':<22} {'MiB':>10}")
+    if raw_bytes_per_sample:
+        print(f"{'raw samples only':<22} {samples * raw_bytes_per_sample / 1024 / 1024:>10.0f}")
+    print(f"{'with rollups':<22} {compacted / 1024 / 1024:>10.0f}")
+
+    urls = [url_for(i) for i in range(args.products)]
+    one = [url_for(0)]
+    queries = {
+        "latest per URL": lambda: store.latest_prices(),
+        "1 URL 1 week 10m": lambda: store.aggregate(one, now - 7 * DAY, now, SAMPLE_INTERVAL),
+        "1 URL 30d hourly": lambda: store.aggregate(one, now - 30 * DAY, now, HOUR),
+        "1 URL 1 year daily": lambda: store.aggregate(one, now - 365 * DAY, now, DAY),
+        "all URLs 30d daily": lambda: store.aggregate(urls, now - 30 * DAY, now, DAY),
+        "all URLs 1 year weekly": lambda: store.aggregate(urls, now - 364 * DAY, now, 7 * DAY),
+    }
+    print(f"{'query':<22} {'ms':>10}")
+    for name, query in queries.items():
+        print(f"{name:<22} {timed_ms(query, repeat=3 if name.startswith('all') else 10):>10.2f}")
+
+    for label, measure in (("alone", write_latency), ("during a compaction pass", write_latency_during_compaction)):
+        worst, median, count = measure(store, args.products, now)
+        print(f"Cycle writes {label}: median {median:.1f} ms, max {worst:.1f} ms ({count} writes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Measure the price history store with years of 10-minute samples: one cycle's
+batched write, "latest price per URL", a one-week range query and downsampled
+history (one URL over 30 days in hourly buckets, every URL over 90 days in
+daily buckets), compared between an empty and a fully loaded database.
+
+Usage: python benchmarks/bench_history_store.py [--products 20] [--years 2] [--db PATH]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.history_store import HistoryStore
+
+SAMPLE_INTERVAL = 600  # seconds between watcher cycles
+DAY = 24 * 3600
+WEEK = 7 * DAY
+
+
+def url_for(i):
+    return f"https://www.vaurioajoneuvo.fi/tuote/{i}/"
+
+
+def timed_ms(func, repeat=20):
+    """Return the median wall time of func() in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def fill(store, products, start_ts, samples):
+    """Backfill samples cycles for products, committing once per simulated day"""
+    batch = []
+    for n in range(samples):
+        ts = start_ts + n * SAMPLE_INTERVAL
+        batch.extend((url_for(i), ts, 1000 + (n // 144 + i) % 500, 1.0) for i in range(products))
+        if len(batch) >= 144 * products:
+            store.record_many(batch)
+            batch = []
+    store.record_many(batch)
+
+
+def measure(store, products, now):
+    counter = iter(range(10 ** 9))
+    urls = [url_for(i) for i in range(products)]
+
+    def write_cycle():
+        ts = now + next(counter)
+        store.record_many([(url_for(i), ts, 1234, 1.0) for i in range(products)])
+
+    return {
+        "cycle write": timed_ms(write_cycle),
+        "latest per URL": timed_ms(store.latest_prices),
+        "1 week range": timed_ms(lambda: store.history(url_for(0), now - WEEK, now)),
+        "30d hourly": timed_ms(lambda: store.aggregate([url_for(0)], now - 30 * DAY, now, 3600)),
+        "all 90d daily": timed_ms(lambda: store.aggregate(urls, now - 90 * DAY, now, DAY), repeat=5),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the price history store")
+    parser.add_argument("--products", type=int, default=20, help="Watched products")
+    parser.add_argument("--years", type=float, default=2, help="Years of 10-minute samples to backfill")
+    parser.add_argument("--db", help="Database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "history.db")
+    store = HistoryStore(path)
+    samples = int(args.years * 365 * 24 * 3600 / SAMPLE_INTERVAL)
+    now = time.time()
+    start_ts = now - samples * SAMPLE_INTERVAL
+
+    empty = measure(store, args.products, now - samples * SAMPLE_INTERVAL - 10 ** 6)
+
+    start = time.perf_counter()
+    fill(store, args.products, start_ts, samples)
+    fill_s = time.perf_counter() - start
+    rows = samples * args.products
+    print(f"Backfilled {rows} observations in {fill_s:.1f}s, "
+          f"database {os.path.getsize(path) / 1024 / 1024:.0f} MiB")
+
+    loaded = measure(store, args.products, now + 1)
+    print(f"{'operation':<16} {'empty ms':>10} {'loaded ms':>10}")
+    for name in empty:
+        print(f"{name:<16} {empty[name]:>10.3f} {loaded[name]:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of per-call connection overhead: module-level requests.post
+(new TCP connection every call) versus the shared keep-alive http_client.
+
+By default both are timed against the local fake FlareSolverr with zero
+delay, so the difference is pure connection setup. Pass --url to time GETs
+against a real HTTPS endpoint and include the TLS handshake as well.
+
+Usage: python benchmarks/bench_http_client.py [--calls 200] [--products 60]
+                                              [--url https://api.telegram.org]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_flaresolverr import FakeFlareSolverr
+from app.http_client import HttpClient
+
+
+def time_calls(call, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings):
+    ms = [t * 1000 for t in timings]
+    print(f"{label:<28} mean {statistics.mean(ms):7.2f} ms   median {statistics.median(ms):7.2f} ms")
+    return statistics.mean(ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs unpooled HTTP calls")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per variant")
+    parser.add_argument("--products", type=int, default=60, help="Products per cycle for the estimate")
+    parser.add_argument("--url", help="External URL to GET instead of the local fake FlareSolverr")
+    args = parser.parse_args()
+
+    client = HttpClient()
+    fake = None
+    if args.url:
+        unpooled = lambda: requests.get(args.url, timeout=(5, 30))
+        pooled = lambda: client.get(args.url, read_timeout=30)
+        target = args.url
+    else:
+        fake = FakeFlareSolverr(delay=0).start()
+        payload = {"cmd": "sessions.list"}
+        unpooled = lambda: requests.post(fake.url, json=payload, timeout=(5, 30))
+        pooled = lambda: client.post(fake.url, read_timeout=30, json=payload)
+        target = fake.url
+
+    try:
+        # Warm up DNS, imports and the pooled connection
+        unpooled()
+        pooled()
+        print(f"Target: {target}, {args.calls} calls per variant")
+        unpooled_ms = report("requests.post (no pool)", time_calls(unpooled, args.calls))
+        pooled_ms = report("http_client (keep-alive)", time_calls(pooled, args.calls))
+    finally:
+        if fake:
+            fake.stop()
+
+    saved = unpooled_ms - pooled_ms
+    print(f"Saved per call: {saved:.2f} ms")
+    print(f"Saved per cycle of {args.products} products: {saved * args.products:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
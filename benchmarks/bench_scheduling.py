@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Simulate the watcher's check scheduling against listings whose prices change
+at very different rates, and compare fixed intervals with adaptive ones
+under the same hourly fetch budget.
+
+Most listings never get repriced, some change every few days and a few
+several times a day (Poisson processes). Adaptive intervals may stay under
+the budget, so fixed intervals are run both at the full budget and at the
+adaptive fetch rate. The report shows how many price changes each mode
+detects per fetch (= per FlareSolverr solve when every fetch needs one)
+and how late.
+
+Usage: python benchmarks/bench_scheduling.py [--products 300] [--days 14] [--budget 300]
+"""
+
+import argparse
+import bisect
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.scheduler import CheckScheduler, change_rate, adaptive_intervals
+
+DAY = 24 * 3600
+TICK = 60  # Simulation step in seconds
+
+# (share of listings, price changes per day)
+LISTING_MIX = ((0.6, 1 / 30), (0.3, 1 / 3), (0.1, 6.0))
+
+
+def make_listings(count, days, rng):
+    """Return [(change times, prices after each change)] per listing"""
+    listings = []
+    for i in range(count):
+        roll, rate = rng.random(), LISTING_MIX[-1][1]
+        for share, mix_rate in LISTING_MIX:
+            if roll < share:
+                rate = mix_rate
+                break
+            roll -= share
+        times, t = [], rng.expovariate(rate / DAY)
+        while t < days * DAY:
+            times.append(t)
+            t += rng.expovariate(rate / DAY)
+        listings.append((times, list(range(1, len(times) + 1))))
+    return listings
+
+
+def price_at(listing, t):
+    times, prices = listing
+    n = bisect.bisect_right(times, t)
+    return prices[n - 1] if n else 0
+
+
+def simulate(listings, days, budget, adaptive, min_interval=300, max_interval=6 * 3600):
+    """Run one schedule; returns (fetches, detected changes, mean detection delay in minutes)"""
+    scheduler = CheckScheduler()
+    products = [{"id": str(i), "url": str(i)} for i in range(len(listings))]
+    scheduler.sync(products, 0)
+    fixed = len(listings) * 3600 / budget
+    seen = {}  # id -> (last price, first check time, changes seen, last check time)
+    intervals, learned_at = {}, None
+    fetches = detected = 0
+    delays = []
+    for now in range(0, days * DAY, TICK):
+        if adaptive and (learned_at is None or now - learned_at >= 3600):
+            rates = {
+                p["id"]: change_rate(seen[p["id"]][2], now - seen[p["id"]][1]) if p["id"] in seen else change_rate(0, 0)
+                for p in products
+            }
+            intervals, _ = adaptive_intervals(rates, {}, min_interval, max_interval, budget)
+            learned_at = now
+        for item in scheduler.pop_due(now):
+            listing = listings[int(item["id"])]
+            price = price_at(listing, now)
+            fetches += 1
+            last = seen.get(item["id"])
+            if last is None:
+                seen[item["id"]] = (price, now, 0, now)
+            else:
+                changes = last[2]
+                if price != last[0]:
+                    detected += 1
+                    changes += 1
+                    times = listing[0]
+                    changed_at = times[bisect.bisect_right(times, now) - 1]
+                    delays.append(now - changed_at)
+                seen[item["id"]] = (price, last[1], changes, now)
+            interval = intervals.get(item["id"], fixed) if adaptive else fixed
+            scheduler.schedule(item, now, interval, 1.0)
+    return fetches, detected, sum(delays) / len(delays) / 60 if delays else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fixed vs adaptive check scheduling")
+    parser.add_argument("--products", type=int, default=300, help="Simulated listings")
+    parser.add_argument("--days", type=int, default=14, help="Simulated days")
+    parser.add_argument("--budget", type=int, default=300, help="Fetches per hour for every mode")
+    args = parser.parse_args()
+
+    listings = make_listings(args.products, args.days, random.Random(1))
+    changes = sum(len(times) for times, _ in listings)
+    print(f"{args.products} listings, {changes} price changes over {args.days} days, "
+          f"budget {args.budget} fetches/hour")
+    print(f"{'mode':<10} {'fetches':>9} {'detected':>9} {'per fetch':>10} {'delay min':>10}")
+    rows = [("adaptive", simulate(listings, args.days, args.budget, adaptive=True))]
+    # Adaptive mode may stay under the budget; compare with a fixed interval
+    # spending the same number of fetches as well as the whole budget
+    same_rate = rows[0][1][0] / (args.days * 24)
+    rows.append(("fixed", simulate(listings, args.days, args.budget, adaptive=False)))
+    rows.append(("fixed=", simulate(listings, args.days, same_rate, adaptive=False)))
+    for name, (fetches, detected, delay) in rows:
+        print(f"{name:<10} {fetches:>9} {detected:>9} {detected / fetches:>10.4f} {delay:>10.1f}")
+    print("fixed= is a fixed interval spending as many fetches as adaptive")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
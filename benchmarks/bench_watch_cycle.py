@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark how one watcher cycle scales with the number of watched products.
+
+Runs WatcherService._run_cycle against a local fake FlareSolverr with a
+fixed per-request delay, for several product counts and worker limits.
+With --fetch-mode direct the products live on the fake site, so every
+check after the first solve can take the clearance-cookie fast path.
+
+With --engine asyncio the same cycle runs on AsyncWatchEngine instead of
+the thread pool.
+
+Usage: python benchmarks/bench_watch_cycle.py [--delay 0.2] [--counts 1,10,30,60]
+                                              [--fetch-mode flaresolverr|direct]
+                                              [--engine thread|asyncio]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_flaresolverr import FakeFlareSolverr
+
+
+def make_products(count, base_url="https://www.vaurioajoneuvo.fi"):
+    return [
+        {
+            "url": f"{base_url}/tuote/bench-{i}/",
+            "target_price": 500,
+            "name": f"Bench {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark watcher cycle wall time")
+    parser.add_argument("--delay", type=float, default=0.2, help="Fake FlareSolverr seconds per request")
+    parser.add_argument("--counts", default="1,10,30,60", help="Comma separated product counts")
+    parser.add_argument("--workers", default="1,4,8", help="Comma separated max_workers values")
+    parser.add_argument("--fetch-mode", default="flaresolverr", choices=["flaresolverr", "direct"])
+    parser.add_argument("--engine", default="thread", choices=["thread", "asyncio"])
+    args = parser.parse_args()
+
+    fake = FakeFlareSolverr(delay=args.delay).start()
+    # The app reads FLARESOLVERR_URL, FETCH_MODE, the rate limit and the
+    # history database at import time. The per-site limit is off so the cycle
+    # itself is measured, and every file a cycle writes goes to a scratch
+    # directory instead of the real watcher/ data
+    scratch = tempfile.mkdtemp(prefix="bench-watch-cycle-")
+    os.environ["FLARESOLVERR_URL"] = fake.url
+    os.environ["FETCH_MODE"] = args.fetch_mode
+    os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+    os.environ["RATE_LIMIT_FILE"] = os.path.join(scratch, "rate_limits.json")
+    os.environ["HISTORY_DB"] = os.path.join(scratch, "history.db")
+    import app.watcher_service
+    from app.watcher_service import WatcherService
+    from app.async_engine import AsyncWatchEngine
+    from app.fetcher import page_fetcher
+    from app.events import event_bus
+    app.watcher_service.LATEST_FILE = os.path.join(scratch, "latest_prices.json")
+    event_bus.path = os.path.join(scratch, "events.log")
+    from app.config_store import WatcherConfig
+    base_url = fake.site_url if args.fetch_mode == "direct" else "https://www.vaurioajoneuvo.fi"
+
+    counts = [int(c) for c in args.counts.split(",")]
+    worker_limits = [int(w) for w in args.workers.split(",")]
+
+    print(f"Fake FlareSolverr delay: {args.delay}s per request, fetch mode: {args.fetch_mode}, "
+          f"engine: {args.engine}")
+    print(f"{'products':>8} {'workers':>8} {'wall (s)':>10} {'serial est. (s)':>16} {'speedup':>8}")
+    try:
+        for count in counts:
+            products = make_products(count, base_url)
+            for workers in worker_limits:
+                service = WatcherService()
+                config = WatcherConfig(notification_mode="none", max_workers=workers, max_per_host=workers)
+                start = time.perf_counter()
+                if args.engine == "asyncio":
+                    asyncio.run(AsyncWatchEngine(service)._run_cycle(config, products))
+                else:
+                    service._run_cycle(config, products)
+                wall = time.perf_counter() - start
+                serial = count * args.delay
+                print(f"{count:>8} {workers:>8} {wall:>10.2f} {serial:>16.2f} {serial / wall:>8.1f}x")
+        stats = page_fetcher.stats()
+        print(f"FlareSolverr solves: {stats['flaresolverr_solves']}, "
+              f"fast path hits: {stats['fast_path_hits']}, hit rate: {stats['hit_rate']}")
+    finally:
+        fake.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Minimal local stand-in for FlareSolverr used by the benchmarks.
+
+It speaks just enough of the FlareSolverr v1 API (sessions.create,
+sessions.destroy, sessions.list, request.get) and answers every
+request.get with a listing page after a configurable delay. Plain GET
+requests are served as the target site itself: with the clearance cookie
+handed out by request.get they get the listing, without it a challenge.
+
+Usage: python benchmarks/fake_flaresolverr.py [--port 8191] [--delay 0.5]
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHALLENGE_PAGE = """<!DOCTYPE html>
+<html><head><title>Just a moment...</title></head>
+<body><script src="/cdn-cgi/challenge-platform/h/b/orchestrate/chl_page/v1"></script></body>
+</html>
+"""
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html lang="fi">
+<head><meta charset="utf-8"><title>{name} | Vaurioajoneuvo</title></head>
+<body>
+  <header><nav>{nav}</nav></header>
+  <main>
+    <h1 class="name">{name}</h1>
+    <p class="price">{price} €</p>
+    <section class="details">{details}</section>
+  </main>
+</body>
+</html>
+"""
+
+
+def listing_html(url, price=None):
+    """Build a deterministic listing page for a product URL"""
+    slug = url.rstrip("/").rsplit("/", 1)[-1]
+    if price is None:
+        digits = re.sub(r"[^0-9]", "", slug) or "1"
+        price = 1000 + (int(digits) * 37) % 9000
+    nav = "".join(f'<a href="/kategoria/{i}/">Kategoria {i}</a>' for i in range(40))
+    details = "".join(f"<p>Tekninen tieto {i}: arvo {i * 3}</p>" for i in range(200))
+    return LISTING_TEMPLATE.format(
+        name=f"Test vehicle {slug}",
+        price=f"{price:,}".replace(",", " "),
+        nav=nav,
+        details=details,
+    )
+
+
+class FakeFlareSolverr:
+    """Threaded fake FlareSolverr server with request counters"""
+
+    def __init__(self, port=0, delay=0.5, page_factory=listing_html):
+        self.delay = delay
+        self.page_factory = page_factory
+        self.requests = 0
+        self.direct_requests = 0
+        self.sessions = set()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def site_url(self):
+        """Base URL under which the fake also serves listing pages directly"""
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle_command(self, payload):
+        cmd = payload.get("cmd")
+        if cmd == "sessions.create":
+            with self._lock:
+                self.sessions.add(payload.get("session"))
+            return {"status": "ok", "message": "Session created successfully."}
+        if cmd == "sessions.destroy":
+            with self._lock:
+                self.sessions.discard(payload.get("session"))
+            return {"status": "ok", "message": "The session has been removed."}
+        if cmd == "sessions.list":
+            with self._lock:
+                return {"status": "ok", "sessions": sorted(self.sessions)}
+        if cmd == "request.get":
+            with self._lock:
+                self.requests += 1
+            time.sleep(self.delay)
+            url = payload["url"]
+            return {
+                "status": "ok",
+                "solution": {
+                    "url": url,
+                    "status": 200,
+                    "response": self.page_factory(url),
+                    "cookies": [{"name": "cf_clearance", "value": "fake", "domain": ".vaurioajoneuvo.fi"}],
+                    "userAgent": "Mozilla/5.0 (fake-flaresolverr)",
+                },
+            }
+        return {"status": "error", "message": f"Unknown command {cmd}"}
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, keep-alive
+            # clients stall on Nagle + delayed ACK and look slower than they are
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                body = json.dumps(fake.handle_command(payload)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.direct_requests += 1
+                if "cf_clearance=fake" in self.headers.get("Cookie", ""):
+                    status, page = 200, fake.page_factory(fake.site_url + self.path)
+                else:
+                    status, page = 403, CHALLENGE_PAGE
+                body = page.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake FlareSolverr server")
+    parser.add_argument("--port", type=int, default=8191)
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds per request.get")
+    args = parser.parse_args()
+    fake = FakeFlareSolverr(port=args.port, delay=args.delay).start()
+    print(f"Fake FlareSolverr listening on {fake.url} (delay {args.delay}s)")
+    try:
+        fake.thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Listing page fixtures for the parser benchmarks.
+
+generate_pages() builds listing pages shaped like vaurioajoneuvo.fi product
+pages (large head, navigation and recommendation blocks around the main
+content), plus variants that exercise each extractor fallback.
+load_pages(directory) reads recorded *.html pages instead.
+"""
+
+import glob
+import os
+
+HEAD = """<!DOCTYPE html>
+<html lang="fi">
+<head>
+<meta charset="utf-8">
+<title>{name} | Vaurioajoneuvo.fi</title>
+{meta}
+<style>{css}</style>
+<script type="application/ld+json">{ld_json}</script>
+<script>{inline_js}</script>
+</head>
+"""
+
+NAV = """<header class="site-header">
+<nav class="main-nav"><ul>{items}</ul></nav>
+<div class="breadcrumbs"><a href="/">Etusivu</a> &rsaquo; <a href="/kategoria/henkiloautot/">Henkilöautot</a> &rsaquo; {name}</div>
+</header>
+"""
+
+MAIN = """<main id="content">
+<div class="product-gallery">{gallery}</div>
+<div class="product-summary">
+<h1 class="name">{name}</h1>
+{price_block}
+<div class="auction-info"><span class="label">Huutokauppa päättyy</span> <time datetime="2025-09-01T12:00">1.9.2025 klo 12.00</time></div>
+</div>
+<table class="specs">{specs}</table>
+<div class="description">{description}</div>
+</main>
+"""
+
+FOOTER = """<section class="related"><h2>Samankaltaisia kohteita</h2>{related}</section>
+<footer class="site-footer">{footer}</footer>
+<script>{tail_js}</script>
+</body>
+</html>
+"""
+
+
+def _listing(name, price_block, seed=1):
+    meta = "\n".join(f'<meta name="x-meta-{i}" content="arvo {i * seed}">' for i in range(30))
+    css = " ".join(f".c{i}{{margin:{i}px;padding:{i % 7}px}}" for i in range(400))
+    ld_json = '{"@type":"Product","name":"%s","offers":{"priceCurrency":"EUR"}}' % name
+    inline_js = "var cfg={" + ",".join(f'"k{i}":"{i * 31}"' for i in range(300)) + "};"
+    items = "".join(f'<li><a href="/kategoria/{i}/">Kategoria {i}</a></li>' for i in range(60))
+    gallery = "".join(f'<img src="/kuvat/{seed}/{i}.jpg" alt="Kuva {i}">' for i in range(25))
+    specs = "".join(f"<tr><th>Ominaisuus {i}</th><td>Arvo {i * seed}</td></tr>" for i in range(80))
+    description = "".join(f"<p>Kuvausteksti rivi {i}: ajoneuvossa vaurioita kohdassa {i}.</p>" for i in range(60))
+    related = "".join(
+        f'<div class="card"><a href="/tuote/{i}/">Kohde {i}</a><span class="card-price">{1000 + i * 50} €</span></div>'
+        for i in range(40)
+    )
+    footer = "".join(f'<a href="/sivu/{i}/">Linkki {i}</a>' for i in range(80))
+    tail_js = "window.dataLayer=[" + ",".join(f'{{"e":"v{i}"}}' for i in range(200)) + "];"
+    return (
+        HEAD.format(name=name, meta=meta, css=css, ld_json=ld_json, inline_js=inline_js)
+        + "<body>\n"
+        + NAV.format(items=items, name=name)
+        + MAIN.format(name=name, price_block=price_block, gallery=gallery, specs=specs, description=description)
+        + FOOTER.format(related=related, footer=footer, tail_js=tail_js)
+    )
+
+
+def generate_pages():
+    """Return {fixture name: html} covering the normal page and each fallback"""
+    return {
+        "listing": _listing("Toyota Corolla 1.8 Hybrid 2019", '<p class="price">3 450 €</p>', seed=1),
+        "listing_nested_price": _listing(
+            "Skoda Octavia &amp; Combi", '<p class="price current"><strong>12&nbsp;900</strong> <span>€</span></p>', seed=2
+        ),
+        "listing_span_price": _listing("Volvo V70", '<span class="price">2 100 €</span>', seed=3),
+        "listing_div_price": _listing("Ford Focus", '<div class="price big">900 €</div>', seed=4),
+        "listing_changed_layout": _listing("Audi A4", '<div class="hinta">7 300 €</div>', seed=5),
+        "listing_no_price": _listing("Nissan Leaf", "<p>Myyty</p>", seed=6),
+    }
+
+
+def load_pages(directory):
+    """Load recorded pages from directory as {file name: html}"""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Replay archived listing pages (see SNAPSHOT_ARCHIVE) through the extractors
+without touching the network.
+
+Every capture in the archive is re-extracted with each backend and compared
+with the outcome recorded when it was fetched, so a page that broke parsing
+in production can be reproduced and a fix checked against it. Then each
+backend's throughput is measured over the distinct archived pages.
+
+Exits with status 1 if any capture fails to extract with the --extractor
+backend (default: the configured one).
+
+Usage: python benchmarks/replay_snapshots.py [--archive watcher/snapshots.db] [--url URL]
+           [--failures] [--extractor fast|bs4] [--rounds 20] [--no-bench]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_extractors import run_extractor, measure
+from app.extractors import EXTRACTORS, get_extractor
+from app.snapshot_archive import SnapshotArchive, SNAPSHOT_ARCHIVE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay archived listing pages through the extractors")
+    parser.add_argument("--archive", default=SNAPSHOT_ARCHIVE or None, help="Snapshot archive database")
+    parser.add_argument("--url", help="Only replay captures of this URL")
+    parser.add_argument("--failures", action="store_true", help="Only replay captures whose extraction failed")
+    parser.add_argument("--extractor", default=get_extractor().name, choices=sorted(EXTRACTORS),
+                        help="Backend whose failures set the exit status")
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over all pages per backend")
+    parser.add_argument("--no-bench", action="store_true", help="Only replay, skip the throughput run")
+    args = parser.parse_args()
+
+    if not args.archive or not os.path.exists(args.archive):
+        print("No snapshot archive, pass --archive or set SNAPSHOT_ARCHIVE")
+        return 1
+    archive = SnapshotArchive(args.archive)
+    captures = archive.captures(url=args.url, failed_only=args.failures)
+    if not captures:
+        print("No matching captures in the archive")
+        return 1
+
+    start = time.perf_counter()
+    pages = {digest: archive.load(digest) for digest in {c["hash"] for c in captures}}
+    load_ms = (time.perf_counter() - start) * 1000
+    stats = archive.stats()
+    print(f"Archive: {stats['snapshots']} pages, {stats['size'] / 1024:.0f} KiB raw, "
+          f"{stats['stored'] / 1024:.0f} KiB stored ({', '.join(stats['stored_codecs'])})")
+    print(f"{len(captures)} captures of {len(pages)} distinct pages, decompressed in {load_ms:.1f} ms")
+
+    failed = 0
+    for capture in captures:
+        html = pages[capture["hash"]]
+        results = {backend: run_extractor(extractor, html, capture["url"]) for backend, extractor in EXTRACTORS.items()}
+        result = results[args.extractor]
+        now_failing = isinstance(result, str)
+        failed += now_failing
+        recorded = capture["error"] or "ok"
+        status = "FAIL" if now_failing else "ok"
+        if bool(capture["error"]) != now_failing:
+            status += " (changed)"
+        print(f"{status:<13} {capture['hash'][:12]} {capture['url']} seen {capture['hits']}x, recorded: {recorded}")
+        for backend, got in results.items():
+            print(f"    {backend:<6} {got}")
+    print(f"Replay: {failed} of {len(captures)} captures fail with {args.extractor}")
+
+    if not args.no_bench:
+        print(f"{'backend':<11} {'CPU ms/page':>12} {'pages/s':>10} {'peak KiB':>10}")
+        for backend, extractor in EXTRACTORS.items():
+            cpu_ms, peak_kib = measure(extractor, pages, args.rounds)
+            print(f"{backend:<11} {cpu_ms:>12.3f} {1000 / cpu_ms:>10.0f} {peak_kib:>10.0f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
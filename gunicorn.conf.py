@@ -0,0 +1,10 @@
+# gunicorn.conf.py
+# Loaded by start.sh; command line options there take precedence
+
+
+def post_fork(server, worker):
+    """Join the watcher leader election as soon as a worker is forked, so a
+    new leader takes over (and resumes the watcher) before any request
+    reaches it. Workers also join on their first watcher request."""
+    from app.leader import watcher_leader
+    watcher_leader.ensure_started()
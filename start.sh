@@ -7,8 +7,11 @@ fi
 exec gunicorn \
     --bind 127.0.0.1:5000 \
     --workers 2 \
+    --worker-class gthread \
+    --threads 8 \
     --timeout 120 \
     --max-requests 1000 \
     --max-requests-jitter 100 \
     --preload \
+    --config gunicorn.conf.py \
     run:app
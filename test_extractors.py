@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Check that the fast extractor reads the same price and name as the
+BeautifulSoup reference, on the generated listing fixtures and on broken
+HTML (unclosed, stray and misnested tags).
+
+Run with: python -m pytest test_extractors.py  (or python test_extractors.py)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+from app.extractors import FastExtractor, BeautifulSoupExtractor, ExtractionError, parse_price
+from listing_fixtures import generate_pages
+
+URL = "https://www.vaurioajoneuvo.fi/tuote/test/"
+
+BROKEN_PAGES = {
+    "unclosed inline tag in price": '<p class="price">3 000 <b>€</p><p>1234</p><h1 class="name">Auto</h1>',
+    "stray end tag in price": '<p class="price">3 000 </span>€ 99</p><h1 class="name">Auto</h1>',
+    "stray end tag before price": '</p></div><p class="price">2 500 €</p><h1 class="name">Auto</h1>',
+    "parent closed around price": '<div><p class="price">3 000 <i>€</div> 5</p> 7<h1 class="name">Auto</h1>',
+    "nested p in price": '<p class="price">1<p>2</p>3</p>4<h1 class="name">Auto</h1>',
+    "self-closing tag in price": '<p class="price">3 000 <span/> 4</p>5<h1 class="name">Auto</h1>',
+    "unclosed tag in name": '<h1 class="name">Auto <b>Sport</h1>Muu<p class="price">1 000 €</p>',
+    "end tag inside script": '<p class="price">1<script>var a = "9</p>";</script>2</p><h1 class="name">Auto</h1>',
+    "unclosed price at end": '<h1 class="name">Auto</h1><p class="price">4 200 <b>€',
+    "span fallback with stray tags": '<span class="price">7 </div>700 €</span>8<h1 class="name">Auto</h1>',
+    "no price element": '<h1 class="name">Auto</h1><p>Hinta 3 000 €</p>',
+}
+
+
+def _outcome(extractor, html):
+    try:
+        return extractor.extract(html, URL)
+    except ExtractionError as e:
+        return f"ExtractionError: {e}"
+
+
+def test_broken_html_matches_bs4():
+    for label, html in BROKEN_PAGES.items():
+        fast, reference = _outcome(FastExtractor(), html), _outcome(BeautifulSoupExtractor(), html)
+        assert fast == reference, f"{label}: fast {fast} != bs4 {reference}"
+
+
+def test_unclosed_tag_does_not_capture_later_text():
+    result = FastExtractor().extract(BROKEN_PAGES["unclosed inline tag in price"], URL)
+    assert result == {"price": 3000, "name": "Auto"}
+
+
+def test_parse_price_drops_decimals():
+    assert parse_price("3 000 €") == 3000
+    assert parse_price("2200.50") == 2200
+    assert parse_price("2 200,50 €") == 2200
+    assert parse_price("2,200.50 €") == 2200
+    assert parse_price("2.200 €") == 2200
+    assert parse_price("1.234.567,8 €") == 1234567
+    assert parse_price("€") == 0
+
+
+def test_generated_fixtures_match_bs4():
+    for name, html in generate_pages().items():
+        fast, reference = _outcome(FastExtractor(), html), _outcome(BeautifulSoupExtractor(), html)
+        assert fast == reference, f"{name}: fast {fast} != bs4 {reference}"
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
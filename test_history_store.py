@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Check HistoryStore rollups: aggregate() over windows that cut rollup blocks
+and compaction of prices that do not fit the packed bucket format.
+
+Run with: python -m pytest test_history_store.py  (or python test_history_store.py)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.history_store import HistoryStore, HOUR, DAY, PACKED_PRICE_MAX, unpack_buckets
+
+URL = "https://www.vaurioajoneuvo.fi/tuote/test/"
+
+# Day-aligned start of the recorded history, well past the raw retention
+BASE = 1_000 * DAY
+
+
+def _store(tmp_path, hours=48, price=lambda hour: 1000 + hour):
+    """Store with one observation a minute past every hour from BASE, all rolled up hourly"""
+    store = HistoryStore(str(tmp_path / "history.db"), raw_retention="1d", hourly_retention="3650d")
+    store.record_many([(URL, BASE + hour * HOUR + 60, price(hour), None) for hour in range(hours)])
+    store.compact(now=BASE + 30 * DAY)
+    return store
+
+
+def test_sub_span_window_counts_each_block_once(tmp_path):
+    store = _store(tmp_path)
+    # Starts just after a block start and ends before that block does
+    start, end = BASE + 0.5, BASE + 10 * HOUR
+    [(_, low, high, last, samples)] = store.aggregate([URL], start, end, DAY)[URL]
+    assert (low, high, last, samples) == (1001, 1009, 1009, 9)
+
+
+def test_aggregate_across_block_boundaries(tmp_path):
+    store = _store(tmp_path)
+    start, end = BASE + 20 * HOUR, BASE + DAY + 4 * HOUR
+    [(_, low, high, last, samples)] = store.aggregate([URL], start, end, 2 * DAY)[URL]
+    assert (low, high, last, samples) == (1020, 1027, 1027, 8)
+    hourly = store.aggregate([URL], start, end, HOUR)[URL]
+    assert [bucket[0] for bucket in hourly] == [BASE + hour * HOUR for hour in range(20, 28)]
+    assert all(bucket[4] == 1 for bucket in hourly)
+
+
+def test_aggregate_across_raw_hourly_and_daily_history(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), raw_retention="1d", hourly_retention="2d")
+    store.record_many([(URL, BASE + hour * HOUR + 60, 1000 + hour, None) for hour in range(72)])
+    # Day 0 ends up in daily rollups, day 1 in hourly ones and day 2 stays raw
+    store.compact(now=BASE + 3 * DAY + 60)
+    levels = store._connect().execute("SELECT resolution, COUNT(*) FROM rollups GROUP BY resolution").fetchall()
+    assert dict(levels) == {HOUR: 1, DAY: 1}
+
+    daily = store.aggregate([URL], BASE, BASE + 3 * DAY, DAY)[URL]
+    assert daily == [(BASE + day * DAY, 1000 + 24 * day, 1023 + 24 * day, 1023 + 24 * day, 24) for day in range(3)]
+    [(_, low, high, last, samples)] = store.aggregate([URL], BASE, BASE + 3 * DAY, 4 * DAY)[URL]
+    assert (low, high, last, samples) == (1000, 1071, 1071, 72)
+    # Cut inside the daily bucket (left out, never finer than its rollup) and inside the raw day
+    cut = store.aggregate([URL], BASE + 12 * HOUR + 0.5, BASE + 2 * DAY + 6 * HOUR, DAY)[URL]
+    assert cut == [(BASE + DAY, 1024, 1047, 1047, 24), (BASE + 2 * DAY, 1048, 1053, 1053, 6)]
+
+
+def test_compaction_clamps_prices_outside_packed_range(tmp_path):
+    store = _store(tmp_path, hours=2, price=lambda hour: 10 ** 12 if hour else 2200)
+    conn = store._connect()
+    packed, high = conn.execute("SELECT buckets, high FROM rollups WHERE resolution = ?", (HOUR,)).fetchone()
+    assert unpack_buckets(packed)[1][:3] == (PACKED_PRICE_MAX,) * 3
+    assert high == PACKED_PRICE_MAX
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Check ProductStore's id migration and transactions, and the atomic mode of
+product_io.apply_operations().
+
+Run with: python -m pytest test_product_store.py  (or python test_product_store.py)
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.product_store import ProductStore
+from app.product_io import apply_operations
+
+
+def _write_file(path, products):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(products, f)
+
+
+def _read_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _product(n, **fields):
+    return {"url": f"https://www.vaurioajoneuvo.fi/tuote/{n}/", "target_price": 1000 * n, "name": f"Auto {n}", **fields}
+
+
+def test_ids_are_assigned_and_persisted(tmp_path):
+    path = str(tmp_path / "products.json")
+    _write_file(path, [_product(1), _product(2, id="p000000000002")])
+    products = ProductStore(path).load()
+    assert products[1]["id"] == "p000000000002"
+    assert products[0]["id"].startswith("p") and products[0]["id"] != products[1]["id"]
+    assert [p["id"] for p in _read_file(path)] == [p["id"] for p in products]
+    # Another process sees the same ids
+    assert ProductStore(path).load() == products
+
+
+def test_ids_kept_in_memory_when_they_cannot_be_saved(tmp_path, monkeypatch):
+    path = str(tmp_path / "products.json")
+    _write_file(path, [_product(1)])
+    store = ProductStore(path)
+
+    def full_disk(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr("app.product_store.tempfile.mkstemp", full_disk)
+    [product] = store.load()
+    assert store.get(product["id"]) == product
+    assert store.load()[0]["id"] == product["id"]
+    assert "id" not in _read_file(path)[0]
+
+
+def test_transaction_rolls_back_on_error(tmp_path):
+    path = str(tmp_path / "products.json")
+    store = ProductStore(path)
+    store.save([_product(1)])
+    before = _read_file(path)
+    with pytest.raises(RuntimeError):
+        with store.transaction() as products:
+            products.append(_product(2))
+            products[0]["target_price"] = 1
+            raise RuntimeError("abort")
+    assert _read_file(path) == before
+    assert store.load() == before
+
+
+def test_transaction_saves_changes(tmp_path):
+    store = ProductStore(str(tmp_path / "products.json"))
+    with store.transaction() as products:
+        products.append(_product(1))
+    [product] = ProductStore(store.path).load()
+    assert product["id"] and store.find_by_url(product["url"]) == product
+
+
+def test_atomic_batch_saves_nothing_when_an_operation_fails(tmp_path):
+    store = ProductStore(str(tmp_path / "products.json"))
+    store.save([_product(1)])
+    [existing] = store.load()
+    applied, results = apply_operations(store, [
+        {"op": "update", "id": existing["id"], "target_price": 5},
+        {"op": "insert", **_product(2)},
+        {"op": "delete", "id": "p000000000000"},
+    ])
+    assert not applied
+    assert [r["success"] for r in results] == [True, True, False]
+    assert store.load() == [existing]
+
+
+def test_non_atomic_batch_saves_the_successful_operations(tmp_path):
+    store = ProductStore(str(tmp_path / "products.json"))
+    store.save([_product(1)])
+    [existing] = store.load()
+    applied, results = apply_operations(store, [
+        {"op": "update", "id": existing["id"], "target_price": 5},
+        {"op": "insert", **_product(1)},
+        {"op": "insert", **_product(2)},
+    ], atomic=False)
+    assert applied
+    assert [r["success"] for r in results] == [True, False, True]
+    assert [(p["url"], p["target_price"]) for p in store.load()] == [(existing["url"], 5), (_product(2)["url"], 2000)]
+
+
+def test_batch_operations_see_earlier_ones(tmp_path):
+    store = ProductStore(str(tmp_path / "products.json"))
+    store.save([_product(1)])
+    [existing] = store.load()
+    # The URL is free again once the first operation moved the product away
+    applied, _ = apply_operations(store, [
+        {"op": "update", "id": existing["id"], "url": _product(3)["url"]},
+        {"op": "insert", **_product(1)},
+    ])
+    assert applied
+    assert sorted(p["url"] for p in store.load()) == sorted([_product(1)["url"], _product(3)["url"]])
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Check the watcher's request pacing: CheckScheduler dispatch order,
+HostRateLimiter token reservations and CircuitBreaker state transitions.
+
+Run with: python -m pytest test_scheduling.py  (or python test_scheduling.py)
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.scheduler import CheckScheduler
+from app.rate_limiter import HostRateLimiter
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from app.flaresolverr import FlareSolverrError
+
+HOST = "www.vaurioajoneuvo.fi"
+
+
+def _item(n):
+    return {"id": f"p{n:012x}", "url": f"https://{HOST}/tuote/{n}/", "target_price": 1000}
+
+
+class Clock:
+    """Stand-in for the time module with a settable time()"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+# --- CheckScheduler ---
+
+def test_new_products_are_due_at_once():
+    scheduler = CheckScheduler()
+    scheduler.sync([_item(1), _item(2)], now=100)
+    assert [item["id"] for item in scheduler.pop_due(100)] == [_item(1)["id"], _item(2)["id"]]
+    # In flight until scheduled again
+    assert scheduler.pop_due(10_000) == []
+    assert scheduler.next_due() is None
+
+
+def test_pop_due_orders_by_due_time_then_priority():
+    scheduler = CheckScheduler()
+    items = [_item(n) for n in range(1, 5)]
+    scheduler.sync(items, now=0)
+    scheduler.pop_due(0)
+    scheduler.schedule(items[0], checked_at=0, interval=60, priority=1.0)
+    scheduler.schedule(items[1], checked_at=0, interval=30, priority=1.0)
+    scheduler.schedule(items[2], checked_at=0, interval=60, priority=2.0)
+    scheduler.schedule(items[3], checked_at=0, interval=120, priority=4.0)
+    assert scheduler.next_due() == 30
+    assert [item["id"] for item in scheduler.pop_due(59)] == [items[1]["id"]]
+    assert [item["id"] for item in scheduler.pop_due(60)] == [items[2]["id"], items[0]["id"]]
+    assert scheduler.pop_due(119) == []
+
+
+def test_removed_products_are_not_handed_out():
+    scheduler = CheckScheduler()
+    scheduler.sync([_item(1), _item(2)], now=0)
+    scheduler.sync([_item(2)], now=0)
+    assert [item["id"] for item in scheduler.pop_due(0)] == [_item(2)["id"]]
+    # Scheduling a product removed while it was checked is a no-op
+    scheduler.schedule(_item(1), checked_at=0, interval=60, priority=1.0)
+    assert len(scheduler) == 1
+
+
+def test_expedite_makes_waiting_products_due():
+    scheduler = CheckScheduler()
+    items = [_item(1), _item(2), _item(3)]
+    scheduler.sync(items, now=0)
+    scheduler.pop_due(0)
+    for item in items[:2]:
+        scheduler.schedule(item, checked_at=0, interval=600, priority=1.0)
+    # The third product is still in flight: counted, not rescheduled
+    assert scheduler.expedite(10, {items[0]["id"], items[2]["id"]}) == 2
+    assert [item["id"] for item in scheduler.pop_due(10)] == [items[0]["id"]]
+    assert scheduler.expedite(20) == 3
+    assert [item["id"] for item in scheduler.pop_due(20)] == [items[1]["id"]]
+
+
+# --- HostRateLimiter ---
+
+@pytest.fixture
+def limiter(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("app.rate_limiter.time", clock)
+    limiter = HostRateLimiter(path=str(tmp_path / "rate_limits.json"), per_minute=60, burst=2, jitter=0)
+    limiter.clock = clock
+    return limiter
+
+
+def test_reserve_allows_a_burst_then_queues(limiter):
+    assert limiter.reserve(HOST) == 0
+    assert limiter.reserve(HOST) == 0
+    assert limiter.reserve(HOST) == pytest.approx(1)
+    assert limiter.reserve(HOST) == pytest.approx(2)
+    limiter.clock.now += 1.5
+    assert limiter.reserve(HOST) == pytest.approx(1.5)
+    assert limiter.reserve("other.example") == 0
+
+
+def test_reserve_past_max_wait_takes_nothing(limiter):
+    limiter.reserve(HOST)
+    limiter.reserve(HOST)
+    assert limiter.reserve(HOST, max_wait=0.5) is None
+    assert limiter.reserve(HOST, max_wait=1) == pytest.approx(1)
+
+
+def test_refund_gives_the_token_back(limiter):
+    limiter.reserve(HOST)
+    limiter.reserve(HOST)
+    assert limiter.reserve(HOST) == pytest.approx(1)
+    limiter.refund(HOST)
+    assert limiter.reserve(HOST) == pytest.approx(1)
+    # Never above the burst size
+    limiter.clock.now += 60
+    limiter.refund(HOST)
+    assert [limiter.reserve(HOST) for _ in range(3)] == [0, 0, pytest.approx(1)]
+
+
+def test_buckets_are_shared_through_the_file(limiter):
+    other = HostRateLimiter(path=limiter.path, per_minute=60, burst=2, jitter=0)
+    limiter.reserve(HOST)
+    other.reserve(HOST)
+    assert limiter.reserve(HOST) == pytest.approx(1)
+
+
+def test_disabled_limiter_never_waits(tmp_path):
+    limiter = HostRateLimiter(path=str(tmp_path / "rate_limits.json"), per_minute=0)
+    assert [limiter.reserve(HOST) for _ in range(10)] == [0] * 10
+    assert not os.path.exists(limiter.path)
+
+
+# --- CircuitBreaker ---
+
+@pytest.fixture
+def breaker(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("app.circuit_breaker.time", clock)
+    breaker = CircuitBreaker(failures=2, backoff=10, max_backoff=25)
+    breaker.clock = clock
+    return breaker
+
+
+def _fail(breaker):
+    with pytest.raises(FlareSolverrError):
+        with breaker.attempt(HOST):
+            raise FlareSolverrError("CAPTCHA")
+
+
+def _state(breaker):
+    return breaker.states().get(HOST, {}).get("state", CLOSED)
+
+
+def test_circuit_opens_after_consecutive_failures(breaker):
+    _fail(breaker)
+    assert _state(breaker) == CLOSED
+    _fail(breaker)
+    assert _state(breaker) == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(HOST)
+
+
+def test_success_resets_the_failure_count(breaker):
+    _fail(breaker)
+    with breaker.attempt(HOST):
+        pass
+    _fail(breaker)
+    assert _state(breaker) == CLOSED
+
+
+def test_half_open_lets_one_probe_through(breaker):
+    _fail(breaker)
+    _fail(breaker)
+    breaker.clock.now += 10
+    breaker.before_request(HOST)
+    assert _state(breaker) == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(HOST)
+
+
+def test_failed_probe_doubles_the_backoff(breaker):
+    _fail(breaker)
+    _fail(breaker)
+    for backoff in (20, 25):
+        breaker.clock.now += 30
+        _fail(breaker)
+        assert _state(breaker) == OPEN
+        assert breaker.states()[HOST]["retry_at"] == breaker.clock.now + backoff
+
+
+def test_successful_probe_closes_the_circuit(breaker):
+    _fail(breaker)
+    _fail(breaker)
+    breaker.clock.now += 10
+    with breaker.attempt(HOST):
+        pass
+    assert breaker.states() == {}
+    breaker.before_request(HOST)
+
+
+def test_probe_without_outcome_is_released(breaker):
+    _fail(breaker)
+    _fail(breaker)
+    breaker.clock.now += 10
+    with pytest.raises(KeyboardInterrupt):
+        with breaker.attempt(HOST):
+            raise KeyboardInterrupt
+    assert _state(breaker) == OPEN
+    # The next request may probe right away
+    breaker.before_request(HOST)
+    assert _state(breaker) == HALF_OPEN
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
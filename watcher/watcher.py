@@ -1,18 +1,29 @@
 import os
 import time
-import json
 import sys
 import random
-import requests
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
 from colorama import init, Fore, Style
 
+# Share the web app's keep-alive HTTP client and extractors
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.http_client import http_client
+from app.extractors import get_extractor
+from app.snapshot_archive import extract_and_record
+from app.rate_limiter import rate_limiter
+from app.product_store import ProductStore
+from app.product_io import detect_format, iter_rows, import_products, export_products, ImportFormatError
+from app.config_store import ConfigStore
+
 # Initialize colorama for cross-platform colored output
 init(autoreset=True)
 
 # Config and product file paths
 CONFIG_FILE = "config.json"
 PRODUCTS_FILE = "products.json"
+# The CLI keeps its own config.json and does not create one
+config_store = ConfigStore(CONFIG_FILE, defaults=None)
+product_store = ProductStore(PRODUCTS_FILE)
 
 # Default interval in seconds
 DEFAULT_INTERVAL = 360
@@ -32,14 +43,8 @@ def load_config():
     """
     Load configuration from CONFIG_FILE. Returns a dict. If not found, returns empty dict.
     """
-    if not os.path.exists(CONFIG_FILE):
-        return {}
     try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, dict):
-                raise ValueError("Invalid config format")
-            return data
+        return config_store.raw()
     except Exception as e:
         print(Fore.RED + f"[ERROR] Failed to load config: {e}" + Style.RESET_ALL)
         return {}
@@ -51,9 +56,7 @@ def send_telegram_message(text: str):
     if not token or not chat_id:
         return  # Telegram is not configured
     try:
-        url = f"https://api.telegram.org/bot{token}/sendMessage"
-        payload = {"chat_id": chat_id, "text": text}
-        response = requests.post(url, json=payload, timeout=10)
+        response = http_client.send_telegram(token, chat_id, text)
         if not response.ok:
             print(Fore.RED + f"[ERROR] Telegram send failed: {response.text}" + Style.RESET_ALL)
     except Exception as e:
@@ -117,15 +120,6 @@ def get_interval_from_args_or_config():
     # Default
     return False, DEFAULT_INTERVAL
 
-def parse_price(price_str: str) -> int:
-    """
-    Convert a price string like '2 200 €' to an integer 2200.
-    Removes euro sign, spaces, and converts to int.
-    """
-    cleaned = price_str.replace("€", "").replace("\xa0", "").replace(" ", "").replace(",", "").strip()
-    return int(float(cleaned))
-
-
 def fetch_product_data(url: str):
     """
     Fetch product data (name and price) from the given URL using FlareSolverr.
@@ -137,45 +131,28 @@ def fetch_product_data(url: str):
         "url": url,
         "maxTimeout": 60000
     }
+    # Shares the per-site request budget with the web app's watcher
+    rate_limiter.acquire(urlparse(url).netloc.lower())
     try:
         # Use FlareSolverr to bypass anti-bot protections
-        resp = requests.post(FLARESOLVERR_URL, json=payload, timeout=70)
+        resp = http_client.post(FLARESOLVERR_URL, read_timeout=70, json=payload)
         resp.raise_for_status()
         html = resp.json()["solution"]["response"]
     except Exception as e:
         raise RuntimeError(f"Flaresolverr error: {e}")
 
     # Parse the HTML to extract price and name
-    soup = BeautifulSoup(html, "html.parser")
-    price_tag = soup.find("p", class_="price")
-    if not price_tag:
-        raise ValueError("Price not found.")
-    price = parse_price(price_tag.get_text(strip=True))
-
-    name_tag = soup.find("h1", class_="name")
-    name = name_tag.get_text(strip=True) if name_tag else url
-
-    return {
-        "price": price,
-        "name": name,
-    }
+    return extract_and_record(get_extractor(), html, url)
 
 def load_products():
-    if not os.path.exists(PRODUCTS_FILE):
-        return []
     try:
-        with open(PRODUCTS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, list):
-                raise ValueError("Invalid format")
-            return data
+        return product_store.load()
     except Exception as e:
         print(Fore.RED + f"[ERROR] Failed to load product list: {e}" + Style.RESET_ALL)
         return []
 
 def save_products(products):
-    with open(PRODUCTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(products, f, indent=2, ensure_ascii=False)
+    product_store.save(products)
 
 def print_divider():
     print(Fore.BLUE + Style.BRIGHT + "=" * 60 + Style.RESET_ALL)
@@ -205,11 +182,51 @@ def add_product():
     except Exception as e:
         print(Fore.YELLOW + f"[WARNING] Failed to fetch product data: {e}" + Style.RESET_ALL)
         return
-    products = load_products()
-    products.append({"url": url, "target_price": target, "name": name})
-    save_products(products)
+    with product_store.transaction() as products:
+        products.append({"url": url, "target_price": target, "name": name})
     print(Fore.GREEN + f"[INFO] Added: {name} at target {target} €" + Style.RESET_ALL)
 
+def import_file(path, update=False, dry_run=False):
+    """
+    Bulk add products from a CSV or JSONL file (format from the extension).
+    All valid rows are saved in one write; invalid and duplicate rows are listed.
+    """
+    try:
+        fmt = detect_format(filename=path)
+        with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+            report = import_products(product_store, iter_rows(f, fmt), update=update, dry_run=dry_run)
+    except (OSError, ImportFormatError) as e:
+        print(Fore.RED + f"[ERROR] Import failed: {e}" + Style.RESET_ALL)
+        return 1
+    for error in report["errors"]:
+        print(Fore.YELLOW + f"[SKIPPED] Line {error['line']}: {error['error']}" + Style.RESET_ALL)
+    if report["errors_truncated"]:
+        print(Fore.YELLOW + "[SKIPPED] ... more rows not listed" + Style.RESET_ALL)
+    prefix = "[DRY RUN] " if dry_run else ""
+    print(Fore.GREEN + f"[INFO] {prefix}{report['rows']} rows: {report['added']} added, "
+          f"{report['updated']} updated, {report['skipped']} skipped" + Style.RESET_ALL)
+    return 0
+
+def export_file(path=None, fmt=None):
+    """
+    Write the watchlist as CSV or JSONL to path, or to stdout when path is omitted.
+    """
+    try:
+        fmt = detect_format(fmt, filename=path) if (fmt or path) else "csv"
+    except ImportFormatError as e:
+        print(Fore.RED + f"[ERROR] {e}" + Style.RESET_ALL)
+        return 1
+    products = load_products()
+    if path is None:
+        for chunk in export_products(products, fmt):
+            sys.stdout.write(chunk)
+        return 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for chunk in export_products(products, fmt):
+            f.write(chunk)
+    print(Fore.GREEN + f"[INFO] Exported {len(products)} products to {path}" + Style.RESET_ALL)
+    return 0
+
 def watch_loop():
     """
     Main loop to periodically check all products' prices.
@@ -337,11 +354,8 @@ def set_interval():
         print(Fore.RED + f"[ERROR] Invalid interval: {e}" + Style.RESET_ALL)
         return
     # Save to config
-    config = load_config()
-    config["interval"] = new_interval
     try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        config_store.update(interval=new_interval)
         print(Fore.GREEN + f"Interval set to: {new_interval}" + Style.RESET_ALL)
     except Exception as e:
         print(Fore.RED + f"[ERROR] Failed to save config: {e}" + Style.RESET_ALL)
@@ -381,8 +395,24 @@ def main():
         else:
             print(Fore.RED + "Invalid choice. Please select 1, 2, 3, 4, 5, or 6." + Style.RESET_ALL)
 
+def option_value(name):
+    """Value following a --name option on the command line, or None"""
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return None
+
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1].lower() == "watch":
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else None
+    if command == "import":
+        if len(sys.argv) < 3:
+            print("Usage: python watcher.py import FILE.csv|FILE.jsonl [--update] [--dry-run]")
+            sys.exit(2)
+        sys.exit(import_file(sys.argv[2], update="--update" in sys.argv, dry_run="--dry-run" in sys.argv))
+    elif command == "export":
+        path = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].startswith("--") else None
+        sys.exit(export_file(path, option_value("--format")))
+    elif command == "watch":
         print(Fore.MAGENTA + Style.BRIGHT + "[INFO] Running in watch mode (no menu). Press Ctrl+C to stop." + Style.RESET_ALL)
         try:
             watch_loop()